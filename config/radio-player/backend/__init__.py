@@ -2,12 +2,18 @@
 Cheeky Radio Player Backend Modules
 """
 
-from .config import ConfigManager
-from .player import PlayerController
-from .stations import StationsClient
-from .favorites import FavoritesManager
-from .recent import RecentManager
-from .websocket import WebSocketManager
+from importlib import import_module
+
+# Exported classes are imported on first access, so importing one light module
+# (e.g. backend.config) doesn't pull in aiohttp and the player stack at boot
+_EXPORTS = {
+    "ConfigManager": ".config",
+    "PlayerController": ".player",
+    "StationsClient": ".stations",
+    "FavoritesManager": ".favorites",
+    "RecentManager": ".recent",
+    "WebSocketManager": ".websocket",
+}
 
 __all__ = [
     "ConfigManager",
@@ -17,3 +23,9 @@ __all__ = [
     "RecentManager",
     "WebSocketManager"
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
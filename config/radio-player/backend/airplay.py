@@ -8,6 +8,11 @@ from typing import List, Dict, Optional
 import socket
 import struct
 
+from backend.metrics import track_subprocess
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
 class AirplayManager:
     """Manages Airplay receiver discovery and connection"""
 
@@ -31,42 +36,41 @@ class AirplayManager:
         """Browse for Airplay devices using Avahi"""
         try:
             # Use -p (parsable) and -t (terminate) for fast, reliable parsing
-            print(f"[Cheeky] Running avahi-browse with timeout={self.timeout}s")
-            result = subprocess.run(
-                ['avahi-browse', '-p', '-t', '-r', '_raop._tcp'],
-                capture_output=True,
-                text=True,
-                timeout=self.timeout
-            )
-            print(f"[Cheeky] avahi-browse returned: rc={result.returncode}, stdout_len={len(result.stdout)}")
+            logger.debug("Running avahi-browse with timeout=%ss", self.timeout)
+            with track_subprocess("avahi-browse", "run"):
+                result = subprocess.run(
+                    ['avahi-browse', '-p', '-t', '-r', '_raop._tcp'],
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout
+                )
+            logger.debug("avahi-browse returned: rc=%s, stdout_len=%s", result.returncode, len(result.stdout))
             return result.stdout.strip() if result.returncode == 0 else None
         except FileNotFoundError:
-            print("[Cheeky] avahi-browse not found - Airplay discovery unavailable")
+            logger.warning("avahi-browse not found - Airplay discovery unavailable")
             return None
         except subprocess.TimeoutExpired as e:
             # Even on timeout, we might have partial output - use it!
-            print(f"[Cheeky] Airplay discovery timeout after {self.timeout}s, checking partial output")
+            logger.warning("Airplay discovery timeout after %ss, checking partial output", self.timeout)
             if e.stdout:
                 output = e.stdout.decode('utf-8') if isinstance(e.stdout, bytes) else e.stdout
                 if output and output.strip():
-                    print(f"[Cheeky] Using partial output from timeout: {len(output)} chars")
+                    logger.debug("Using partial output from timeout: %s chars", len(output))
                     return output.strip()
-            print("[Cheeky] No partial output available from timeout")
+            logger.warning("No partial output available from timeout")
             return None
         except Exception as e:
-            print(f"[Cheeky] Airplay browse error: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Airplay browse error: %s: %s", type(e).__name__, e)
             return None
 
     async def discover_airplay_devices(self) -> List[Dict]:
         """Discover available Airplay receiver devices"""
-        await asyncio.sleep(0)  # Make it async
-
         try:
-            output = self._run_avahi_browse()
+            # avahi-browse can take up to self.timeout - don't block the event loop
+            loop = asyncio.get_event_loop()
+            output = await loop.run_in_executor(None, self._run_avahi_browse)
             if not output:
-                print("[Cheeky] No Airplay devices found (avahi not available)")
+                logger.warning("No Airplay devices found (avahi not available)")
                 return []
 
             devices = []
@@ -107,13 +111,13 @@ class AirplayManager:
                                 "type": "airplay"
                             }
                             devices.append(device)
-                            print(f"[Cheeky] Found Airplay: {device_name} at {address}:{port}")
+                            logger.debug("Found Airplay: %s at %s:%s", device_name, address, port)
 
                     except (IndexError, ValueError) as e:
-                        print(f"[Cheeky] Failed to parse Airplay line: {e}")
+                        logger.warning("Failed to parse Airplay line: %s", e)
                         continue
 
-            print(f"[Cheeky] Discovered {len(devices)} Airplay device(s)")
+            logger.debug("Discovered %s Airplay device(s)", len(devices))
 
             # Cache the discovered devices
             self.last_discovered_devices = devices
@@ -121,7 +125,7 @@ class AirplayManager:
             return devices
 
         except Exception as e:
-            print(f"[Cheeky] Error discovering Airplay devices: {e}")
+            logger.error("Error discovering Airplay devices: %s", e)
             # Return cached devices on error
             return self.last_discovered_devices
 
@@ -143,7 +147,7 @@ class AirplayManager:
                     "port": port,
                     "type": "airplay"
                 }
-                print(f"[Cheeky] Connected to Airplay receiver at {address}:{port}")
+                logger.info("Connected to Airplay receiver at %s:%s", address, port)
                 return {
                     "status": "connected",
                     "message": f"Connected to Airplay receiver at {address}",
@@ -158,7 +162,7 @@ class AirplayManager:
                 }
 
         except Exception as e:
-            print(f"[Cheeky] Airplay connection error: {e}")
+            logger.error("Airplay connection error: %s", e)
             return {
                 "status": "error",
                 "message": str(e),
@@ -173,7 +177,7 @@ class AirplayManager:
             if self.connected_device:
                 addr = self.connected_device.get("address", "Unknown")
                 self.connected_device = None
-                print(f"[Cheeky] Disconnected from Airplay receiver at {addr}")
+                logger.info("Disconnected from Airplay receiver at %s", addr)
                 return {
                     "status": "disconnected",
                     "message": f"Disconnected from Airplay receiver"
@@ -185,7 +189,7 @@ class AirplayManager:
                 }
 
         except Exception as e:
-            print(f"[Cheeky] Airplay disconnect error: {e}")
+            logger.error("Airplay disconnect error: %s", e)
             return {
                 "status": "error",
                 "message": str(e)
@@ -6,6 +6,11 @@ import subprocess
 import asyncio
 from typing import List, Dict, Optional
 
+from backend.metrics import track_subprocess
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
 class BluetoothManager:
     """Manages Bluetooth device pairing and connection"""
 
@@ -15,25 +20,30 @@ class BluetoothManager:
     def _run_bluetoothctl(self, commands: str) -> Optional[str]:
         """Run bluetoothctl with provided commands"""
         try:
-            result = subprocess.run(
-                ['bluetoothctl'],
-                input=commands,
-                capture_output=True,
-                text=True,
-                timeout=self.timeout
-            )
+            with track_subprocess("bluetoothctl", "run"):
+                result = subprocess.run(
+                    ['bluetoothctl'],
+                    input=commands,
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout
+                )
             return result.stdout.strip()
         except FileNotFoundError:
-            print("[Cheeky] bluetoothctl not found")
+            logger.warning("bluetoothctl not found")
             return None
         except Exception as e:
-            print(f"[Cheeky] bluetoothctl error: {e}")
+            logger.error("bluetoothctl error: %s", e)
             return None
 
     async def get_devices(self) -> List[Dict]:
         """Get list of paired Bluetooth devices"""
-        await asyncio.sleep(0)  # Make it async
+        # bluetoothctl is spawned once per device - keep it off the event loop
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._list_devices)
 
+    def _list_devices(self) -> List[Dict]:
+        """Blocking device listing (runs in the default executor)"""
         try:
             output = self._run_bluetoothctl("devices\nquit\n")
             if not output:
@@ -62,7 +72,7 @@ class BluetoothManager:
 
             return devices
         except Exception as e:
-            print(f"[Cheeky] Error getting devices: {e}")
+            logger.error("Error getting devices: %s", e)
             return []
 
     async def get_adapter_status(self) -> Optional[Dict]:
@@ -96,7 +106,7 @@ class BluetoothManager:
 
             return status
         except Exception as e:
-            print(f"[Cheeky] Error getting adapter status: {e}")
+            logger.error("Error getting adapter status: %s", e)
             return None
 
     async def pair_device(self, mac: str) -> Dict:
@@ -110,7 +120,7 @@ class BluetoothManager:
             if "Pairing successful" in (output or ""):
                 # Also connect after pairing
                 self._run_bluetoothctl(f"connect {mac}\nquit\n")
-                print(f"[Cheeky] Paired with {mac}")
+                logger.info("Paired with %s", mac)
 
                 return {
                     "status": "paired",
@@ -124,7 +134,7 @@ class BluetoothManager:
                     "mac": mac
                 }
         except Exception as e:
-            print(f"[Cheeky] Pair error: {e}")
+            logger.error("Pair error: %s", e)
             return {
                 "status": "error",
                 "message": str(e),
@@ -143,7 +153,7 @@ class BluetoothManager:
             device = next((d for d in devices if d["mac"] == mac), None)
 
             if device:
-                print(f"[Cheeky] Connected to {mac}")
+                logger.info("Connected to %s", mac)
                 return {
                     "status": "connected",
                     "message": f"Connected to {mac}",
@@ -156,7 +166,7 @@ class BluetoothManager:
                     "mac": mac
                 }
         except Exception as e:
-            print(f"[Cheeky] Connect error: {e}")
+            logger.error("Connect error: %s", e)
             return {
                 "status": "error",
                 "message": str(e),
@@ -175,7 +185,7 @@ class BluetoothManager:
             device = next((d for d in devices if d["mac"] == mac), None)
 
             if device:
-                print(f"[Cheeky] Disconnected from {mac}")
+                logger.info("Disconnected from %s", mac)
                 return {
                     "status": "disconnected",
                     "message": f"Disconnected from {mac}",
@@ -188,7 +198,7 @@ class BluetoothManager:
                     "mac": mac
                 }
         except Exception as e:
-            print(f"[Cheeky] Disconnect error: {e}")
+            logger.error("Disconnect error: %s", e)
             return {
                 "status": "error",
                 "message": str(e),
@@ -203,14 +213,14 @@ class BluetoothManager:
             commands = f"remove {mac}\nquit\n"
             self._run_bluetoothctl(commands)
 
-            print(f"[Cheeky] Removed {mac}")
+            logger.info("Removed %s", mac)
             return {
                 "status": "removed",
                 "message": f"Removed {mac}",
                 "mac": mac
             }
         except Exception as e:
-            print(f"[Cheeky] Remove error: {e}")
+            logger.error("Remove error: %s", e)
             return {
                 "status": "error",
                 "message": str(e),
@@ -225,13 +235,13 @@ class BluetoothManager:
             commands = "scan on\nquit\n"
             self._run_bluetoothctl(commands)
 
-            print("[Cheeky] Started Bluetooth scan")
+            logger.info("Started Bluetooth scan")
             return {
                 "status": "scanning",
                 "message": "Scanning for devices..."
             }
         except Exception as e:
-            print(f"[Cheeky] Scan error: {e}")
+            logger.error("Scan error: %s", e)
             return {
                 "status": "error",
                 "message": str(e)
@@ -6,6 +6,9 @@ import json
 from pathlib import Path
 from typing import Any, Optional
 import asyncio
+from backend.log import get_logger
+
+logger = get_logger(__name__)
 
 class ConfigManager:
     """Manages application settings and configuration"""
@@ -22,7 +25,11 @@ class ConfigManager:
         defaults = {
             "volume": 75,
             "last_station": None,
-            "bluetooth_device": ""
+            "bluetooth_device": "",
+            "timeshift_enabled": True,  # Relay streams through the pause/rewind buffer
+            "timeshift_mb": 32,  # ~35 minutes at 128kbps
+            "auto_reconnect": True,  # Reconnect dropped streams while the buffer plays out
+            "autoplay": False  # Start last_station playing at boot
         }
 
         # Load from file if it exists
@@ -42,7 +49,7 @@ class ConfigManager:
             with open(self.settings_file, 'w') as f:
                 json.dump(self._cache, f, indent=2)
         except IOError as e:
-            print(f"[Cheeky] Error saving config: {e}")
+            logger.error("Error saving config: %s", e)
 
     async def get(self, key: str, default: Any = None) -> Any:
         """Get a configuration value"""
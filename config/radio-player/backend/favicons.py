@@ -0,0 +1,231 @@
+"""
+Favicon Cache - Fetches station logos once and serves small local thumbnails
+Thumbnails live in a size-bounded on-disk LRU, so favorites keep their logos offline
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+from backend.metrics import CACHE_REQUESTS, track_subprocess
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+UUID_RE = re.compile(r"[\w-]{1,64}")
+
+# Extension per upstream content type, used when a logo is stored unconverted. Raster
+# formats only: logos come from untrusted hosts and are served same-origin, so an SVG
+# (which can carry script) is only ever served as ffmpeg's PNG rendering
+EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/x-icon": "ico",
+    "image/vnd.microsoft.icon": "ico",
+}
+
+MEDIA_TYPES = {ext: media_type for media_type, ext in EXTENSIONS.items()}
+
+
+class FaviconCache:
+    """Proxy for station favicons with thumbnailing and an on-disk LRU"""
+
+    USER_AGENT = "CheekyRadio/1.1.0"
+    THUMBNAIL_SIZE = 96         # Longest edge in pixels
+    MAX_SOURCE_BYTES = 2 * 1024 * 1024
+    MAX_RAW_BYTES = 64 * 1024   # Largest logo kept as-is when ffmpeg can't convert it
+    FAILURE_TTL = 3600          # Seconds before a missing/broken logo is retried
+    MAX_FAILED = 1024           # Failed uuids remembered, oldest forgotten first
+    MAX_FETCHES = 3             # Concurrent downloads + ffmpeg runs (a page can ask for 100)
+
+    def __init__(self, cache_dir: Path, resolve_url: Callable[[str], Awaitable[Optional[str]]],
+                 max_mb: int = 20):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.resolve_url = resolve_url  # uuid -> favicon URL (favorites, then Radio Browser)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._failed: "OrderedDict[str, float]" = OrderedDict()  # uuid -> time of failure, oldest first
+        self._fetching: Dict[str, asyncio.Task] = {}
+        self._fetch_slots = asyncio.Semaphore(self.MAX_FETCHES)
+        self.hits = 0
+        self.misses = 0
+
+        # LRU index of file name -> size, oldest first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        files = sorted(
+            (p for p in self.cache_dir.iterdir() if p.is_file()),
+            key=lambda p: p.stat().st_mtime
+        )
+        for path in files:
+            if path.suffix[1:] not in MEDIA_TYPES:
+                path.unlink()  # e.g. a raw SVG stored by an older version
+                continue
+            self._entries[path.name] = path.stat().st_size
+        self._total = sum(self._entries.values())
+
+    def _lookup(self, uuid: str) -> Optional[Path]:
+        """Find a cached thumbnail and mark it recently used"""
+        for name in (f"{uuid}.png", *(f"{uuid}.{ext}" for ext in MEDIA_TYPES)):
+            if name in self._entries:
+                self._entries.move_to_end(name)
+                path = self.cache_dir / name
+                try:
+                    os.utime(path)  # Keeps LRU order across restarts
+                except FileNotFoundError:
+                    self._total -= self._entries.pop(name)
+                    return None
+                return path
+        return None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get or create aiohttp session"""
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        return self.session
+
+    async def _download(self, url: str) -> Tuple[bytes, str]:
+        """Fetch a logo, refusing anything that isn't a reasonably sized image"""
+        session = await self._get_session()
+        headers = {"User-Agent": self.USER_AGENT}
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            if resp.status != 200:
+                raise ValueError(f"HTTP {resp.status}")
+            if resp.content_length and resp.content_length > self.MAX_SOURCE_BYTES:
+                raise ValueError(f"logo too large ({resp.content_length} bytes)")
+
+            chunks, size = [], 0
+            async for chunk in resp.content.iter_chunked(64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > self.MAX_SOURCE_BYTES:
+                    raise ValueError("logo too large")
+            return b"".join(chunks), resp.content_type
+
+    async def _thumbnail(self, data: bytes) -> Optional[bytes]:
+        """Downscale to a PNG thumbnail with ffmpeg (already needed for Airplay)"""
+        size = self.THUMBNAIL_SIZE
+        cmd = [
+            "ffmpeg", "-v", "error",
+            "-i", "pipe:0",
+            "-frames:v", "1",
+            "-vf", f"scale={size}:{size}:force_original_aspect_ratio=decrease",
+            "-f", "image2pipe", "-c:v", "png",
+            "pipe:1"
+        ]
+        try:
+            with track_subprocess("ffmpeg"):
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+            try:
+                stdout, _ = await asyncio.wait_for(process.communicate(data), timeout=10)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return None
+            return stdout if process.returncode == 0 and stdout else None
+        except FileNotFoundError:
+            return None
+
+    def _store(self, name: str, size: int) -> Path:
+        """Index a newly written file and evict least recently used ones over budget"""
+        self._total += size - self._entries.pop(name, 0)
+        self._entries[name] = size
+
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            oldest, oldest_size = self._entries.popitem(last=False)
+            self._total -= oldest_size
+            try:
+                (self.cache_dir / oldest).unlink()
+            except FileNotFoundError:
+                pass
+        return self.cache_dir / name
+
+    async def _fetch(self, uuid: str) -> Optional[Path]:
+        """Resolve, download, shrink and store one station's logo"""
+        url = await self.resolve_url(uuid)
+        if not url or not url.startswith(("http://", "https://")):
+            return None
+
+        async with self._fetch_slots:
+            try:
+                data, content_type = await self._download(url)
+            except Exception as e:
+                logger.warning("Favicon fetch failed for %s: %s: %s", uuid, type(e).__name__, e)
+                return None
+
+            thumbnail = await self._thumbnail(data)
+        if thumbnail:
+            name = f"{uuid}.png"
+            data = thumbnail
+        elif content_type in EXTENSIONS and len(data) <= self.MAX_RAW_BYTES:
+            name = f"{uuid}.{EXTENSIONS[content_type]}"
+        else:
+            logger.warning("Favicon for %s could not be converted (%s, %s bytes)", uuid, content_type, len(data))
+            return None
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, (self.cache_dir / name).write_bytes, data)
+        return self._store(name, len(data))
+
+    async def get(self, uuid: str) -> Optional[Tuple[Path, str]]:
+        """Path and media type of a station's thumbnail, fetching it if needed"""
+        if not UUID_RE.fullmatch(uuid):
+            return None
+
+        path = self._lookup(uuid)
+        CACHE_REQUESTS.inc(cache="favicon", result="hit" if path else "miss")
+        if path:
+            self.hits += 1
+            return path, MEDIA_TYPES[path.suffix[1:]]
+
+        failed_at = self._failed.get(uuid)
+        if failed_at and time.time() - failed_at < self.FAILURE_TTL:
+            return None
+
+        self.misses += 1
+        # Concurrent requests for the same logo share one download
+        task = self._fetching.get(uuid)
+        if task is None:
+            task = asyncio.create_task(self._fetch(uuid))
+            self._fetching[uuid] = task
+            task.add_done_callback(lambda _: self._fetching.pop(uuid, None))
+
+        path = await asyncio.shield(task)
+        if not path:
+            self._failed[uuid] = time.time()
+            self._failed.move_to_end(uuid)
+            while len(self._failed) > self.MAX_FAILED:
+                self._failed.popitem(last=False)
+            return None
+        self._failed.pop(uuid, None)
+        return path, MEDIA_TYPES[path.suffix[1:]]
+
+    def get_stats(self) -> Dict:
+        """Cache occupancy and hit rate"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "failed": len(self._failed),
+        }
+
+    async def close(self):
+        """Close the aiohttp session"""
+        if self.session:
+            await self.session.close()
+            self.session = None
@@ -4,17 +4,22 @@ Favorites Manager - Stores and retrieves favorite stations from JSON
 
 import json
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import asyncio
 
+from backend.station import Station
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
 class FavoritesManager:
     """Manages user's favorite radio stations"""
 
     def __init__(self, config_dir: Path):
         self.config_dir = Path(config_dir)
         self.favorites_file = self.config_dir / "favorites.json"
-        self._favorites = []
+        self._favorites: List[Tuple[Station, str]] = []  # (own snapshot, added_at)
         self._load()
 
     def _load(self):
@@ -23,9 +28,12 @@ class FavoritesManager:
             try:
                 with open(self.favorites_file, 'r') as f:
                     data = json.load(f)
-                    self._favorites = data.get("favorites", [])
+                    self._favorites = [
+                        (Station.snapshot(entry), entry.get("added_at", ""))
+                        for entry in data.get("favorites", [])
+                    ]
             except (json.JSONDecodeError, IOError) as e:
-                print(f"[Cheeky] Error loading favorites: {e}")
+                logger.error("Error loading favorites: %s", e)
                 self._favorites = []
         else:
             self._favorites = []
@@ -35,53 +43,54 @@ class FavoritesManager:
         """Save favorites to disk"""
         try:
             with open(self.favorites_file, 'w') as f:
-                json.dump({"favorites": self._favorites}, f, indent=2)
+                json.dump({"favorites": self._entries()}, f, indent=2)
         except IOError as e:
-            print(f"[Cheeky] Error saving favorites: {e}")
+            logger.error("Error saving favorites: %s", e)
+
+    def _entries(self) -> List[Dict]:
+        """Favorites in their JSON format"""
+        return [dict(station.to_dict(), added_at=added_at) for station, added_at in self._favorites]
 
     async def get_all(self) -> List[Dict]:
         """Get all favorite stations"""
         await asyncio.sleep(0)  # Make it async
-        return self._favorites.copy()
+        return self._entries()
 
     async def add(self, station: Dict) -> None:
         """Add a station to favorites"""
         await asyncio.sleep(0)  # Make it async
 
         # Check if already exists
-        if any(s.get("uuid") == station.get("uuid") for s in self._favorites):
-            print(f"[Cheeky] Station already in favorites: {station.get('name')}")
+        if any(s.uuid == station.get("uuid") for s, _ in self._favorites):
+            logger.warning("Station already in favorites: %s", station.get('name'))
             return
 
         # Add with timestamp
-        favorite = station.copy()
-        favorite["added_at"] = datetime.now().isoformat()
-
-        self._favorites.append(favorite)
+        self._favorites.append((Station.snapshot(station), datetime.now().isoformat()))
         self._save()
-        print(f"[Cheeky] Added favorite: {station.get('name')}")
+        logger.info("Added favorite: %s", station.get('name'))
 
     async def remove(self, uuid: str) -> None:
         """Remove a station from favorites"""
         await asyncio.sleep(0)  # Make it async
 
         original_len = len(self._favorites)
-        self._favorites = [s for s in self._favorites if s.get("uuid") != uuid]
+        self._favorites = [(s, added_at) for s, added_at in self._favorites if s.uuid != uuid]
 
         if len(self._favorites) < original_len:
             self._save()
-            print(f"[Cheeky] Removed favorite: {uuid}")
+            logger.info("Removed favorite: %s", uuid)
         else:
-            print(f"[Cheeky] Station not found in favorites: {uuid}")
+            logger.warning("Station not found in favorites: %s", uuid)
 
     async def is_favorite(self, uuid: str) -> bool:
         """Check if a station is in favorites"""
         await asyncio.sleep(0)  # Make it async
-        return any(s.get("uuid") == uuid for s in self._favorites)
+        return any(s.uuid == uuid for s, _ in self._favorites)
 
     async def clear(self) -> None:
         """Clear all favorites"""
         await asyncio.sleep(0)  # Make it async
         self._favorites = []
         self._save()
-        print("[Cheeky] Favorites cleared")
+        logger.info("Favorites cleared")
@@ -0,0 +1,149 @@
+"""
+Logging - Levelled, per-module, non-blocking logging for every backend module
+Records are handed to a queue and written by a listener thread, so a slow
+journald/SD card never stalls the event loop. Repeats are rate-limited.
+
+Environment:
+  CHEEKY_LOG_LEVEL   default level (INFO)
+  CHEEKY_LOG_LEVELS  per-module overrides, e.g. "stations=DEBUG,airplay=WARNING"
+  CHEEKY_LOG_FORMAT  "text" (default) or "json" (one object per line)
+  CHEEKY_LOG_RATE    identical messages allowed per minute before suppression (5, 0 = off)
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+ROOT = "cheeky"
+
+# LogRecord attributes; anything else on a record came in through extra={...}
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_logger(module: str) -> logging.Logger:
+    """Logger for a module: backend.player -> cheeky.player, main -> cheeky.main"""
+    return logging.getLogger(f"{ROOT}.{module.rsplit('.', 1)[-1]}")
+
+
+class RateLimitFilter(logging.Filter):
+    """Let `burst` identical messages through per `window` seconds, then count the rest"""
+
+    def __init__(self, burst: int = 5, window: float = 60.0, max_keys: int = 512):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.max_keys = max_keys
+        self._seen: "OrderedDict[tuple, list]" = OrderedDict()  # key -> [window start, count, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0:
+            return True
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is None:
+                entry = self._seen[key] = [now, 0, 0]
+                if len(self._seen) > self.max_keys:
+                    self._seen.popitem(last=False)
+            else:
+                self._seen.move_to_end(key)
+
+            if now - entry[0] > self.window:
+                if entry[2]:
+                    record.msg = f"{record.getMessage()} (repeated {entry[2]} more times)"
+                    record.args = None
+                entry[:] = [now, 0, 0]
+
+            entry[1] += 1
+            if entry[1] > self.burst:
+                entry[2] += 1
+                return False
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra={...} fields included"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RECORD_FIELDS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Renders the message on the caller's thread but leaves formatting to the listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _parse_levels(spec: str):
+    """'stations=DEBUG,airplay=warning' -> [('stations', 10), ('airplay', 30)]"""
+    for item in spec.split(","):
+        module, _, level = item.partition("=")
+        if module.strip() and level.strip():
+            yield module.strip(), logging.getLevelName(level.strip().upper())
+
+
+def setup_logging() -> None:
+    """Route the cheeky.* loggers through the queue; safe to call more than once"""
+    global _listener
+    if _listener:
+        return
+
+    logger = logging.getLogger(ROOT)
+    logger.setLevel(os.getenv("CHEEKY_LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+    for module, level in _parse_levels(os.getenv("CHEEKY_LOG_LEVELS", "")):
+        if isinstance(level, int):
+            logging.getLogger(f"{ROOT}.{module}").setLevel(level)
+
+    output = logging.StreamHandler(sys.stdout)
+    if os.getenv("CHEEKY_LOG_FORMAT", "text") == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("[Cheeky] %(levelname)s %(name)s: %(message)s"))
+
+    records = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(RateLimitFilter(burst=int(os.getenv("CHEEKY_LOG_RATE", "5"))))
+    logger.handlers = [handler]
+
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records (called on server shutdown)"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        # Anything logged after this point is written directly
+        logging.getLogger(ROOT).handlers = list(_listener.handlers)
+        _listener = None
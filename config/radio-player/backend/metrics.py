@@ -0,0 +1,177 @@
+"""
+Metrics - Minimal Prometheus-style counters, gauges and histograms
+Recording is a dict update plus a bisect, cheap enough for hot paths on a Pi Zero
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Seconds; covers sub-millisecond loop lag up to slow upstream requests and fades
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels_key(labelnames: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter, optionally labelled"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _labels_key(self.labelnames, labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, or be read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        self._values[_labels_key(self.labelnames, labels)] = value
+
+    def samples(self) -> List[str]:
+        if self.callback:
+            try:
+                return [f"{self.name} {self.callback()}"]
+            except Exception:
+                return []
+        return super().samples()
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally labelled"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _labels_key(self.labelnames, labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long a block takes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders the text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+              callback: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "cheeky_upstream_request_seconds", "Radio Browser request latency per mirror", ("server", "status"))
+CACHE_REQUESTS = REGISTRY.counter(
+    "cheeky_cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+PLAY_FIRST_AUDIO_SECONDS = REGISTRY.histogram(
+    "cheeky_play_first_audio_seconds", "Time from play() to first audio", ("output",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 12.0, 20.0))
+FADE_SECONDS = REGISTRY.histogram(
+    "cheeky_fade_seconds", "Volume fade duration", ("direction",))
+SUBPROCESS_SPAWNS = REGISTRY.counter(
+    "cheeky_subprocess_spawns_total", "External processes started", ("command",))
+SUBPROCESS_SECONDS = REGISTRY.histogram(
+    "cheeky_subprocess_seconds", "Process spawn time, or full run time for short-lived tools",
+    ("command", "phase"))
+WEBSOCKET_SEND_SECONDS = REGISTRY.histogram(
+    "cheeky_websocket_send_seconds", "Time to send one WebSocket message", ("type",))
+STREAM_STALLS = REGISTRY.counter(
+    "cheeky_stream_stalls_total", "Playback interruptions by kind (upstream drop, underrun, EOF)", ("kind",))
+STREAM_RECONNECT_SECONDS = REGISTRY.histogram(
+    "cheeky_stream_reconnect_seconds", "Time from losing a stream to audio flowing again", ("layer",),
+    buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0))
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "cheeky_event_loop_lag_seconds", "Extra delay of a periodic event-loop timer",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+
+@contextmanager
+def track_subprocess(command: str, phase: str = "spawn"):
+    """Count a process start and time the spawn (or the whole run, phase='run')"""
+    SUBPROCESS_SPAWNS.inc(command=command)
+    with SUBPROCESS_SECONDS.time(command=command, phase=phase):
+        yield
+
@@ -2,15 +2,26 @@
 MPV Player Controller - Handles audio playback and metadata
 """
 
-import subprocess
 import json
 import asyncio
 from pathlib import Path
 from typing import Optional, Dict, Callable
-import signal
 import os
 import socket
 import tempfile
+import time
+from collections import deque
+from urllib.parse import urlparse
+from backend.transcode import TranscodePlanner
+from backend.timeshift import TimeShiftInactive, TimeShiftSession
+from backend.metrics import (
+    FADE_SECONDS, PLAY_FIRST_AUDIO_SECONDS, STREAM_RECONNECT_SECONDS, STREAM_STALLS
+)
+from backend.timeline import PlayTimeline
+from backend.supervisor import NEVER, ProcessSupervisor, RestartPolicy
+from backend.log import get_logger
+
+logger = get_logger(__name__)
 
 try:
     from backend.raop_stream_raop import RAOPStreamer
@@ -18,15 +29,24 @@ try:
 except ImportError as e:
     AIRPLAY_AVAILABLE = False
     RAOPStreamer = None
-    print(f"[Cheeky] raop_play binary not available - Airplay streaming disabled ({e})")
+    logger.warning("raop_play binary not available - Airplay streaming disabled (%s)", e)
 
 class PlayerController:
     """Controls MPV player instance for streaming radio"""
 
-    def __init__(self, config_manager, metadata_callback: Optional[Callable[[Dict], None]] = None):
+    def __init__(self, config_manager, metadata_callback: Optional[Callable[[Dict], None]] = None,
+                 status_callback: Optional[Callable[[Dict], None]] = None,
+                 supervisor: Optional[ProcessSupervisor] = None):
         self.config_mgr = config_manager
-        self.mpv_process = None
-        self.raop_streamer = RAOPStreamer() if AIRPLAY_AVAILABLE else None
+        self.supervisor = supervisor or ProcessSupervisor()
+        self.mpv_process = None  # ManagedProcess
+        # With auto_reconnect off, a crashed mpv is brought back with the same stream by the
+        # supervisor; with it on, _reconnect is the only recovery path (never both at once)
+        self.mpv_restart = RestartPolicy("on-failure", max_restarts=3, backoff=1.0)
+        self.transcode_planner = TranscodePlanner()  # Shared by Airplay streamers
+        self.raop_streamer = RAOPStreamer(
+            self.transcode_planner, self.supervisor, on_stream_exit=self._on_airplay_exit
+        ) if AIRPLAY_AVAILABLE else None
         self.current_station = None
         self.current_status = "stopped"
         self.current_metadata = {}
@@ -36,7 +56,24 @@ class PlayerController:
         self.fade_out_duration = 2.0  # Fade-out duration in seconds (2s - conservative default)
         self.mpv_ipc_socket = None  # Path to MPV IPC socket
         self.metadata_callback = metadata_callback  # Callback for metadata updates
+        self.status_callback = status_callback  # Called when playback stops or reconnects on its own
         self.metadata_task = None  # Background task for metadata polling
+        self.timeline = None  # PlayTimeline of the play() in progress
+        self.timelines = deque(maxlen=20)  # Recent play timelines, oldest first
+        self.timeline_task = None  # Follows mpv events until the first audio
+        self.timeshift = None  # TimeShiftSession relaying the current station
+        self.prepared = None  # Pre-buffered TimeShiftSession waiting for play()
+        self._prepared_expiry = None
+        self.prebuffer_ttl = 300  # Stop pre-buffering after 5 minutes without play()
+        self.prebuffer_lead = 5.0  # Start pre-buffered playback this many seconds behind live
+        self.current_stream_url = None  # Station URL being played, for reconnects
+        self.auto_reconnect = True  # Bring dropped streams back instead of stopping
+        self.stall_task = None  # Follows mpv's cache state for the current play
+        self.reconnect_task = None
+        self.stall_timeout = 15.0  # A direct stream stuck in underrun this long is reconnected
+        self.reconnect_backoff = 0.5
+        self.max_reconnect_backoff = 30.0
+        self.reconnect_attempts = 10
 
     async def _get_audio_buffer_duration(self) -> float:
         """Query MPV for audio buffer duration to determine safe fade-out time"""
@@ -46,7 +83,7 @@ class PlayerController:
             if cache_duration and cache_duration > 0:
                 # Use cache duration, but cap at 5 seconds to avoid excessive fade times
                 buffer_time = min(float(cache_duration), 5.0)
-                print(f"[Cheeky] Detected buffer: {buffer_time:.1f}s")
+                logger.debug("Detected buffer: %.1fs", buffer_time)
                 return buffer_time
         except Exception:
             pass
@@ -70,13 +107,14 @@ class PlayerController:
         step_duration = duration / steps
         vol_step = (to_vol - from_vol) / steps
 
-        for i in range(steps):
-            current_vol = int(from_vol + (vol_step * i))
-            await self._set_volume_immediate(current_vol)
-            await asyncio.sleep(step_duration)
+        with FADE_SECONDS.time(direction="out" if to_vol < from_vol else "in"):
+            for i in range(steps):
+                current_vol = int(from_vol + (vol_step * i))
+                await self._set_volume_immediate(current_vol)
+                await asyncio.sleep(step_duration)
 
-        # Final volume
-        await self._set_volume_immediate(to_vol)
+            # Final volume
+            await self._set_volume_immediate(to_vol)
 
     async def _set_volume_immediate(self, volume: int):
         """Set volume immediately without fading"""
@@ -91,11 +129,9 @@ class PlayerController:
             # MPV supports runtime volume changes
             if self.mpv_process:
                 try:
-                    cmd = f"set volume {volume}\n".encode()
-                    self.mpv_process.stdin.write(cmd)
-                    self.mpv_process.stdin.flush()
+                    self.mpv_process.write(f"set volume {volume}\n".encode())
                 except Exception as e:
-                    print(f"[Cheeky] Error setting volume: {e}")
+                    logger.warning("Error setting volume: %s", e)
 
     async def _query_mpv_property(self, property_name: str) -> Optional[any]:
         """Query MPV property via IPC socket"""
@@ -171,14 +207,14 @@ class PlayerController:
                 # Update if metadata changed
                 if metadata and metadata != self.current_metadata:
                     self.current_metadata = metadata
-                    print(f"[Cheeky] Metadata updated: {metadata}")
+                    logger.debug("Metadata updated: %s", metadata)
 
                     # Notify via callback if provided
                     if self.metadata_callback:
                         try:
                             self.metadata_callback(metadata)
                         except Exception as e:
-                            print(f"[Cheeky] Error in metadata callback: {e}")
+                            logger.error("Error in metadata callback: %s", e)
 
                 # Poll every 3 seconds
                 await asyncio.sleep(3)
@@ -195,7 +231,25 @@ class PlayerController:
             self.metadata_task.cancel()
         self.metadata_task = asyncio.create_task(self._poll_metadata())
 
-    def _start_mpv_process(self, stream_url: str, start_volume: int = 0):
+    def _mpv_args(self, stream_url: str, volume: int) -> list:
+        """MPV arguments for optimal streaming performance"""
+        return [
+            "mpv",
+            "--no-audio-display",  # Don't show visualizer
+            "--no-terminal",  # Don't show MPV terminal
+            "--audio-device=pulse",  # Use PulseAudio for Bluetooth
+            "--volume=" + str(volume),
+            "--force-window=no",  # No window
+            "--ytdl=no",  # Disable YouTube-DL
+            "--no-config",  # Don't load user config
+            "--cache=yes",
+            "--cache-secs=10",  # 10 second cache
+            "--stream-lavf-o-append=headers=User-Agent: Cheeky",
+            "--input-ipc-server=" + self.mpv_ipc_socket,  # Enable IPC for metadata
+            stream_url
+        ]
+
+    async def _start_mpv_process(self, stream_url: str, start_volume: int = 0):
         """Start a new MPV process for streaming"""
         try:
             # Create IPC socket path for metadata querying
@@ -206,35 +260,24 @@ class PlayerController:
             if os.path.exists(self.mpv_ipc_socket):
                 os.unlink(self.mpv_ipc_socket)
 
-            # MPV arguments for optimal streaming performance
-            # Start at 0 volume to avoid clicks, will fade in after
-            mpv_args = [
+            # Start at 0 volume to avoid clicks, will fade in after; a restart
+            # after a crash comes straight back at the current volume
+            self.mpv_process = await self.supervisor.spawn(
                 "mpv",
-                "--no-audio-display",  # Don't show visualizer
-                "--no-terminal",  # Don't show MPV terminal
-                "--audio-device=pulse",  # Use PulseAudio for Bluetooth
-                "--volume=" + str(start_volume),  # Start at 0 to avoid click
-                "--force-window=no",  # No window
-                "--ytdl=no",  # Disable YouTube-DL
-                "--no-config",  # Don't load user config
-                "--cache=yes",
-                "--cache-secs=10",  # 10 second cache
-                "--stream-lavf-o-append=headers=User-Agent: Cheeky",
-                "--input-ipc-server=" + self.mpv_ipc_socket,  # Enable IPC for metadata
-                stream_url
-            ]
-
-            self.mpv_process = subprocess.Popen(
-                mpv_args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                stdin=subprocess.PIPE
+                lambda attempt: self._mpv_args(stream_url, start_volume if attempt == 0 else self.volume),
+                restart=NEVER if self.auto_reconnect else self.mpv_restart,
+                on_exit=self._on_mpv_exit,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
             )
             self.current_status = "playing"
-            print(f"[Cheeky] Started playing: {stream_url} (volume will fade in)")
+            logger.info("Started playing: %s (volume will fade in)", stream_url)
 
             # Start metadata polling
             self._start_metadata_polling()
+            if self.auto_reconnect:
+                self.stall_task = asyncio.create_task(self._watch_stalls(self.mpv_process))
 
         except FileNotFoundError:
             raise Exception("MPV not found. Install with: sudo apt install mpv")
@@ -242,24 +285,212 @@ class PlayerController:
             self.current_status = "stopped"
             raise Exception(f"Failed to start playback: {str(e)}")
 
-    def _stop_mpv_process(self):
+    def _on_mpv_exit(self, process) -> None:
+        """mpv exited and won't be restarted by the supervisor"""
+        if process is not self.mpv_process:
+            return
+        if self.metadata_task:
+            self.metadata_task.cancel()
+            self.metadata_task = None
+        self.mpv_process = None
+        if self.reconnect_task and not self.reconnect_task.done():
+            return  # A reconnect attempt failed; its loop moves on to the next one
+        reason = f"mpv {process.state} (exit code {process.returncode})"
+        # A live relay closes readers on purpose (ring overrun, new ICY framing); always rejoin it
+        relay_live = self.timeshift is not None and self.timeshift.live
+        if self.current_stream_url and (self.auto_reconnect or relay_live):
+            self._start_reconnect(reason)
+        else:
+            self._playback_ended(reason)
+
+    def _on_airplay_exit(self) -> None:
+        """The Airplay pipeline died underneath us"""
+        self._playback_ended("Airplay stream ended")
+
+    def _on_relay_event(self, event: Dict) -> None:
+        """The time-shift relay is reconnecting upstream while mpv plays its cache"""
+        if event["state"] == "reconnecting":
+            self._notify_status({"status": "playing", "reconnecting": True, "attempt": event["attempt"]})
+        elif event["state"] == "reconnected":
+            self._notify_status({"status": "playing", "reconnecting": False,
+                                 "gap_seconds": event["gap_seconds"]})
+
+    def _notify_status(self, status: Dict) -> None:
+        if self.status_callback:
+            try:
+                self.status_callback(status)
+            except Exception as e:
+                logger.error("Error in status callback: %s", e)
+
+    def _playback_ended(self, reason: str) -> None:
+        """Report playback that stopped without anyone asking"""
+        if self.current_status == "stopped":
+            return
+        self.current_status = "stopped"
+        logger.warning("Playback stopped: %s", reason)
+        self._notify_status({"status": "stopped", "reason": reason})
+
+    async def _connect_mpv_ipc(self, process, timeout: float):
+        """Open mpv's IPC socket once it appears; None if mpv goes away first"""
+        deadline = time.monotonic() + timeout
+        while self.mpv_process is process and time.monotonic() < deadline:
+            try:
+                return await asyncio.open_unix_connection(self.mpv_ipc_socket)
+            except (FileNotFoundError, ConnectionRefusedError, TypeError):
+                await asyncio.sleep(0.02)
+        return None
+
+    @staticmethod
+    def _query_playback_state(writer) -> None:
+        """Ask for the current state; audio can start before an IPC client subscribes"""
+        writer.write(b'{"command": ["get_property", "playback-time"], "request_id": 1}\n'
+                     b'{"command": ["get_property", "core-idle"], "request_id": 2}\n')
+
+    @staticmethod
+    def _playback_milestone(message: Dict, state: Dict) -> Optional[str]:
+        """'loaded' or 'audio' once an IPC line (event or state reply) shows it, else None"""
+        event = message.get("event")
+        if event == "playback-restart":
+            return "audio"
+        if event == "file-loaded":
+            return "loaded"
+        if message.get("request_id") in (1, 2):
+            state[message["request_id"]] = message.get("data") if message.get("error") == "success" else None
+            # playback-time exists once the stream is loaded; core-idle is False while it plays
+            if len(state) == 2 and state[1] is not None:
+                return "audio" if state[2] is False else "loaded"
+        return None
+
+    async def _watch_stalls(self, process):
+        """Follow mpv's cache for the whole play: underruns, demuxer EOF and dead streams"""
+        while self.mpv_process is process:
+            connection = await self._connect_mpv_ipc(process, timeout=10)
+            if not connection:
+                return
+            reader, writer = connection
+            stalled_at = None
+            try:
+                writer.write(b'{"command": ["observe_property", 1, "paused-for-cache"]}\n')
+                while True:
+                    try:
+                        line = await asyncio.wait_for(reader.readline(),
+                                                      timeout=self.stall_timeout if stalled_at else None)
+                    except asyncio.TimeoutError:
+                        # The relay reconnects on its own; a direct stream this quiet is dead
+                        if self.timeshift and self.timeshift.live:
+                            continue
+                        STREAM_STALLS.inc(kind="timeout")
+                        process.kill()
+                        self._on_mpv_exit(process)
+                        return
+                    if not line:
+                        break  # mpv exited (or was restarted by the supervisor)
+                    message = json.loads(line)
+                    event = message.get("event")
+                    if event == "property-change" and message.get("name") == "paused-for-cache":
+                        if message.get("data"):
+                            stalled_at = time.monotonic()
+                            STREAM_STALLS.inc(kind="underrun")
+                            logger.info("Cache underrun, waiting for the stream")
+                        elif stalled_at:
+                            logger.info("Stream recovered after %.1fs", time.monotonic() - stalled_at)
+                            stalled_at = None
+                    elif event == "end-file" and message.get("reason") in ("eof", "error"):
+                        STREAM_STALLS.inc(kind="eof")
+                        logger.info("Stream ended (%s)", message.get("reason"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("mpv stall watch error: %s", e)
+                return
+            finally:
+                writer.close()
+
+    async def _wait_for_audio(self, process, timeout: float) -> bool:
+        """True once mpv reports playback started, False if it exits or times out"""
+        deadline = time.monotonic() + timeout
+        connection = await self._connect_mpv_ipc(process, timeout)
+        if not connection:
+            return False
+        reader, writer = connection
+        try:
+            self._query_playback_state(writer)
+            state = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=max(0.1, deadline - time.monotonic()))
+                if not line:
+                    return False
+                if self._playback_milestone(json.loads(line), state) == "audio":
+                    return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            writer.close()
+
+    def _start_reconnect(self, reason: str) -> None:
+        """Bring a dropped stream back in the background"""
+        if self.reconnect_task and not self.reconnect_task.done():
+            return
+        self.reconnect_task = asyncio.create_task(self._reconnect(reason))
+
+    async def _reconnect(self, reason: str) -> None:
+        """Restart mpv with exponential backoff until audio plays again or we give up"""
+        stream_url = self.current_stream_url
+        lost_at = time.monotonic()
+        logger.warning("Stream lost (%s), reconnecting", reason)
+
+        for attempt in range(1, self.reconnect_attempts + 1):
+            self._notify_status({"status": "playing", "reconnecting": True, "attempt": attempt})
+            await asyncio.sleep(min(self.reconnect_backoff * 2 ** (attempt - 1), self.max_reconnect_backoff))
+            try:
+                # Reuse the relay if it is still up (it may already hold fresh audio)
+                if self.timeshift and self.timeshift.live:
+                    source_url = self.timeshift.url
+                else:
+                    source_url = await self._open_timeshift(stream_url)
+                await self._start_mpv_process(source_url, start_volume=0)
+                if await self._wait_for_audio(self.mpv_process, timeout=15):
+                    gap = time.monotonic() - lost_at
+                    STREAM_RECONNECT_SECONDS.observe(gap, layer="player")
+                    logger.info("Stream back after %.1fs (attempt %s)", gap, attempt)
+                    self._notify_status({"status": "playing", "reconnecting": False,
+                                         "gap_seconds": round(gap, 1)})
+                    await self._fade_volume(0, self.volume)
+                    return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Reconnect attempt %s failed: %s", attempt, e)
+            await self._stop_mpv_process(keep_status=True)
+
+        self._playback_ended(f"{reason}, no audio after {self.reconnect_attempts} reconnect attempts")
+
+    async def _cancel_reconnect(self):
+        """Stop a background reconnect (a new play/seek/stop takes over)"""
+        task, self.reconnect_task = self.reconnect_task, None
+        if task and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _stop_mpv_process(self, keep_status: bool = False):
         """Stop the current MPV process"""
-        # Cancel metadata polling task
+        # Cancel metadata polling and stall watching
         if self.metadata_task:
             self.metadata_task.cancel()
             self.metadata_task = None
+        if self.stall_task:
+            self.stall_task.cancel()
+            self.stall_task = None
 
         if self.mpv_process:
+            process, self.mpv_process = self.mpv_process, None
             try:
-                self.mpv_process.terminate()
-                self.mpv_process.wait(timeout=3)
-            except subprocess.TimeoutExpired:
-                self.mpv_process.kill()
+                await self.supervisor.stop(process, timeout=3)
             except Exception as e:
-                print(f"[Cheeky] Error stopping MPV: {e}")
+                logger.error("Error stopping MPV: %s", e)
             finally:
-                self.mpv_process = None
-                self.current_status = "stopped"
+                if not keep_status:
+                    self.current_status = "stopped"
 
         # Clean up IPC socket
         if self.mpv_ipc_socket and os.path.exists(self.mpv_ipc_socket):
@@ -269,7 +500,7 @@ class PlayerController:
                 pass
             self.mpv_ipc_socket = None
 
-    async def _start_airplay_stream(self, stream_url: str):
+    async def _start_airplay_stream(self, stream_url: str, probe_url: Optional[str] = None):
         """Start streaming to an Airplay device using RAOP"""
         if not AIRPLAY_AVAILABLE or not self.raop_streamer:
             raise Exception("Airplay streaming not available")
@@ -284,20 +515,21 @@ class PlayerController:
             if not address:
                 raise Exception("Airplay device address not set")
 
-            print(f"[Cheeky] Connecting to Airplay receiver at {address}:{port}")
+            logger.info("Connecting to Airplay receiver at %s:%s", address, port)
 
             # Connect to RAOP device
             connected = await self.raop_streamer.connect(address, port)
             if not connected:
                 raise Exception("Failed to connect to Airplay receiver")
+            self._mark("receiver connected")
 
             # Start streaming
-            started = await self.raop_streamer.start_stream(stream_url, self.volume)
+            started = await self.raop_streamer.start_stream(stream_url, self.volume, probe_url)
             if not started:
                 raise Exception("Failed to start Airplay stream")
 
             self.current_status = "playing"
-            print(f"[Cheeky] ✓ Airplay streaming active")
+            logger.info("Airplay streaming active")
 
         except Exception as e:
             self.current_status = "stopped"
@@ -308,43 +540,209 @@ class PlayerController:
         if self.raop_streamer:
             try:
                 await self.raop_streamer.stop_stream()
-                print("[Cheeky] Stopped Airplay playback")
+                logger.info("Stopped Airplay playback")
             except Exception as e:
-                print(f"[Cheeky] Error stopping Airplay: {e}")
+                logger.error("Error stopping Airplay: %s", e)
             finally:
                 self.current_status = "stopped"
 
+    async def warm_up_airplay(self) -> None:
+        """Pre-connect to the selected Airplay receiver so play() only has to send audio"""
+        if not AIRPLAY_AVAILABLE or not self.raop_streamer:
+            return
+        if self.output_device.get("type") != "airplay" or self.raop_streamer.is_streaming:
+            return
+
+        try:
+            address = self.output_device.get("address")
+            port = self.output_device.get("port", 5000)
+            if await self.raop_streamer.connect(address, port):
+                await self.raop_streamer.warm_up(self.volume)
+        except Exception as e:
+            logger.error("Airplay warm-up error: %s", e)
+
     def set_output_device(self, device: Dict) -> None:
         """Set the output device for playback"""
+        # A warm Airplay session only makes sense for the device it was opened to
+        if self.raop_streamer and device != self.output_device:
+            self.raop_streamer.discard_warm_session()
+
         self.output_device = device
         device_type = device.get("type", "local")
         device_name = device.get("name", "Unknown")
-        print(f"[Cheeky] Output device set to: {device_type} - {device_name}")
+        logger.info("Output device set to: %s - %s", device_type, device_name)
+
+    async def prepare(self, stream_url: str) -> bool:
+        """Connect and start buffering a station ahead of play() (e.g. the last station at boot)"""
+        await self._close_prepared()
+
+        if not await self.config_mgr.get("timeshift_enabled", True):
+            # No relay to buffer into - at least warm the DNS lookup
+            try:
+                host = urlparse(stream_url).hostname
+                await asyncio.get_event_loop().getaddrinfo(host, None)
+            except Exception as e:
+                logger.warning("Pre-resolve failed for %s: %s", stream_url, e)
+            return False
+
+        try:
+            capacity = int(await self.config_mgr.get("timeshift_mb", 32)) * 1024 * 1024
+            session = TimeShiftSession(stream_url, capacity)
+            await session.start(timeout=10.0)
+        except Exception as e:
+            logger.warning("Pre-buffering failed for %s: %s", stream_url, e)
+            return False
+
+        self.prepared = session
+        self._prepared_expiry = asyncio.get_event_loop().call_later(
+            self.prebuffer_ttl, lambda: asyncio.create_task(self._close_prepared())
+        )
+        logger.debug("Pre-buffering %s", stream_url)
+        return True
+
+    async def _close_prepared(self):
+        """Drop an unused pre-buffered session"""
+        if self._prepared_expiry:
+            self._prepared_expiry.cancel()
+            self._prepared_expiry = None
+        if self.prepared:
+            await self.prepared.close()
+            self.prepared = None
+
+    async def _open_timeshift(self, stream_url: str) -> str:
+        """Relay the station through a time-shift buffer; returns the URL to play"""
+        await self._close_timeshift()
+
+        # Hand over a pre-buffered session so mpv gets a full cache immediately
+        if self.prepared and self.prepared.stream_url == stream_url and not self.prepared.closed:
+            session = self.prepared
+            self.prepared = None
+            if self._prepared_expiry:
+                self._prepared_expiry.cancel()
+                self._prepared_expiry = None
+            session.seek(self.prebuffer_lead)
+            session.reconnect = self.auto_reconnect
+            session.reconnect_listeners.append(self._on_relay_event)
+            self.timeshift = session
+            logger.debug("Using pre-buffered stream")
+            return session.url
+        await self._close_prepared()
+
+        if not await self.config_mgr.get("timeshift_enabled", True):
+            return stream_url
+
+        try:
+            capacity = int(await self.config_mgr.get("timeshift_mb", 32)) * 1024 * 1024
+            session = TimeShiftSession(stream_url, capacity)
+            session.reconnect = self.auto_reconnect
+            session.reconnect_listeners.append(self._on_relay_event)
+            await session.start(timeout=5.0)
+            self.timeshift = session
+            return session.url
+        except Exception as e:
+            # Fall back to letting mpv/ffmpeg fetch the station directly
+            logger.warning("Time-shift unavailable, playing direct: %s", e)
+            return stream_url
+
+    async def _close_timeshift(self):
+        """Stop relaying and release the buffer"""
+        if self.timeshift:
+            await self.timeshift.close()
+            self.timeshift = None
+
+    def _mark(self, event: str) -> None:
+        """Add a milestone to the current play timeline"""
+        if self.timeline:
+            self.timeline.mark(event)
+
+    async def _watch_mpv_events(self, timeline: PlayTimeline, timeout: float = 20.0):
+        """Follow mpv's IPC events to time stream connect and first audio"""
+        process = self.mpv_process
+        deadline = time.monotonic() + timeout
+        writer = None
+        try:
+            # The IPC socket appears shortly after mpv starts
+            connection = await self._connect_mpv_ipc(process, timeout)
+            if not connection:
+                return
+            reader, writer = connection
+
+            self._query_playback_state(writer)
+            state = {}
+
+            while self.mpv_process is process:
+                line = await asyncio.wait_for(reader.readline(), timeout=max(0.1, deadline - time.monotonic()))
+                if not line:
+                    return
+                milestone = self._playback_milestone(json.loads(line), state)
+                if milestone:
+                    timeline.mark("stream connected")
+                if milestone == "audio":
+                    timeline.mark("first audio")
+                    PLAY_FIRST_AUDIO_SECONDS.observe(timeline.elapsed(), output=timeline.output)
+                    return
+        except asyncio.TimeoutError:
+            timeline.mark("first audio timeout")
+        except Exception as e:
+            logger.error("mpv event watch error: %s", e)
+        finally:
+            if writer:
+                writer.close()
+
+    def get_timelines(self) -> list:
+        """Recent play timelines, newest first"""
+        return [timeline.to_dict() for timeline in reversed(self.timelines)]
+
+    async def play(self, stream_url: str, requested_at: Optional[float] = None) -> None:
+        """Start playing a stream (requested_at: perf_counter() when the request arrived)"""
+        device_type = self.output_device.get("type", "local")
+        timeline = PlayTimeline(stream_url, device_type, started=requested_at)
+        timeline.mark("request received")
+        self.timelines.append(timeline)
+        self.timeline = timeline
+        try:
+            await self._play(stream_url, timeline)
+        finally:
+            self.timeline = None
+
+    async def _play(self, stream_url: str, timeline: PlayTimeline) -> None:
+        """Body of play(), marking each startup milestone"""
+        device_type = timeline.output
 
-    async def play(self, stream_url: str) -> None:
-        """Start playing a stream"""
         # Stop any existing playback
+        await self._cancel_reconnect()
         if self.mpv_process:
-            self._stop_mpv_process()
+            await self._stop_mpv_process()
         if self.raop_streamer and self.raop_streamer.is_streaming:
             await self._stop_airplay_stream()
+        timeline.mark("previous stopped")
+        self.current_stream_url = stream_url
+        self.auto_reconnect = await self.config_mgr.get("auto_reconnect", True)
 
-        # Start new playback based on output device
-        device_type = self.output_device.get("type", "local")
+        source_url = await self._open_timeshift(stream_url)
+        if source_url != stream_url:
+            timeline.mark("relay ready")
 
+        # Start new playback based on output device
         if device_type == "airplay":
-            await self._start_airplay_stream(stream_url)
+            await self._start_airplay_stream(source_url, probe_url=stream_url)
+            # The receiver buffers on its own; the stream being up is the closest we can see
+            timeline.mark("stream started")
+            PLAY_FIRST_AUDIO_SECONDS.observe(timeline.elapsed(), output="airplay")
         else:
             # Use MPV for local and Bluetooth (PulseAudio handles routing)
             # Start at 0 volume to avoid click
-            self._start_mpv_process(stream_url, start_volume=0)
+            await self._start_mpv_process(source_url, start_volume=0)
+            timeline.mark("mpv spawned")
+            self.timeline_task = asyncio.create_task(self._watch_mpv_events(timeline))
 
             # Wait a brief moment for MPV to start buffering
             await asyncio.sleep(0.1)
 
             # Fade in from 0 to target volume
-            print(f"[Cheeky] Fading in volume from 0 to {self.volume}...")
+            logger.debug("Fading in volume from 0 to %s...", self.volume)
             await self._fade_volume(0, self.volume)
+            timeline.mark("fade complete")
 
     async def pause(self) -> None:
         """Pause playback"""
@@ -356,28 +754,27 @@ class PlayerController:
                 try:
                     await self.raop_streamer.pause_stream()
                     self.current_status = "paused"
-                    print("[Cheeky] Paused Airplay playback")
+                    logger.info("Paused Airplay playback")
                 except Exception as e:
-                    print(f"[Cheeky] Error pausing Airplay: {e}")
+                    logger.error("Error pausing Airplay: %s", e)
         else:
             # Pause MPV (local/Bluetooth)
             if self.mpv_process and self.current_status == "playing":
                 try:
                     # Fade out volume before pausing to avoid click
-                    print(f"[Cheeky] Fading out volume from {self.volume} to 0...")
+                    logger.debug("Fading out volume from %s to 0...", self.volume)
                     await self._fade_volume(self.volume, 0, is_fade_out=True)
 
                     # Wait for hardware buffer to drain (1 second to ensure complete drainage)
-                    print("[Cheeky] Draining hardware buffer...")
+                    logger.debug("Draining hardware buffer...")
                     await asyncio.sleep(1.0)
 
                     # Send pause command to MPV via stdin
-                    self.mpv_process.stdin.write(b"set pause yes\n")
-                    self.mpv_process.stdin.flush()
+                    self.mpv_process.write(b"set pause yes\n")
                     self.current_status = "paused"
-                    print("[Cheeky] Paused playback")
+                    logger.info("Paused playback")
                 except Exception as e:
-                    print(f"[Cheeky] Error pausing: {e}")
+                    logger.error("Error pausing: %s", e)
 
     async def resume(self) -> None:
         """Resume playback"""
@@ -390,24 +787,53 @@ class PlayerController:
                     success = await self.raop_streamer.resume_stream()
                     if success:
                         self.current_status = "playing"
-                        print("[Cheeky] Resumed Airplay playback")
+                        logger.info("Resumed Airplay playback")
                 except Exception as e:
-                    print(f"[Cheeky] Error resuming Airplay: {e}")
+                    logger.error("Error resuming Airplay: %s", e)
         else:
             # Resume MPV (local/Bluetooth)
             if self.mpv_process and self.current_status == "paused":
                 try:
                     # Send resume command to MPV via stdin
-                    self.mpv_process.stdin.write(b"set pause no\n")
-                    self.mpv_process.stdin.flush()
+                    self.mpv_process.write(b"set pause no\n")
                     self.current_status = "playing"
 
                     # Fade in volume from 0 to target to avoid click
-                    print(f"[Cheeky] Fading in volume from 0 to {self.volume}...")
+                    logger.debug("Fading in volume from 0 to %s...", self.volume)
                     await self._fade_volume(0, self.volume)
-                    print("[Cheeky] Resumed playback")
+                    logger.info("Resumed playback")
                 except Exception as e:
-                    print(f"[Cheeky] Error resuming: {e}")
+                    logger.error("Error resuming: %s", e)
+
+    async def seek(self, seconds_behind_live: float) -> Dict:
+        """Move playback within the time-shift buffer (0 = jump to live)"""
+        if not self.timeshift:
+            raise TimeShiftInactive("Time-shift buffer not active")
+
+        await self._cancel_reconnect()
+        self.timeshift.seek(seconds_behind_live)
+        device_type = self.output_device.get("type", "local")
+
+        # Restart the consumer; the relay serves from the new position
+        if device_type == "airplay":
+            if self.raop_streamer and (self.raop_streamer.is_streaming or self.raop_streamer.is_paused):
+                await self.raop_streamer.stop_stream()
+                await self._start_airplay_stream(self.timeshift.url, probe_url=self.timeshift.stream_url)
+        else:
+            if self.mpv_process:
+                if self.current_status == "playing":
+                    await self._fade_volume(self.volume, 0, duration=0.3)
+                await self._stop_mpv_process()
+            await self._start_mpv_process(self.timeshift.url, start_volume=0)
+            await asyncio.sleep(0.1)
+            await self._fade_volume(0, self.volume)
+
+        logger.info("Time-shift: %.0fs behind live", seconds_behind_live)
+        return self.timeshift.get_status()
+
+    async def jump_to_live(self) -> Dict:
+        """Skip to the live edge of the time-shift buffer"""
+        return await self.seek(0)
 
     async def stop(self) -> None:
         """Stop playback"""
@@ -416,19 +842,23 @@ class PlayerController:
         # Fade out volume before stopping to avoid click (MPV only)
         if device_type != "airplay" and self.mpv_process and self.current_status == "playing":
             try:
-                print(f"[Cheeky] Fading out volume from {self.volume} to 0...")
+                logger.debug("Fading out volume from %s to 0...", self.volume)
                 await self._fade_volume(self.volume, 0, is_fade_out=True)
 
                 # Wait for hardware buffer to drain (1 second to ensure complete drainage)
-                print("[Cheeky] Draining hardware buffer...")
+                logger.debug("Draining hardware buffer...")
                 await asyncio.sleep(1.0)
             except Exception as e:
-                print(f"[Cheeky] Error fading out: {e}")
+                logger.error("Error fading out: %s", e)
 
         # Stop playback
-        self._stop_mpv_process()
+        await self._cancel_reconnect()
+        self.current_stream_url = None
+        await self._stop_mpv_process()
         if self.raop_streamer and self.raop_streamer.is_streaming:
             await self._stop_airplay_stream()
+        await self._close_timeshift()
+        await self._close_prepared()
         self.current_station = None
         self.current_metadata = {}
 
@@ -445,22 +875,22 @@ class PlayerController:
                 try:
                     stream_url = self.raop_streamer.current_stream_url
                     if stream_url:
-                        print(f"[Cheeky] Restarting Airplay stream with volume {volume}%")
+                        logger.info("Restarting Airplay stream with volume %s%%", volume)
                         await self.raop_streamer.stop_stream()
-                        await self.raop_streamer.start_stream(stream_url, volume)
+                        await self.raop_streamer.start_stream(
+                            stream_url, volume, self.raop_streamer.current_probe_url
+                        )
                 except Exception as e:
-                    print(f"[Cheeky] Error changing Airplay volume: {e}")
+                    logger.error("Error changing Airplay volume: %s", e)
         else:
             # MPV supports runtime volume changes
             if self.mpv_process:
                 try:
                     # Send volume command to MPV
-                    cmd = f"set volume {volume}\n".encode()
-                    self.mpv_process.stdin.write(cmd)
-                    self.mpv_process.stdin.flush()
-                    print(f"[Cheeky] Volume set to {volume}%")
+                    self.mpv_process.write(f"set volume {volume}\n".encode())
+                    logger.debug("Volume set to %s%%", volume)
                 except Exception as e:
-                    print(f"[Cheeky] Error setting volume: {e}")
+                    logger.warning("Error setting volume: %s", e)
 
     def get_volume(self) -> int:
         """Get current volume"""
@@ -468,16 +898,13 @@ class PlayerController:
 
     def get_status(self) -> Dict:
         """Get current playback status"""
-        # Check if process is still running
-        if self.mpv_process:
-            if self.mpv_process.poll() is not None:
-                # Process has exited
-                self.current_status = "stopped"
-                self.mpv_process = None
-
+        # The supervisor's exit watcher keeps current_status up to date
         return {
             "status": self.current_status,
-            "metadata": self.current_metadata
+            "reconnecting": bool(self.reconnect_task and not self.reconnect_task.done())
+                            or bool(self.timeshift and self.timeshift.reconnecting),
+            "metadata": self.current_metadata,
+            "timeshift": self.timeshift.get_status() if self.timeshift else {"enabled": False}
         }
 
     def is_playing(self) -> bool:
@@ -487,4 +914,4 @@ class PlayerController:
     def __del__(self):
         """Cleanup on deletion"""
         if self.mpv_process:
-            self._stop_mpv_process()
+            self.mpv_process.kill()
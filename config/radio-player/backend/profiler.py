@@ -0,0 +1,158 @@
+"""
+Sampling Profiler - Low-overhead stack sampling of the running server
+A helper thread samples every thread's stack; a loop task samples where each
+asyncio task is suspended. Output is collapsed stacks (flamegraph.pl / speedscope)
+plus a top-N of our own functions.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+APP_ROOT = str(Path(__file__).resolve().parent.parent)
+
+# Innermost frames of threads parked in a C-level wait; kept out of the top-N
+IDLE_FRAMES = {
+    "selectors:select", "threading:wait", "queue:get", "concurrent.futures.thread:_worker",
+    "backend.watchdog:_watch", "asyncio.runners:run",
+}
+
+
+class SamplingProfiler:
+    """Samples thread stacks and asyncio task stacks for a fixed duration"""
+
+    def __init__(self, interval: float = 0.005, task_interval: float = 0.05, max_depth: int = 64):
+        self.interval = interval            # Thread stack sampling period
+        self.task_interval = task_interval  # Task sampling runs on the loop, so less often
+        self.max_depth = max_depth
+        self._labels: Dict[object, str] = {}  # Code object -> "module:function"
+        self.running = False
+
+    def _label(self, code) -> str:
+        """'backend.player:_play' for our code, 'asyncio.tasks:sleep' style for the rest"""
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            # Longest matching import root gives the dotted module name
+            roots = [APP_ROOT] + sorted((p for p in sys.path if p), key=len, reverse=True)
+            root = next((r for r in roots if path.startswith(r.rstrip("/") + "/")), None)
+            if root:
+                module = str(Path(path).relative_to(root).with_suffix("")).replace("/", ".")
+            else:
+                module = Path(path).stem
+            label = self._labels[code] = f"{module}:{code.co_name}"
+        return label
+
+    def _frame_stack(self, frame) -> List[str]:
+        """Outermost-first labels of a thread's stack"""
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _task_stack(self, task: asyncio.Task) -> List[str]:
+        """Outermost-first labels along a task's await chain"""
+        stack = []
+        coro = task.get_coro()
+        while coro is not None and len(stack) < self.max_depth:
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+            if frame is None:
+                break
+            stack.append(self._label(frame.f_code))
+            coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        return stack
+
+    def _sample_threads(self, samples: Counter, stop: threading.Event) -> None:
+        """Profiler thread: sample every other thread's stack each interval"""
+        me = threading.get_ident()
+        names = {}
+        while not stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in names:
+                    names.update((t.ident, f"thread:{t.name}") for t in threading.enumerate())
+                name = names.setdefault(ident, f"thread:{ident}")
+                samples[";".join([name] + self._frame_stack(frame))] += 1
+
+    async def _sample_tasks(self, samples: Counter, duration: float) -> None:
+        """Sample where every other task is waiting"""
+        me = asyncio.current_task()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            for task in asyncio.all_tasks():
+                if task is me or task.done():
+                    continue
+                stack = self._task_stack(task)
+                if stack:
+                    samples[";".join(["task"] + stack)] += 1
+            await asyncio.sleep(self.task_interval)
+
+    async def profile(self, seconds: float, top: int = 20) -> Dict:
+        """Profile for `seconds` and return collapsed stacks plus hot functions"""
+        if self.running:
+            raise RuntimeError("A profile is already running")
+        self.running = True
+        thread_samples: Counter = Counter()
+        task_samples: Counter = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample_threads, args=(thread_samples, stop),
+                                   name="cheeky-profiler", daemon=True)
+        started = time.perf_counter()
+        try:
+            sampler.start()
+            await self._sample_tasks(task_samples, seconds)
+        finally:
+            stop.set()
+            await asyncio.get_running_loop().run_in_executor(None, sampler.join)
+            self.running = False
+        elapsed = time.perf_counter() - started
+
+        logger.info("Profiled %.1fs: %s thread samples, %s task samples",
+                    elapsed, sum(thread_samples.values()), sum(task_samples.values()))
+        return {
+            "seconds": round(elapsed, 2),
+            "interval_ms": self.interval * 1000,
+            "task_interval_ms": self.task_interval * 1000,
+            "thread_samples": sum(thread_samples.values()),
+            "task_samples": sum(task_samples.values()),
+            "top": self._top(thread_samples, top),
+            "top_awaiting": self._top(task_samples, top),
+            "collapsed": self.collapsed(thread_samples + task_samples),
+        }
+
+    @staticmethod
+    def collapsed(samples: Counter) -> str:
+        """One 'frame;frame;frame count' line per distinct stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+    @staticmethod
+    def _top(samples: Counter, limit: int) -> List[Dict]:
+        """Our hottest functions: self samples (innermost app frame) and total (anywhere on stack)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in samples.items():
+            if stack.rsplit(";", 1)[-1] in IDLE_FRAMES:
+                continue
+            frames = [f for f in stack.split(";")[1:] if f.startswith(("backend.", "main:"))]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        all_samples = sum(samples.values()) or 1
+        return [
+            {"function": function, "self": count, "total": total[function],
+             "self_percent": round(count * 100 / all_samples, 1),
+             "total_percent": round(total[function] * 100 / all_samples, 1)}
+            for function, count in own.most_common(limit)
+        ]
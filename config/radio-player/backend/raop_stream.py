@@ -4,123 +4,324 @@ Optimized for modern Airplay 2 devices (tested with Yamaha receivers)
 """
 
 import asyncio
+import ipaddress
 import pyatv
+from pyatv import conf
 from pyatv.const import Protocol
-import subprocess
+from pyatv.interface import DeviceListener
 import tempfile
 import os
+import time
 from typing import Optional
+from backend.transcode import TranscodePlanner, TARGET_AAC
+from backend.supervisor import ProcessSupervisor
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+class _PoolListener(DeviceListener):
+    """Evicts a pooled connection when pyatv reports it lost or closed"""
+
+    def __init__(self, pool, address: str):
+        self.pool = pool
+        self.address = address
+
+    def connection_lost(self, exception: Exception) -> None:
+        logger.warning("Connection to %s lost: %s", self.address, exception)
+        self.pool._evict(self.address)
+
+    def connection_closed(self) -> None:
+        self.pool._evict(self.address)
+
+
+class ReceiverPool:
+    """Pool of live pyatv RAOP connections keyed by receiver address"""
+
+    def __init__(self, config_ttl: int = 600, keepalive_interval: int = 30, idle_timeout: int = 900):
+        self.config_ttl = config_ttl  # How long a resolved BaseConfig stays valid
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout  # Close connections unused for this long
+        self.scan_timeout = 3  # Unicast scan of a single host is fast
+        self._configs = {}  # address -> (BaseConfig, resolved_at)
+        self._connections = {}  # address -> {"atv", "in_use", "last_used"}
+        self._locks = {}  # address -> asyncio.Lock, serialises connects per receiver
+        self._keepalive_task = None
+        self.stats = {"hits": 0, "connects": 0, "scans": 0, "config_hits": 0, "evictions": 0}
+
+    async def _resolve(self, address: str, port: Optional[int] = None):
+        """Resolve the BaseConfig for one receiver, using the TTL cache"""
+        cached = self._configs.get(address)
+        if cached and time.monotonic() - cached[1] < self.config_ttl:
+            self.stats["config_hits"] += 1
+            return cached[0]
+
+        # Unicast scan of just the target instead of a 15s multicast sweep
+        logger.debug("Scanning %s (unicast)...", address)
+        self.stats["scans"] += 1
+        loop = asyncio.get_event_loop()
+        atvs = await pyatv.scan(
+            loop, hosts=[address], protocol=Protocol.RAOP, timeout=self.scan_timeout
+        )
+
+        target = next((c for c in atvs if str(c.address) == address), None)
+        if not target and port:
+            # Unicast scan can miss receivers that answer mDNS slowly; the
+            # port from discovery is enough for a manual RAOP config
+            target = self._manual_config(address, port)
+        if not target:
+            logger.warning("Device not found at %s", address)
+            self._configs.pop(address, None)
+            return None
+
+        logger.info("Found: %s at %s", target.name, target.address)
+        self._configs[address] = (target, time.monotonic())
+        return target
+
+    @staticmethod
+    def _manual_config(address: str, port: int):
+        """BaseConfig for a receiver known only by address and RAOP port"""
+        try:
+            config = conf.AppleTV(ipaddress.ip_address(address), address)
+        except ValueError:
+            return None
+        config.add_service(conf.ManualService(None, Protocol.RAOP, port, {}))
+        logger.debug("Using manual RAOP config for %s:%s", address, port)
+        return config
+
+    async def acquire(self, address: str, port: Optional[int] = None):
+        """Get a live connection to a receiver, connecting only if needed"""
+        lock = self._locks.setdefault(address, asyncio.Lock())
+        async with lock:
+            entry = self._connections.get(address)
+            if entry:
+                self.stats["hits"] += 1
+                entry["in_use"] = True
+                entry["last_used"] = time.monotonic()
+                logger.debug("Reusing pooled connection to %s", address)
+                return entry["atv"]
+
+            config = await self._resolve(address, port)
+            if not config:
+                return None
+
+            logger.debug("Connecting via RAOP...")
+            loop = asyncio.get_event_loop()
+            try:
+                atv = await pyatv.connect(config, loop, protocol=Protocol.RAOP)
+            except Exception:
+                # Receiver may have changed address/port - rescan next time
+                self._configs.pop(address, None)
+                raise
+
+            self.stats["connects"] += 1
+            atv.listener = _PoolListener(self, address)
+            self._connections[address] = {
+                "atv": atv,
+                "in_use": True,
+                "last_used": time.monotonic()
+            }
+            self._ensure_keepalive()
+            return atv
+
+    def release(self, address: str) -> None:
+        """Return a connection to the pool without closing it"""
+        entry = self._connections.get(address)
+        if entry:
+            entry["in_use"] = False
+            entry["last_used"] = time.monotonic()
+
+    def _evict(self, address: str) -> None:
+        """Drop a connection from the pool (and close it if still open)"""
+        entry = self._connections.pop(address, None)
+        if not entry:
+            return
+        self.stats["evictions"] += 1
+        try:
+            entry["atv"].close()
+        except Exception:
+            pass
+
+    def _raop_port(self, address: str) -> int:
+        """RAOP port from the cached config (7000 if unknown)"""
+        cached = self._configs.get(address)
+        service = cached[0].get_service(Protocol.RAOP) if cached else None
+        return service.port if service else 7000
+
+    def _ensure_keepalive(self) -> None:
+        """Start the keepalive loop on first use"""
+        if self._keepalive_task is None or self._keepalive_task.done():
+            self._keepalive_task = asyncio.create_task(self._keepalive())
+
+    async def _keepalive(self):
+        """Probe idle receivers and close connections idle for too long"""
+        while self._connections:
+            try:
+                await asyncio.sleep(self.keepalive_interval)
+                now = time.monotonic()
+
+                for address, entry in list(self._connections.items()):
+                    if entry["in_use"]:
+                        continue
+                    if now - entry["last_used"] > self.idle_timeout:
+                        logger.debug("Closing idle connection to %s", address)
+                        self._evict(address)
+                        continue
+
+                    try:
+                        _, writer = await asyncio.wait_for(
+                            asyncio.open_connection(address, self._raop_port(address)), timeout=3
+                        )
+                        writer.close()
+                    except Exception:
+                        logger.warning("Keepalive failed for %s, dropping connection", address)
+                        self._evict(address)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Keepalive error: %s", e)
+
+    async def close_all(self):
+        """Close every pooled connection"""
+        if self._keepalive_task:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        for address in list(self._connections):
+            self._evict(address)
+
+    def get_stats(self) -> dict:
+        """Pool size and reuse counters"""
+        return {
+            **self.stats,
+            "connections": len(self._connections),
+            "cached_configs": len(self._configs)
+        }
+
+
+_shared_pool: Optional[ReceiverPool] = None
+
+
+def shared_pool() -> ReceiverPool:
+    """Process-wide receiver pool, created on first use"""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = ReceiverPool()
+    return _shared_pool
+
+
+async def close_shared_pool():
+    """Close the shared pool's connections and keepalive (no-op if unused)"""
+    global _shared_pool
+    if _shared_pool is not None:
+        await _shared_pool.close_all()
+        _shared_pool = None
+
 
 class RAOPStreamer:
     """Handles RAOP/Airplay audio streaming"""
 
-    def __init__(self):
+    def __init__(self, transcode_planner: Optional[TranscodePlanner] = None,
+                 pool: Optional[ReceiverPool] = None,
+                 supervisor: Optional[ProcessSupervisor] = None):
         self.atv = None
         self.stream_task = None
-        self.buffer_process = None
+        self.supervisor = supervisor or ProcessSupervisor()
+        self.buffer_process = None  # ManagedProcess
         self.temp_file_path = None
         self.is_streaming = False
         self.current_address = None
         self.current_port = None
+        self.transcode_planner = transcode_planner or TranscodePlanner()
+        self.pool = pool or shared_pool()
+        self.transcode_plan = None
+        self.ffmpeg_started_at = None
 
     async def connect(self, address: str, port: int = 5000) -> bool:
         """Connect to Airplay receiver via RAOP protocol (modern Airplay 2 devices)"""
         try:
-            print(f"[Cheeky RAOP] Connecting to device at {address}:{port}...")
-            loop = asyncio.get_event_loop()
+            logger.info("Connecting to device at %s:%s...", address, port)
 
-            # Scan for Airplay devices on the network
-            print(f"[Cheeky RAOP] Scanning for device at {address}...")
-            atvs = await pyatv.scan(loop, timeout=15)
-            print(f"[Cheeky RAOP] pyatv scan completed, found {len(atvs)} devices")
-
-            # Debug: print all found devices
-            for dev in atvs:
-                print(f"[Cheeky RAOP]   - Device: name='{dev.name}' address='{dev.address}'")
-
-            # Find the target device by address (convert IPv4Address to string for comparison)
-            target = next((c for c in atvs if str(c.address) == address), None)
-            if not target:
-                print(f"[Cheeky RAOP] Device not found at {address}")
-                print(f"[Cheeky RAOP] Available devices:")
-                for dev in atvs:
-                    print(f"[Cheeky RAOP]   - {dev.name} at {dev.address}")
-                return False
+            # Hand back the previous receiver before switching
+            if self.atv and self.current_address != address:
+                self.pool.release(self.current_address)
+                self.atv = None
 
-            print(f"[Cheeky RAOP] Found: {target.name} at {target.address}")
-            print(f"[Cheeky RAOP] Connecting via RAOP...")
+            # Reuses a live pooled connection when the receiver is already known
+            self.atv = await self.pool.acquire(address, port)
+            if not self.atv:
+                return False
 
-            # Connect using RAOP protocol
-            self.atv = await pyatv.connect(target, Protocol.RAOP)
             self.current_address = address
             self.current_port = port
 
-            print(f"[Cheeky RAOP] ✓ Connected to {target.name}")
+            logger.info("Connected to %s", address)
             return True
 
         except Exception as e:
-            print(f"[Cheeky RAOP] Connection failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Connection failed: %s", e)
             return False
 
+    async def warm_up(self, volume: int = 60) -> bool:
+        """Pre-set volume on the pooled connection so start_stream only sends audio"""
+        if not self.atv or self.is_streaming:
+            return False
+        try:
+            await self.atv.audio.set_volume(volume)
+        except Exception as e:
+            logger.warning("Volume control not supported: %s", e)
+        return True
+
     async def start_stream(self, stream_url: str, volume: int = 60) -> bool:
         """Start streaming audio to Airplay receiver"""
         if not self.atv:
-            print("[Cheeky RAOP] Not connected to any device")
+            logger.warning("Not connected to any device")
             return False
 
         try:
             # Set volume
-            print(f"[Cheeky RAOP] Setting volume to {volume}...")
+            logger.debug("Setting volume to %s...", volume)
             try:
                 await self.atv.audio.set_volume(volume)
             except Exception as e:
-                print(f"[Cheeky RAOP] Volume control not supported: {e}")
+                logger.warning("Volume control not supported: %s", e)
 
-            print(f"[Cheeky RAOP] Starting direct stream: {stream_url}")
+            logger.debug("Starting direct stream: %s", stream_url)
 
             # Stream directly from ffmpeg stdout to pyatv
             # No buffering - just like the working test scripts!
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-re',           # Real-time
-                '-i', stream_url,
-                '-c:a', 'aac',   # AAC codec
-                '-b:a', '256k',
-                '-ar', '44100',
-                '-ac', '2',
-                '-f', 'adts',    # ADTS container for AAC
-                '-'              # Output to stdout
-            ]
-
-            print(f"[Cheeky RAOP] Starting ffmpeg: {' '.join(ffmpeg_cmd[:6])} ...")
-            self.buffer_process = subprocess.Popen(
+            # AAC 44.1kHz stereo sources are copied into ADTS without re-encoding
+            self.transcode_plan = await self.transcode_planner.plan(stream_url, TARGET_AAC)
+            ffmpeg_cmd = self.transcode_plan["command"]
+
+            logger.debug("Starting ffmpeg (%s): %s ...", self.transcode_plan['path'], ' '.join(ffmpeg_cmd[:6]))
+            self.buffer_process = await self.supervisor.spawn(
+                "ffmpeg",
                 ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
             )
+            self.ffmpeg_started_at = time.monotonic()
 
-            print(f"[Cheeky RAOP] Starting direct stream to receiver...")
+            logger.debug("Starting direct stream to receiver...")
             # Stream ffmpeg stdout directly to Airplay receiver
             self.stream_task = asyncio.create_task(
                 self.atv.stream.stream_file(self.buffer_process.stdout)
             )
 
             self.is_streaming = True
-            print(f"[Cheeky RAOP] ✓ Streaming to Airplay receiver")
+            logger.info("Streaming to Airplay receiver")
             return True
 
         except Exception as e:
-            print(f"[Cheeky RAOP] Streaming failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Streaming failed: %s", e)
+            if self.buffer_process:
+                self.buffer_process.kill()
             self._cleanup()
             return False
 
     async def stop_stream(self):
         """Stop streaming"""
-        print("[Cheeky RAOP] Stopping stream...")
+        logger.debug("Stopping stream...")
 
         try:
             # Cancel streaming task
@@ -133,27 +334,27 @@ class RAOPStreamer:
 
             # Stop buffer process
             if self.buffer_process:
-                self.buffer_process.terminate()
-                try:
-                    self.buffer_process.wait(timeout=2)
-                except subprocess.TimeoutExpired:
-                    self.buffer_process.kill()
+                if self.transcode_plan:
+                    self.transcode_planner.record_usage(
+                        self.transcode_plan, self.buffer_process.pid, self.ffmpeg_started_at
+                    )
+                await self.supervisor.stop(self.buffer_process, timeout=2)
 
             self._cleanup()
             self.is_streaming = False
-            print("[Cheeky RAOP] ✓ Stream stopped")
+            logger.info("Stream stopped")
 
         except Exception as e:
-            print(f"[Cheeky RAOP] Error stopping stream: {e}")
+            logger.error("Error stopping stream: %s", e)
 
     def _cleanup(self):
         """Clean up temporary files"""
         if self.temp_file_path and os.path.exists(self.temp_file_path):
             try:
                 os.unlink(self.temp_file_path)
-                print(f"[Cheeky RAOP] Cleaned up temp file")
+                logger.debug("Cleaned up temp file")
             except Exception as e:
-                print(f"[Cheeky RAOP] Failed to cleanup temp file: {e}")
+                logger.error("Failed to cleanup temp file: %s", e)
 
         self.temp_file_path = None
         self.buffer_process = None
@@ -164,16 +365,17 @@ class RAOPStreamer:
         try:
             await self.stop_stream()
 
+            # Keep the connection pooled so the next connect is instant
             if self.atv:
-                self.atv.close()
+                self.pool.release(self.current_address)
                 self.atv = None
 
             self.current_address = None
             self.current_port = None
-            print("[Cheeky RAOP] ✓ Disconnected")
+            logger.info("Disconnected")
 
         except Exception as e:
-            print(f"[Cheeky RAOP] Error disconnecting: {e}")
+            logger.error("Error disconnecting: %s", e)
 
     def get_status(self) -> dict:
         """Get current streaming status"""
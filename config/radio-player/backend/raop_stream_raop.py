@@ -5,24 +5,39 @@ Works with both native Airplay 2 devices AND MASHBOX/AirServer
 
 import os
 import platform
-import subprocess
 import asyncio
-from typing import Optional
+import time
+from typing import Callable, Optional
 from pathlib import Path
+from backend.transcode import TranscodePlanner, TARGET_PCM
+from backend.supervisor import ProcessSupervisor
+from backend.log import get_logger
+
+logger = get_logger(__name__)
 
 class RAOPStreamer:
     """Handles RAOP/Airplay audio streaming using raop_play binary"""
 
-    def __init__(self):
-        self.ffmpeg_process = None
-        self.raop_process = None
+    def __init__(self, transcode_planner: Optional[TranscodePlanner] = None,
+                 supervisor: Optional[ProcessSupervisor] = None,
+                 on_stream_exit: Optional[Callable[[], None]] = None):
+        self.supervisor = supervisor or ProcessSupervisor()
+        self.on_stream_exit = on_stream_exit  # Called when ffmpeg/raop_play die mid-stream
+        self.ffmpeg_process = None  # ManagedProcess
+        self.raop_process = None  # ManagedProcess
         self.is_streaming = False
         self.is_paused = False
         self.current_address = None
         self.current_port = None
         self.current_stream_url = None
+        self.current_probe_url = None  # Original station URL when streaming from a local relay
         self.current_volume = 60
         self.bin_dir = Path(__file__).parent.parent / "bin"
+        self.transcode_planner = transcode_planner or TranscodePlanner()
+        self.transcode_plan = None
+        self.ffmpeg_started_at = None
+        self.warm_session = None  # Pre-connected raop_play waiting for audio
+        self.warm_ttl = 120  # Seconds a warm session is kept before it is dropped
 
     def _get_raop_binary(self) -> str:
         """Get the correct raop_play binary for current architecture"""
@@ -45,172 +60,290 @@ class RAOPStreamer:
 
         return str(binary)
 
+    def _raop_command(self, binary: str, volume: int) -> list:
+        """Build the raop_play command line for the current receiver"""
+        # -v: volume (0-100)
+        # -d: debug level
+        # -a: use ALAC codec (critical for MASHBOX/AirServer!)
+        # -p: port
+        return [
+            binary,
+            '-v', str(volume),
+            '-d', '0',                    # No debug output
+            '-a',                         # ALAC codec (critical!)
+            '-p', str(self.current_port),
+            self.current_address,
+            '-'                           # Read from stdin
+        ]
+
+    async def warm_up(self, volume: int = 60) -> bool:
+        """
+        Pre-connect to the receiver before any audio is available
+        raop_play does the RTSP OPTIONS/ANNOUNCE/SETUP handshake, key exchange and
+        latency negotiation on startup, then blocks reading stdin. Starting it now on
+        an empty pipe means play() only has to attach ffmpeg to the write end.
+        """
+        if not self.current_address or self.is_streaming:
+            return False
+
+        self.discard_warm_session()
+
+        try:
+            binary = self._get_raop_binary()
+            read_fd, write_fd = os.pipe()
+            try:
+                process = await self.supervisor.spawn(
+                    "raop_play",
+                    self._raop_command(binary, volume),
+                    stdin=read_fd,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+            except Exception:
+                os.close(write_fd)
+                raise
+            finally:
+                os.close(read_fd)
+
+            self.warm_session = {
+                "process": process,
+                "write_fd": write_fd,
+                "address": self.current_address,
+                "port": self.current_port,
+                "volume": volume,
+                "started_at": time.monotonic()
+            }
+
+            # Don't hold a receiver session open forever if the user never presses play
+            asyncio.get_event_loop().call_later(
+                self.warm_ttl, self._expire_warm_session, process
+            )
+
+            logger.info("Warming up session to %s:%s", self.current_address, self.current_port)
+            return True
+
+        except Exception as e:
+            logger.warning("Warm-up failed: %s", e)
+            return False
+
+    def _take_warm_session(self, volume: int) -> Optional[dict]:
+        """Hand over the warm session if it still matches the requested stream"""
+        warm = self.warm_session
+        if not warm:
+            return None
+
+        usable = (
+            warm["process"].alive
+            and warm["address"] == self.current_address
+            and warm["port"] == self.current_port
+            and warm["volume"] == volume
+            and time.monotonic() - warm["started_at"] < self.warm_ttl
+        )
+        if not usable:
+            self.discard_warm_session()
+            return None
+
+        self.warm_session = None
+        return warm
+
+    def _expire_warm_session(self, process) -> None:
+        """Drop the warm session if it is still the one started with this process"""
+        if self.warm_session and self.warm_session["process"] is process:
+            logger.info("Warm session expired unused")
+            self.discard_warm_session()
+
+    def discard_warm_session(self) -> None:
+        """Close an unused warm session"""
+        warm = self.warm_session
+        if not warm:
+            return
+        self.warm_session = None
+
+        try:
+            os.close(warm["write_fd"])
+        except OSError:
+            pass
+        warm["process"].terminate()  # Reaped by the supervisor's exit watcher
+
     async def connect(self, address: str, port: int = 5000) -> bool:
         """
         Test connection to Airplay receiver
         For raop_play, we don't need a persistent connection - just verify the binary exists
         """
         try:
-            print(f"[Cheeky RAOP] Preparing to connect to {address}:{port}")
+            logger.debug("Preparing to connect to %s:%s", address, port)
 
             # Verify binary exists
             binary = self._get_raop_binary()
-            print(f"[Cheeky RAOP] Using binary: {binary}")
+            logger.debug("Using binary: %s", binary)
 
             self.current_address = address
             self.current_port = port
 
-            print(f"[Cheeky RAOP] ✓ Ready to stream to {address}")
+            logger.info("Ready to stream to %s", address)
             return True
 
         except Exception as e:
-            print(f"[Cheeky RAOP] Connection setup failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Connection setup failed: %s", e)
             return False
 
-    async def start_stream(self, stream_url: str, volume: int = 60) -> bool:
+    async def start_stream(self, stream_url: str, volume: int = 60, probe_url: Optional[str] = None) -> bool:
         """Start streaming audio to Airplay receiver"""
         if not self.current_address:
-            print("[Cheeky RAOP] Not connected to any device")
+            logger.warning("Not connected to any device")
             return False
 
         try:
             binary = self._get_raop_binary()
 
-            print(f"[Cheeky RAOP] Starting stream: {stream_url}")
-            print(f"[Cheeky RAOP] Target: {self.current_address}:{self.current_port}")
-            print(f"[Cheeky RAOP] Volume: {volume}%")
-
-            # Start ffmpeg to transcode stream to 44.1kHz stereo s16le
-            # This is critical to avoid "mickey mouse" pitch issues
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-re',              # Real-time playback
-                '-i', stream_url,   # Input stream
-                '-ar', '44100',     # Resample to 44.1kHz (critical!)
-                '-ac', '2',         # Stereo (critical!)
-                '-f', 's16le',      # Signed 16-bit little-endian PCM
-                '-'                 # Output to stdout
-            ]
-
-            print(f"[Cheeky RAOP] Starting ffmpeg transcoder...")
-            self.ffmpeg_process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL
-            )
+            logger.debug("Starting stream: %s", stream_url)
+            logger.debug("Target: %s:%s", self.current_address, self.current_port)
+            logger.debug("Volume: %s%%", volume)
 
-            # Start raop_play to stream to Airplay device
-            # -v: volume (0-100)
-            # -d: debug level
-            # -a: use ALAC codec (critical for MASHBOX/AirServer!)
-            # -p: port
-            raop_cmd = [
-                binary,
-                '-v', str(volume),
-                '-d', '0',                    # No debug output
-                '-a',                         # ALAC codec (critical!)
-                '-p', str(self.current_port),
-                self.current_address,
-                '-'                           # Read from stdin
-            ]
-
-            print(f"[Cheeky RAOP] Starting raop_play streamer...")
-            self.raop_process = subprocess.Popen(
-                raop_cmd,
-                stdin=self.ffmpeg_process.stdout,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
+            # ffmpeg must deliver 44.1kHz stereo s16le to raop_play
+            # This is critical to avoid "mickey mouse" pitch issues - the planner
+            # only skips the resampler when the source is already in that format
+            self.transcode_plan = await self.transcode_planner.plan(stream_url, TARGET_PCM, probe_url)
+
+            logger.debug("Starting ffmpeg (%s, profile %s)...",
+                         self.transcode_plan['path'], self.transcode_plan['profile'])
 
-            # Allow ffmpeg to receive SIGPIPE if raop_play exits
-            self.ffmpeg_process.stdout.close()
+            # Reuse a pre-connected raop_play if one is waiting for audio
+            warm = self._take_warm_session(volume)
+            # The two ends of the pipe can't be re-attached, so a dying child
+            # ends the stream (on_stream_exit) rather than being restarted
+            if warm:
+                logger.debug("Using warmed-up session to %s", self.current_address)
+                try:
+                    self.ffmpeg_process = await self.supervisor.spawn(
+                        "ffmpeg",
+                        self.transcode_plan["command"],
+                        on_exit=self._on_child_exit,
+                        stdout=warm["write_fd"],
+                        stderr=asyncio.subprocess.DEVNULL
+                    )
+                finally:
+                    # ffmpeg is now the only writer, so raop_play sees EOF when it exits
+                    os.close(warm["write_fd"])
+                self.raop_process = warm["process"]
+                self.raop_process.on_exit = self._on_child_exit
+            else:
+                read_fd, write_fd = os.pipe()
+                try:
+                    self.ffmpeg_process = await self.supervisor.spawn(
+                        "ffmpeg",
+                        self.transcode_plan["command"],
+                        on_exit=self._on_child_exit,
+                        stdout=write_fd,
+                        stderr=asyncio.subprocess.DEVNULL
+                    )
+
+                    logger.debug("Starting raop_play streamer...")
+                    self.raop_process = await self.supervisor.spawn(
+                        "raop_play",
+                        self._raop_command(binary, volume),
+                        on_exit=self._on_child_exit,
+                        stdin=read_fd,
+                        stdout=asyncio.subprocess.DEVNULL,
+                        stderr=asyncio.subprocess.DEVNULL
+                    )
+                finally:
+                    # Allow ffmpeg to receive SIGPIPE if raop_play exits
+                    os.close(read_fd)
+                    os.close(write_fd)
+
+            self.ffmpeg_started_at = time.monotonic()
 
             self.is_streaming = True
             self.is_paused = False
             self.current_stream_url = stream_url
+            self.current_probe_url = probe_url
             self.current_volume = volume
-            print(f"[Cheeky RAOP] ✓ Streaming to {self.current_address}")
+            logger.info("Streaming to %s", self.current_address)
             return True
 
         except Exception as e:
-            print(f"[Cheeky RAOP] Streaming failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Streaming failed: %s", e)
             await self.stop_stream()
             return False
 
     async def stop_stream(self):
         """Stop streaming"""
-        print("[Cheeky RAOP] Stopping stream...")
+        logger.debug("Stopping stream...")
 
         try:
-            # Terminate raop_play first
-            if self.raop_process:
-                self.raop_process.terminate()
-                try:
-                    self.raop_process.wait(timeout=2)
-                except subprocess.TimeoutExpired:
-                    self.raop_process.kill()
-                self.raop_process = None
-
-            # Then terminate ffmpeg
-            if self.ffmpeg_process:
-                self.ffmpeg_process.terminate()
-                try:
-                    self.ffmpeg_process.wait(timeout=2)
-                except subprocess.TimeoutExpired:
-                    self.ffmpeg_process.kill()
-                self.ffmpeg_process = None
+            raop_process, self.raop_process = self.raop_process, None
+            ffmpeg_process, self.ffmpeg_process = self.ffmpeg_process, None
+            if ffmpeg_process and self.transcode_plan:
+                self.transcode_planner.record_usage(
+                    self.transcode_plan, ffmpeg_process.pid, self.ffmpeg_started_at
+                )
+
+            # Both at once, so neither one's exit looks like the other crashing
+            await asyncio.gather(
+                self.supervisor.stop(raop_process, timeout=2),
+                self.supervisor.stop(ffmpeg_process, timeout=2)
+            )
 
             self.is_streaming = False
             self.is_paused = False
-            print("[Cheeky RAOP] ✓ Stream stopped")
+            logger.info("Stream stopped")
 
         except Exception as e:
-            print(f"[Cheeky RAOP] Error stopping stream: {e}")
+            logger.error("Error stopping stream: %s", e)
+
+    def _on_child_exit(self, process) -> None:
+        """ffmpeg or raop_play exited while streaming"""
+        if process not in (self.ffmpeg_process, self.raop_process):
+            return
+        logger.warning("%s exited mid-stream (exit code %s)", process.name, process.returncode)
+        # The other half of the pipeline follows on EOF/SIGPIPE; stop it cleanly
+        asyncio.create_task(self.stop_stream())
+        if self.on_stream_exit:
+            self.on_stream_exit()
 
     async def pause_stream(self):
         """Pause streaming (stops stream, saves state for resume)"""
         if not self.is_streaming or self.is_paused:
-            print("[Cheeky RAOP] Not streaming or already paused")
+            logger.warning("Not streaming or already paused")
             return
 
-        print("[Cheeky RAOP] Pausing stream...")
+        logger.debug("Pausing stream...")
         await self.stop_stream()
         self.is_paused = True
-        print("[Cheeky RAOP] ✓ Stream paused")
+        logger.info("Stream paused")
 
     async def resume_stream(self):
         """Resume streaming (restarts stream from saved URL)"""
         if not self.is_paused or not self.current_stream_url:
-            print("[Cheeky RAOP] Not paused or no stream to resume")
+            logger.warning("Not paused or no stream to resume")
             return
 
-        print("[Cheeky RAOP] Resuming stream...")
-        success = await self.start_stream(self.current_stream_url, self.current_volume)
+        logger.debug("Resuming stream...")
+        success = await self.start_stream(self.current_stream_url, self.current_volume, self.current_probe_url)
         if success:
-            print("[Cheeky RAOP] ✓ Stream resumed")
+            logger.info("Stream resumed")
         return success
 
     async def disconnect(self):
         """Disconnect from Airplay receiver"""
         try:
+            self.discard_warm_session()
             await self.stop_stream()
 
             self.current_address = None
             self.current_port = None
-            print("[Cheeky RAOP] ✓ Disconnected")
+            logger.info("Disconnected")
 
         except Exception as e:
-            print(f"[Cheeky RAOP] Error disconnecting: {e}")
+            logger.error("Error disconnecting: %s", e)
 
     def get_status(self) -> dict:
         """Get current streaming status"""
         return {
             "connected": self.current_address is not None,
             "streaming": self.is_streaming,
+            "warm": self.warm_session is not None,
             "address": self.current_address,
             "port": self.current_port
         }
@@ -0,0 +1,97 @@
+"""
+Receiver Registry - Cached, concurrent view of Bluetooth and Airplay receivers
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class ReceiverRegistry:
+    """Merges Bluetooth and Airplay discovery and tracks the active output"""
+
+    SOURCES = ("bluetooth", "airplay")
+
+    def __init__(self, bluetooth_manager, airplay_manager, player, max_age: int = 120):
+        self.bluetooth_mgr = bluetooth_manager
+        self.airplay_mgr = airplay_manager
+        self.player = player
+        self.max_age = max_age  # Seconds before a cached list counts as stale
+        self._devices: Dict[str, List[Dict]] = {source: [] for source in self.SOURCES}
+        self._updated: Dict[str, Optional[float]] = {source: None for source in self.SOURCES}
+        self._refreshing: Dict[str, Optional[asyncio.Task]] = {source: None for source in self.SOURCES}
+
+    async def _discover(self, source: str) -> List[Dict]:
+        """Run discovery for one source"""
+        if source == "bluetooth":
+            return await self.bluetooth_mgr.get_devices()
+        return await self.airplay_mgr.discover_airplay_devices()
+
+    async def _refresh_source(self, source: str) -> None:
+        """Refresh one source and store the result"""
+        try:
+            self.update(source, await self._discover(source))
+        except Exception as e:
+            logger.error("Receiver discovery error (%s): %s", source, e)
+
+    def update(self, source: str, devices: List[Dict]) -> None:
+        """Store a fresh device list (also used by endpoints that discover directly)"""
+        self._devices[source] = devices
+        self._updated[source] = time.time()
+
+    def refresh(self, sources=SOURCES) -> List[asyncio.Task]:
+        """Start refreshing sources concurrently, joining any refresh already running"""
+        tasks = []
+        for source in sources:
+            task = self._refreshing[source]
+            if task is None or task.done():
+                task = asyncio.create_task(self._refresh_source(source))
+                self._refreshing[source] = task
+            tasks.append(task)
+        return tasks
+
+    def _is_stale(self, source: str) -> bool:
+        updated = self._updated[source]
+        return updated is None or time.time() - updated > self.max_age
+
+    def get_active_output(self) -> Dict:
+        """The output the player is actually using"""
+        device = dict(self.player.output_device)
+        device_type = device.pop("type", "local")
+        return {
+            "type": device_type,
+            "device": device if device_type != "local" else None
+        }
+
+    async def get_receivers(self, refresh: bool = False, deadline: float = 5.0) -> Dict:
+        """
+        Return cached receivers, refreshing stale (or all, if refresh) sources
+        Waits at most `deadline` seconds; slower sources keep refreshing in the
+        background and the response reports what was cached at the time.
+        """
+        sources = [s for s in self.SOURCES if refresh or self._is_stale(s)]
+        if sources:
+            tasks = self.refresh(sources)
+            if deadline > 0:
+                await asyncio.wait(tasks, timeout=deadline)
+
+        now = time.time()
+        freshness = {}
+        for source in self.SOURCES:
+            updated = self._updated[source]
+            task = self._refreshing[source]
+            freshness[source] = {
+                "updated_at": datetime.fromtimestamp(updated).isoformat() if updated else None,
+                "age_seconds": round(now - updated, 1) if updated else None,
+                "refreshing": task is not None and not task.done()
+            }
+
+        return {
+            "receivers": {source: self._devices[source] for source in self.SOURCES},
+            "connected": self.get_active_output(),
+            "freshness": freshness
+        }
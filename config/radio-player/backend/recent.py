@@ -7,6 +7,9 @@ from pathlib import Path
 from typing import List, Dict
 from datetime import datetime
 import asyncio
+from backend.log import get_logger
+
+logger = get_logger(__name__)
 
 class RecentManager:
     """Manages recently played radio stations (last 10)"""
@@ -27,7 +30,7 @@ class RecentManager:
                     data = json.load(f)
                     self._recent = data.get("recent", [])
             except (json.JSONDecodeError, IOError) as e:
-                print(f"[Cheeky] Error loading recent: {e}")
+                logger.error("Error loading recent: %s", e)
                 self._recent = []
         else:
             self._recent = []
@@ -39,7 +42,7 @@ class RecentManager:
             with open(self.recent_file, 'w') as f:
                 json.dump({"recent": self._recent}, f, indent=2)
         except IOError as e:
-            print(f"[Cheeky] Error saving recent: {e}")
+            logger.error("Error saving recent: %s", e)
 
     async def get_all(self) -> List[Dict]:
         """Get all recently played stations"""
@@ -65,11 +68,11 @@ class RecentManager:
         self._recent = self._recent[:self.MAX_RECENT]
 
         self._save()
-        print(f"[Cheeky] Added to recent: {name}")
+        logger.debug("Added to recent: %s", name)
 
     async def clear(self) -> None:
         """Clear all recent history"""
         await asyncio.sleep(0)  # Make it async
         self._recent = []
         self._save()
-        print("[Cheeky] Recent history cleared")
+        logger.info("Recent history cleared")
@@ -0,0 +1,420 @@
+"""
+Stream Recorder - Tees the playing stream to disk without re-encoding
+Splits files on track changes, runs scheduled recordings and evicts old files
+"""
+
+import asyncio
+import json
+import re
+import uuid as uuid_lib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from backend.timeshift import TimeShiftSession
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+# File extension per stream content type (anything else is saved as .bin)
+EXTENSIONS = {
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/aac": "aac",
+    "audio/aacp": "aac",
+    "audio/x-aac": "aac",
+    "audio/ogg": "ogg",
+    "application/ogg": "ogg",
+    "audio/flac": "flac",
+}
+
+
+def _safe_name(text: str) -> str:
+    """Make a string usable as part of a file name"""
+    text = re.sub(r"[^\w\-. ]+", "", text or "").strip()
+    return re.sub(r"\s+", "_", text)[:60] or "untitled"
+
+
+def parse_start(start: str) -> datetime:
+    """Schedule start as naive local time; offsets ('Z', '+02:00') are converted to local"""
+    if start.endswith(("Z", "z")):
+        start = start[:-1] + "+00:00"  # fromisoformat only accepts 'Z' from Python 3.11
+    when = datetime.fromisoformat(start)
+    if when.tzinfo is not None:
+        when = when.astimezone().replace(tzinfo=None)
+    return when
+
+
+class _Recording:
+    """One active recording: a bounded queue drained to disk by a writer task"""
+
+    QUEUE_CHUNKS = 512  # ~8MB of backlog before chunks are dropped
+
+    def __init__(self, recorder, recording_id: str, session: TimeShiftSession,
+                 station_name: str, ends_at: Optional[datetime], owns_session: bool):
+        self.recorder = recorder
+        self.id = recording_id
+        self.session = session
+        self.station_name = station_name
+        self.ends_at = ends_at
+        self.owns_session = owns_session  # Scheduled recordings open their own connection
+        self.extension = EXTENSIONS.get(session.headers.get("content-type", "").split(";")[0], "bin")
+        self.started_at = datetime.now()
+        self.title = session.icy_title
+        self.files: List[str] = []
+        self.bytes_written = 0
+        self.dropped_chunks = 0
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_CHUNKS)
+        self._file = None
+        self._split_pending = False
+        self._task = asyncio.create_task(self._writer())
+
+    def on_audio(self, data: bytes) -> None:
+        """Listener called from the relay's fetch loop - must never block"""
+        if not data:
+            return
+        try:
+            self._queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.dropped_chunks += 1
+
+    def on_title(self, title: str) -> None:
+        """Relay title listener: start a new file at the next write when the track changes
+
+        The relay's in-band StreamTitle is aligned with the bytes we record; mpv's
+        polled title lags by the time-shift offset plus the poll interval.
+        """
+        if title and title != self.title:
+            self.title = title
+            self._split_pending = True
+
+    def _next_file(self) -> Optional[str]:
+        """Name of the file to rotate to before the next write, if any (loop thread)"""
+        if self._file is not None and not self._split_pending:
+            return None
+        self._split_pending = False
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        name = f"{_safe_name(self.station_name)}-{stamp}-{_safe_name(self.title)}.{self.extension}"
+        self.files.append(name)
+        logger.info("Recording to %s", name)
+        return name
+
+    def _write(self, data: bytes, new_file: Optional[str], in_use: Optional[set]) -> None:
+        """Blocking rotate/write/evict, run in the default executor
+
+        Only touches the file handle; which file and what is in use were decided
+        on the loop thread, which owns files, _split_pending and recorder.active.
+        """
+        if new_file:
+            if self._file:
+                self._file.close()
+            self._file = open(self.recorder.recordings_dir / new_file, "wb")
+        self._file.write(data)
+        if in_use is not None:
+            self.recorder._enforce_limit(in_use)
+
+    async def _writer(self):
+        """Drain the queue to disk off the event loop"""
+        loop = asyncio.get_event_loop()
+        unchecked = 0  # Bytes written since the last disk budget check
+        try:
+            while True:
+                data = await self._queue.get()
+                if data is None:
+                    break  # Stop marker from stop()
+
+                # Coalesce whatever else is queued into a single write
+                chunks = [data]
+                finished = False
+                while not self._queue.empty():
+                    chunk = self._queue.get_nowait()
+                    if chunk is None:
+                        finished = True
+                        break
+                    chunks.append(chunk)
+                data = b"".join(chunks)
+
+                new_file = self._next_file()
+                unchecked += len(data)
+                # Check the disk budget on every new file and every LIMIT_CHECK_BYTES
+                check = (new_file and len(self.files) > 1) or unchecked >= self.recorder.LIMIT_CHECK_BYTES
+                if check:
+                    unchecked = 0
+                in_use = self.recorder._in_use() if check else None
+
+                await loop.run_in_executor(None, self._write, data, new_file, in_use)
+                self.bytes_written += len(data)
+
+                if finished:
+                    break
+
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    async def stop(self):
+        """Detach from the relay and flush the current file"""
+        if self.on_audio in self.session.listeners:
+            self.session.listeners.remove(self.on_audio)
+        if self.on_title in self.session.title_listeners:
+            self.session.title_listeners.remove(self.on_title)
+
+        # Let queued audio reach the disk before closing
+        await self._queue.put(None)
+        await self._task
+
+        if self.owns_session:
+            await self.session.close()
+
+    def get_status(self) -> Dict:
+        """Snapshot for the API"""
+        return {
+            "id": self.id,
+            "station_name": self.station_name,
+            "title": self.title,
+            "started_at": self.started_at.isoformat(),
+            "ends_at": self.ends_at.isoformat() if self.ends_at else None,
+            "files": self.files,
+            "bytes_written": self.bytes_written,
+            "dropped_chunks": self.dropped_chunks,
+            "scheduled": self.owns_session,
+        }
+
+
+class StreamRecorder:
+    """Manages manual and scheduled recordings plus the recordings directory"""
+
+    LIMIT_CHECK_BYTES = 4 * 1024 * 1024  # Re-check disk usage every 4MB written
+
+    def __init__(self, config_dir: Path, recordings_dir: Optional[Path] = None, max_mb: int = 1024):
+        self.config_dir = Path(config_dir)
+        self.recordings_dir = Path(recordings_dir or self.config_dir / "recordings")
+        self.recordings_dir.mkdir(parents=True, exist_ok=True)
+        self.schedule_file = self.config_dir / "recordings.json"
+        self.max_bytes = max_mb * 1024 * 1024
+        self.active: Dict[str, _Recording] = {}
+        self._schedule: List[Dict] = []
+        self._scheduler_task = None
+        self._stopping: Set[asyncio.Task] = set()  # Stops started by a relay closing
+        self._load()
+
+    def _load(self):
+        """Load scheduled recordings from disk"""
+        if self.schedule_file.exists():
+            try:
+                with open(self.schedule_file, 'r') as f:
+                    data = json.load(f)
+                self._schedule = []
+                for entry in data.get("schedule", []):
+                    # Entries saved before offsets were normalized; drop ones that can't be read
+                    try:
+                        entry["start"] = parse_start(entry["start"]).isoformat()
+                    except (AttributeError, KeyError, ValueError) as e:
+                        logger.warning("Dropping scheduled recording with bad start: %s", e)
+                        continue
+                    self._schedule.append(entry)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.error("Error loading recording schedule: %s", e)
+                self._schedule = []
+        else:
+            self._schedule = []
+            self._save()
+
+    def _save(self):
+        """Save scheduled recordings to disk"""
+        try:
+            with open(self.schedule_file, 'w') as f:
+                json.dump({"schedule": self._schedule}, f, indent=2)
+        except IOError as e:
+            logger.error("Error saving recording schedule: %s", e)
+
+    def _in_use(self) -> set:
+        """Files active recordings are writing to (loop thread only)"""
+        return {r.files[-1] for r in self.active.values() if r.files}
+
+    def _enforce_limit(self, in_use: set) -> None:
+        """Delete the oldest finished recordings until under the disk budget (executor-safe)"""
+        files = sorted(
+            (p for p in self.recordings_dir.iterdir() if p.is_file()),
+            key=lambda p: p.stat().st_mtime
+        )
+        total = sum(p.stat().st_size for p in files)
+
+        for path in files:
+            if total <= self.max_bytes:
+                break
+            if path.name in in_use:
+                continue
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            total -= size
+            logger.info("Evicted old recording %s", path.name)
+
+    async def start(self, session: TimeShiftSession, station_name: str,
+                    duration_minutes: Optional[int] = None, recording_id: Optional[str] = None,
+                    owns_session: bool = False) -> Dict:
+        """Start teeing a relay session to disk"""
+        recording_id = recording_id or "manual"
+        if recording_id in self.active:
+            raise Exception("Recording already in progress")
+
+        ends_at = datetime.now() + timedelta(minutes=duration_minutes) if duration_minutes else None
+        recording = _Recording(self, recording_id, session, station_name, ends_at, owns_session)
+        session.listeners.append(recording.on_audio)
+        session.title_listeners.append(recording.on_title)
+        if self._on_session_closed not in session.close_listeners:
+            session.close_listeners.append(self._on_session_closed)
+        self.active[recording_id] = recording
+        self.start_scheduler()
+
+        logger.info("Recording started: %s", station_name)
+        return recording.get_status()
+
+    async def stop(self, recording_id: str = "manual") -> Optional[Dict]:
+        """Stop a recording and return its final status"""
+        recording = self.active.pop(recording_id, None)
+        if not recording:
+            return None
+        await recording.stop()
+        await asyncio.get_event_loop().run_in_executor(None, self._enforce_limit, self._in_use())
+        logger.info("Recording stopped: %s (%s bytes)", recording.station_name, recording.bytes_written)
+        return recording.get_status()
+
+    def _on_session_closed(self, session: TimeShiftSession) -> None:
+        """Relay close listener: stop its recordings now instead of at the next scheduler tick"""
+        task = asyncio.create_task(self.stop_for_session(session))
+        self._stopping.add(task)
+        task.add_done_callback(self._stopping.discard)
+
+    async def stop_for_session(self, session: TimeShiftSession) -> None:
+        """Stop recordings attached to a relay that is about to close"""
+        for recording_id, recording in list(self.active.items()):
+            if recording.session is session:
+                await self.stop(recording_id)
+
+    async def get_schedule(self) -> List[Dict]:
+        """Get scheduled recordings"""
+        await asyncio.sleep(0)  # Make it async
+        return self._schedule.copy()
+
+    async def add_schedule(self, station_uuid: str, station_name: str, stream_url: str,
+                           start: str, duration_minutes: int) -> Dict:
+        """Schedule a recording (start is an ISO timestamp in local time)"""
+        await asyncio.sleep(0)  # Make it async
+        start = parse_start(start).isoformat()  # Validate; compared with naive local now()
+
+        entry = {
+            "id": uuid_lib.uuid4().hex[:8],
+            "station_uuid": station_uuid,
+            "station_name": station_name,
+            "stream_url": stream_url,
+            "start": start,
+            "duration_minutes": duration_minutes
+        }
+        self._schedule.append(entry)
+        self._save()
+        self.start_scheduler()
+        logger.info("Scheduled recording of %s at %s", station_name, start)
+        return entry
+
+    async def remove_schedule(self, schedule_id: str) -> bool:
+        """Remove a scheduled recording"""
+        await asyncio.sleep(0)  # Make it async
+        original_len = len(self._schedule)
+        self._schedule = [s for s in self._schedule if s.get("id") != schedule_id]
+        if len(self._schedule) < original_len:
+            self._save()
+            return True
+        return False
+
+    def start_scheduler(self) -> None:
+        """Start the scheduler loop if there is anything to watch"""
+        if (self._schedule or self.active) and (self._scheduler_task is None or self._scheduler_task.done()):
+            self._scheduler_task = asyncio.create_task(self._run_scheduler())
+
+    async def _run_scheduler(self):
+        """Start due recordings and stop ones that reached their end time"""
+        while self._schedule or self.active:
+            try:
+                now = datetime.now()
+
+                for entry in list(self._schedule):
+                    if parse_start(entry["start"]) > now:
+                        continue
+                    self._schedule.remove(entry)
+                    self._save()
+
+                    # Nothing to tee from - open a relay just for this recording
+                    session = TimeShiftSession(entry["stream_url"], capacity=1024 * 1024)
+                    try:
+                        await session.start()
+                        await self.start(
+                            session, entry["station_name"], entry["duration_minutes"],
+                            recording_id=entry["id"], owns_session=True
+                        )
+                    except Exception as e:
+                        logger.warning("Scheduled recording of %s failed: %s", entry['station_name'], e)
+                        await session.close()
+
+                for recording_id, recording in list(self.active.items()):
+                    if recording.session.closed or (recording.ends_at and recording.ends_at <= now):
+                        await self.stop(recording_id)
+
+                await asyncio.sleep(10)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Recording scheduler error: %s", e)
+                await asyncio.sleep(10)
+
+    async def list_recordings(self) -> Dict:
+        """Recorded files, active recordings and disk usage"""
+        await asyncio.sleep(0)  # Make it async
+        files = []
+        for path in sorted(self.recordings_dir.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True):
+            if path.is_file():
+                stat = path.stat()
+                files.append({
+                    "filename": path.name,
+                    "size": stat.st_size,
+                    "modified": datetime.fromtimestamp(stat.st_mtime).isoformat()
+                })
+
+        return {
+            "recordings": files,
+            "active": [r.get_status() for r in self.active.values()],
+            "used_bytes": sum(f["size"] for f in files),
+            "max_bytes": self.max_bytes
+        }
+
+    def get_path(self, filename: str) -> Optional[Path]:
+        """Resolve a recording file name, refusing anything outside the directory"""
+        path = (self.recordings_dir / filename).resolve()
+        if path.parent != self.recordings_dir.resolve() or not path.is_file():
+            return None
+        return path
+
+    async def delete(self, filename: str) -> bool:
+        """Delete a recorded file"""
+        await asyncio.sleep(0)  # Make it async
+        path = self.get_path(filename)
+        if not path:
+            return False
+        path.unlink()
+        return True
+
+    async def close(self):
+        """Stop all recordings and the scheduler"""
+        if self._scheduler_task:
+            self._scheduler_task.cancel()
+            self._scheduler_task = None
+        for recording_id in list(self.active):
+            await self.stop(recording_id)
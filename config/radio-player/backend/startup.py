@@ -0,0 +1,78 @@
+"""
+Startup Helpers - Phase timing and lazily constructed subsystems
+Lets the server answer / and /health before the heavy managers are built
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Tuple
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class StartupTimer:
+    """Records how long each boot phase took"""
+
+    def __init__(self, started_at: float = None):
+        self.started_at = started_at or time.perf_counter()
+        self._last = self.started_at
+        self.phases: List[Tuple[str, float]] = []
+        self.reported = False
+
+    def mark(self, name: str) -> None:
+        """Close a phase that ran since the previous mark"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block as its own phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self.phases.append((name, now - start))
+            self._last = now
+
+    def report(self) -> None:
+        """Log every phase and the total time since process start"""
+        total = time.perf_counter() - self.started_at
+        logger.info("Startup timing:")
+        for name, duration in self.phases:
+            logger.info("  %-28s %8.1f ms", name, duration * 1000)
+        logger.info("  %-28s %8.1f ms", "total", total * 1000)
+        self.reported = True
+
+
+class LazySubsystem:
+    """Stand-in for a manager that is built (and its modules imported) on first use"""
+
+    def __init__(self, name: str, factory: Callable, timer: StartupTimer = None):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_timer", timer)
+        object.__setattr__(self, "_instance", None)
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def load(self):
+        """Build the subsystem now if it hasn't been already"""
+        if self._instance is None:
+            if self._timer:
+                with self._timer.phase(f"init {self._name}"):
+                    instance = self._factory()
+            else:
+                instance = self._factory()
+            object.__setattr__(self, "_instance", instance)
+        return self._instance
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self.load(), attr, value)
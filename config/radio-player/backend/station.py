@@ -0,0 +1,207 @@
+"""
+Station Record - Compact station model and streaming Radio Browser decoder
+Projects only the fields we use, one station at a time, as response bytes arrive.
+There is one canonical Station per uuid shared by the client cache; favorites keep
+their own snapshot so a Radio Browser refresh never rewrites what the user saved.
+"""
+
+import codecs
+import json
+import sys
+import weakref
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Canonical instance per uuid; entries vanish once no cache holds them
+_stations: "weakref.WeakValueDictionary[str, Station]" = weakref.WeakValueDictionary()
+
+
+def _intern(value) -> str:
+    """Intern a low-cardinality string (country, codec, tag...)"""
+    return sys.intern(value) if isinstance(value, str) and value else ""
+
+
+def _intern_tags(tags) -> Tuple[str, ...]:
+    """Tags as an interned tuple from a comma-separated string or a list"""
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return tuple(_intern(tag) for tag in tags or () if tag)
+
+
+class Station:
+    """One radio station, holding just the fields the player and UI use"""
+
+    __slots__ = ("uuid", "name", "url", "favicon", "country", "language", "tags", "bitrate", "codec",
+                 "__weakref__")
+
+    def __init__(self, uuid: str, name: str, url: str, favicon: str = "", country: str = "",
+                 language: str = "", tags: Tuple[str, ...] = (), bitrate: int = 0, codec: str = ""):
+        self.uuid = uuid
+        self.name = name
+        self.url = url
+        self.favicon = favicon
+        self.country = country
+        self.language = language
+        self.tags = tags
+        self.bitrate = bitrate
+        self.codec = codec
+
+    @classmethod
+    def canonical(cls, uuid: str, name: str, url: str, favicon: Optional[str], country: Optional[str],
+                  language: Optional[str], tags, bitrate: Optional[int], codec: Optional[str],
+                  refresh: bool = True) -> "Station":
+        """The shared Station for a uuid; refresh=False only fills in fields it is missing"""
+        station = _stations.get(uuid) if uuid else None
+        fields = cls._fields(name, url, favicon, country, language, tags, bitrate, codec)
+        if station is None:
+            station = cls(uuid, **fields)
+            if uuid:
+                _stations[uuid] = station
+        elif refresh:
+            for field, value in fields.items():
+                setattr(station, field, value)
+        else:
+            # Client payloads may be partial or stale; only Radio Browser refreshes
+            for field, value in fields.items():
+                current = getattr(station, field)
+                if value and (not current or (field == "name" and current == "Unknown")):
+                    setattr(station, field, value)
+        return station
+
+    @staticmethod
+    def _fields(name, url, favicon, country, language, tags, bitrate, codec) -> Dict:
+        """Normalised field values, with low-cardinality strings interned"""
+        return {
+            "name": name or "Unknown",
+            "url": url or "",
+            "favicon": favicon or "",
+            "country": _intern(country),
+            "language": _intern(language),
+            "tags": _intern_tags(tags),
+            "bitrate": bitrate or 0,
+            "codec": _intern(codec),
+        }
+
+    @classmethod
+    def from_api(cls, raw: Dict) -> "Station":
+        """Project a Radio Browser station object"""
+        return cls.canonical(
+            uuid=raw.get("stationuuid", ""),
+            name=raw.get("name"),
+            url=raw.get("url_resolved") or raw.get("url"),
+            favicon=raw.get("favicon"),
+            country=raw.get("country"),
+            language=raw.get("language"),
+            tags=raw.get("tags"),
+            bitrate=raw.get("bitrate"),
+            codec=raw.get("codec"),
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Station":
+        """Station from our own JSON format (favorites, API requests)"""
+        return cls.canonical(
+            uuid=data.get("uuid", ""),
+            name=data.get("name"),
+            url=data.get("url"),
+            favicon=data.get("favicon"),
+            country=data.get("country"),
+            language=data.get("language"),
+            tags=data.get("tags"),
+            bitrate=data.get("bitrate"),
+            codec=data.get("codec"),
+            refresh=False,
+        )
+
+    @classmethod
+    def snapshot(cls, data: Dict) -> "Station":
+        """Unshared Station from our JSON format; canonical refreshes never touch it"""
+        return cls(data.get("uuid", ""), **cls._fields(
+            data.get("name"), data.get("url"), data.get("favicon"), data.get("country"),
+            data.get("language"), data.get("tags"), data.get("bitrate"), data.get("codec"),
+        ))
+
+    def to_dict(self) -> Dict:
+        """The station in the API's JSON format"""
+        return {
+            "uuid": self.uuid,
+            "name": self.name,
+            "url": self.url,
+            "favicon": self.favicon,
+            "country": self.country,
+            "language": self.language,
+            "tags": list(self.tags),
+            "bitrate": self.bitrate,
+            "codec": self.codec,
+        }
+
+
+class StationStreamDecoder:
+    """
+    Incremental decoder for a JSON array of Radio Browser station objects
+    Feed it response chunks; each complete object is decoded on its own and
+    projected into a Station straight away, so the full list of upstream dicts
+    never exists at once.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self.done = False
+        self.peak_buffer = 0  # Largest amount of undecoded text held, in characters
+
+    def feed(self, chunk: bytes) -> Iterator[Station]:
+        """Decode whatever complete stations the new bytes finish"""
+        self._buffer = self._buffer[self._pos:] + self._text.decode(chunk)
+        self._pos = 0
+        self.peak_buffer = max(self.peak_buffer, len(self._buffer))
+
+        buffer = self._buffer
+        while not self.done:
+            pos = self._skip(buffer, self._pos)
+            if pos >= len(buffer):
+                break
+
+            if not self._started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array of stations")
+                self._started = True
+                self._pos = pos + 1
+                continue
+
+            if buffer[pos] == "]":
+                self.done = True
+                self._pos = pos + 1
+                break
+
+            try:
+                raw, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Object not complete yet, wait for more bytes
+
+            self._pos = end
+            if isinstance(raw, dict):
+                yield Station.from_api(raw)
+
+    def close(self) -> None:
+        """Check the array was terminated"""
+        if not self.done:
+            raise ValueError("Truncated station list")
+
+    @staticmethod
+    def _skip(buffer: str, pos: int) -> int:
+        """Skip whitespace and the commas between array elements"""
+        length = len(buffer)
+        while pos < length and buffer[pos] in " \t\r\n,":
+            pos += 1
+        return pos
+
+
+def decode_stations(data: bytes) -> List[Station]:
+    """Decode a complete response body"""
+    decoder = StationStreamDecoder()
+    stations = list(decoder.feed(data))
+    decoder.close()
+    return stations
@@ -4,10 +4,41 @@ Radio Browser API Client - Fetches station data from Radio Browser
 
 import aiohttp
 import asyncio
+import base64
+import json
 import socket
-from typing import Optional, List, Dict
+import ssl
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timedelta
 
+from backend.metrics import CACHE_REQUESTS, UPSTREAM_SECONDS
+from backend.station import Station, StationStreamDecoder
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def encode_cursor(offset: int, limit: int) -> str:
+    """Opaque page cursor for listing endpoints"""
+    raw = json.dumps({"o": offset, "l": limit}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """(offset, limit) from a page cursor; raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        offset, limit = int(data["o"]), int(data["l"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if offset < 0 or not 1 <= limit <= 100:
+        raise ValueError("Invalid cursor")
+    return offset, limit
+
+
 class StationsClient:
     """Client for Radio Browser API"""
 
@@ -23,90 +54,269 @@ class StationsClient:
     # User-Agent for API requests (required by Radio Browser)
     USER_AGENT = "CheekyRadio/1.1.0"
 
-    def __init__(self):
+    # Listings are fetched upstream in batches this large and sliced into pages locally
+    BATCH_SIZE = 100
+    # Most uuids sent in one byuuid request (keeps the query string well under URL limits)
+    BYUUID_CHUNK = 50
+    # Cached listing batches plus station:{uuid} entries; least recently used go first
+    CACHE_MAX_ENTRIES = 4000
+
+    def __init__(self, limit_per_host: int = 4, dns_ttl: int = 300, keepalive: float = 60.0,
+                 servers: Optional[List[str]] = None):
         self.session: Optional[aiohttp.ClientSession] = None
-        self.cache = {}
+        if servers:
+            self.API_SERVERS = [server.rstrip("/") for server in servers]
+        # Connection pool tuning: a few warm keep-alive connections to the sticky mirror
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self.connection_stats = {"requests": 0, "created": 0, "reused": 0, "dns_cache_hits": 0, "dns_lookups": 0}
+        # LRU of key -> (data, cached at), oldest first; expired entries are swept every cache_ttl
+        self.cache: "OrderedDict[str, Tuple[object, datetime]]" = OrderedDict()
         self.cache_ttl = 300  # 5 minutes
+        self.cache_evictions = 0
+        self._cache_swept = datetime.now()
+        self._batch_tasks: Dict[str, asyncio.Task] = {}
+        self._station_tasks: Dict[str, asyncio.Task] = {}
+        # Lookup micro-batching: uuids missed within batch_window share one byuuid call
+        self.batch_window = 0.005
+        self._batch_queue: List[str] = []
+        self._batch_task: Optional[asyncio.Task] = None
+        self.lookup_stats = {"lookups": 0, "cache_hits": 0, "joined": 0, "upstream_calls": 0}
+        self.decode_stats = {"responses": 0, "stations": 0, "peak_buffer_chars": 0}
         self.current_server_index = 0
-        print(f"[Cheeky] Stations client initialized. Using {len(self.API_SERVERS)} radio browser servers")
+        logger.info("Stations client initialized. Using %s radio browser servers", len(self.API_SERVERS))
 
     def _get_next_server(self) -> str:
-        """Get next API server URL and rotate index"""
-        url = self.API_SERVERS[self.current_server_index % len(self.API_SERVERS)]
-        self.current_server_index += 1
-        return url
+        """Get the current API server (sticky while healthy, so connections are reused)"""
+        return self.API_SERVERS[self.current_server_index % len(self.API_SERVERS)]
+
+    def _server_failed(self, server: str) -> None:
+        """Move on to the next server, unless a concurrent request already did"""
+        if self._get_next_server() == server:
+            self.current_server_index += 1
+            logger.warning("Switching Radio Browser server to %s", self._get_next_server())
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Count new vs reused connections and DNS cache hits"""
+        trace = aiohttp.TraceConfig()
+        stats = self.connection_stats
+
+        async def on_create(session, ctx, params):
+            stats["created"] += 1
+
+        async def on_reuse(session, ctx, params):
+            stats["reused"] += 1
+
+        async def on_dns_hit(session, ctx, params):
+            stats["dns_cache_hits"] += 1
+
+        async def on_dns_start(session, ctx, params):
+            stats["dns_lookups"] += 1
+
+        trace.on_connection_create_end.append(on_create)
+        trace.on_connection_reuseconn.append(on_reuse)
+        trace.on_dns_cache_hit.append(on_dns_hit)
+        trace.on_dns_resolvehost_start.append(on_dns_start)
+        return trace
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session"""
         if self.session is None:
-            self.session = aiohttp.ClientSession()
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive,
+                ssl=ssl.create_default_context(),  # One context for every TLS connection
+                enable_cleanup_closed=True
+            )
+            self.session = aiohttp.ClientSession(connector=connector, trace_configs=[self._trace_config()])
         return self.session
 
     async def _cache_get(self, key: str) -> Optional[Dict]:
         """Get cached result if still valid"""
+        cache_name = key.split(":", 1)[0]
         if key in self.cache:
             data, timestamp = self.cache[key]
             if datetime.now() - timestamp < timedelta(seconds=self.cache_ttl):
+                CACHE_REQUESTS.inc(cache=cache_name, result="hit")
+                self.cache.move_to_end(key)
                 return data
             else:
                 del self.cache[key]
+        CACHE_REQUESTS.inc(cache=cache_name, result="miss")
         return None
 
     async def _cache_set(self, key: str, data: Dict) -> None:
-        """Cache a result with timestamp"""
-        self.cache[key] = (data, datetime.now())
-
-    async def search(
-        self,
-        query: str,
-        limit: int = 20,
-        offset: int = 0
-    ) -> Dict:
-        """Search stations by name, genre, or country"""
-        cache_key = f"search:{query}:{limit}:{offset}"
-        cached = await self._cache_get(cache_key)
-        if cached:
-            return cached
-
+        """Cache a result with timestamp, evicting expired and least recently used entries"""
+        now = datetime.now()
+        self.cache[key] = (data, now)
+        self.cache.move_to_end(key)
+
+        if now - self._cache_swept >= timedelta(seconds=self.cache_ttl):
+            # Keys that are never read again would otherwise sit here until evicted
+            self._cache_swept = now
+            expired = [k for k, (_, cached_at) in self.cache.items()
+                       if now - cached_at >= timedelta(seconds=self.cache_ttl)]
+            for k in expired:
+                del self.cache[k]
+            self.cache_evictions += len(expired)
+
+        while len(self.cache) > self.CACHE_MAX_ENTRIES:
+            self.cache.popitem(last=False)
+            self.cache_evictions += 1
+
+    async def _read_stations(self, resp: aiohttp.ClientResponse) -> List[Station]:
+        """Stream-decode a station list, projecting each object as soon as it is complete"""
+        decoder = StationStreamDecoder()
+        stations = []
+        async for chunk in resp.content.iter_chunked(16 * 1024):
+            stations.extend(decoder.feed(chunk))
+        decoder.close()
+
+        self.decode_stats["responses"] += 1
+        self.decode_stats["stations"] += len(stations)
+        self.decode_stats["peak_buffer_chars"] = max(self.decode_stats["peak_buffer_chars"], decoder.peak_buffer)
+        return stations
+
+    async def _fetch_stations(self, path: str, params: Dict, label: str) -> Optional[List[Station]]:
+        """GET a Radio Browser station list, moving through the servers until one succeeds"""
         session = await self._get_session()
         headers = {"User-Agent": self.USER_AGENT}
 
-        # Try each server in rotation until one succeeds
         for attempt in range(len(self.API_SERVERS)):
             try:
                 server = self._get_next_server()
-                url = f"{server}/json/stations/search"
-                params = {
-                    "name": query,
-                    "limit": limit,
-                    "offset": offset,
-                    "hidebroken": "true"
-                }
-
-                print(f"[Cheeky] Searching for '{query}' from {server}")
+                url = f"{server}{path}"
+                self.connection_stats["requests"] += 1
+                started = time.perf_counter()
+
                 async with session.get(url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
                     if resp.status == 200:
-                        stations = await resp.json()
-                        print(f"[Cheeky] Got {len(stations)} results for '{query}'")
-                        result = {
-                            "stations": self._normalize_stations(stations),
-                            "total": len(stations)
-                        }
-                        await self._cache_set(cache_key, result)
-                        return result
+                        stations = await self._read_stations(resp)
+                        UPSTREAM_SECONDS.observe(time.perf_counter() - started, server=server, status="200")
+                        return stations
                     else:
-                        print(f"[Cheeky] Search API error {resp.status} from {server}, trying next...")
+                        UPSTREAM_SECONDS.observe(time.perf_counter() - started, server=server, status=str(resp.status))
+                        logger.warning("%s API error %s from %s, trying next...", label, resp.status, server)
+                        self._server_failed(server)
                         continue
 
             except asyncio.TimeoutError:
-                print(f"[Cheeky] Search timeout from {server}, trying next...")
+                UPSTREAM_SECONDS.observe(time.perf_counter() - started, server=server, status="timeout")
+                logger.warning("%s timeout from %s, trying next...", label, server)
+                self._server_failed(server)
                 continue
             except Exception as e:
-                print(f"[Cheeky] Search error from {server}: {type(e).__name__}: {e}")
+                UPSTREAM_SECONDS.observe(time.perf_counter() - started, server=server, status="error")
+                logger.warning("%s error from %s: %s: %s", label, server, type(e).__name__, e)
+                self._server_failed(server)
                 continue
 
-        print(f"[Cheeky] Search failed on all servers for '{query}'")
-        return {"stations": [], "total": 0}
+        logger.error("%s failed on all servers", label)
+        return None
+
+    async def _load_batch(self, key: str, path: str, params: Dict, index: int, label: str) -> Optional[List[Station]]:
+        """Fetch one BATCH_SIZE slice of a listing from upstream and cache it"""
+        params = dict(params, limit=self.BATCH_SIZE, offset=index * self.BATCH_SIZE, hidebroken="true")
+        batch = await self._fetch_stations(path, params, label)
+        if batch is None:
+            return None
+
+        for station in batch:
+            await self._cache_set(f"station:{station.uuid}", station)
+        logger.debug("%s: cached %s stations (batch %s)", label, len(batch), index)
+        # An empty first batch is usually a flaky mirror, so don't pin it for cache_ttl
+        if batch or index > 0:
+            await self._cache_set(key, batch)
+        return batch
+
+    def _fetch_batch(self, listing: str, path: str, params: Dict, index: int, label: str) -> asyncio.Task:
+        """Start (or join) the upstream fetch of one batch"""
+        key = f"{listing}:batch:{index}"
+        task = self._batch_tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load_batch(key, path, params, index, label))
+            self._batch_tasks[key] = task
+            task.add_done_callback(lambda _: self._batch_tasks.pop(key, None))
+        return task
+
+    async def _get_batch(self, listing: str, path: str, params: Dict, index: int, label: str) -> Optional[List[Station]]:
+        """One batch of a listing, from cache or upstream"""
+        cached = await self._cache_get(f"{listing}:batch:{index}")
+        if cached is not None:
+            return cached
+        return await asyncio.shield(self._fetch_batch(listing, path, params, index, label))
+
+    async def _paginate(self, listing: str, path: str, params: Dict, limit: int, offset: int, label: str) -> Dict:
+        """
+        Serve a page sliced out of cached upstream batches
+        Totals are exact once the last batch has been seen, otherwise a lower bound.
+        """
+        size = self.BATCH_SIZE
+        first = offset // size
+        last = (offset + limit - 1) // size
+
+        stations: List[Station] = []
+        total = None  # Exact total, once known
+        for index in range(first, last + 1):
+            batch = await self._get_batch(listing, path, params, index, label)
+            if batch is None:
+                if index == first:
+                    return {"stations": [], "total": 0, "total_exact": False, "offset": offset,
+                            "limit": limit, "has_more": False, "next_cursor": None, "prev_cursor": None}
+                break
+            stations.extend(batch)
+            if len(batch) < size:
+                total = index * size + len(batch)
+                break
+
+        # Batches already prefetched further ahead tighten the estimate
+        known, index = (last + 1) * size, last + 1
+        while total is None:
+            batch = await self._cache_get(f"{listing}:batch:{index}")
+            if batch is None:
+                break
+            known = index * size + len(batch)
+            if len(batch) < size:
+                total = known
+            index += 1
+
+        start = offset - first * size
+        page = stations[start:start + limit]
+
+        # Fetch the next batch in the background when the following page would need it
+        next_end = offset + 2 * limit
+        if total is None and next_end > index * size:
+            self._fetch_batch(listing, path, params, index, label)
+
+        if total is None:
+            count, has_more = known, True
+        else:
+            count, has_more = total, offset + len(page) < total
+
+        return {
+            "stations": [station.to_dict() for station in page],
+            "total": count,
+            "total_exact": total is not None,
+            "offset": offset,
+            "limit": limit,
+            "has_more": has_more,
+            "next_cursor": encode_cursor(offset + limit, limit) if has_more else None,
+            "prev_cursor": encode_cursor(max(0, offset - limit), limit) if offset > 0 else None,
+        }
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Dict:
+        """Search stations by name, genre, or country"""
+        logger.debug("Searching for '%s' (offset %s)", query, offset)
+        return await self._paginate(
+            f"search:{query}", "/json/stations/search", {"name": query}, limit, offset, "Search"
+        )
 
     async def browse(
         self,
@@ -117,55 +327,17 @@ class StationsClient:
         offset: int = 0
     ) -> Dict:
         """Browse stations by category"""
-        cache_key = f"browse:{genre}:{country}:{language}:{limit}:{offset}"
-        cached = await self._cache_get(cache_key)
-        if cached:
-            return cached
-
-        session = await self._get_session()
-        headers = {"User-Agent": self.USER_AGENT}
-
-        # Try each server in rotation until one succeeds
-        for attempt in range(len(self.API_SERVERS)):
-            try:
-                server = self._get_next_server()
-                url = f"{server}/json/stations/search"
-
-                params = {
-                    "limit": limit,
-                    "offset": offset,
-                    "hidebroken": "true"
-                }
-
-                if genre:
-                    params["tag"] = genre
-                if country:
-                    params["country"] = country
-                if language:
-                    params["language"] = language
-
-                async with session.get(url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    if resp.status == 200:
-                        stations = await resp.json()
-                        result = {
-                            "stations": self._normalize_stations(stations),
-                            "total": len(stations)
-                        }
-                        await self._cache_set(cache_key, result)
-                        return result
-                    else:
-                        print(f"[Cheeky] Browse API error {resp.status} from {server}, trying next...")
-                        continue
-
-            except asyncio.TimeoutError:
-                print(f"[Cheeky] Browse timeout from {server}, trying next...")
-                continue
-            except Exception as e:
-                print(f"[Cheeky] Browse error from {server}: {type(e).__name__}: {e}")
-                continue
-
-        print(f"[Cheeky] Browse failed on all servers")
-        return {"stations": [], "total": 0}
+        params = {}
+        if genre:
+            params["tag"] = genre
+        if country:
+            params["country"] = country
+        if language:
+            params["language"] = language
+
+        return await self._paginate(
+            f"browse:{genre}:{country}:{language}", "/json/stations/search", params, limit, offset, "Browse"
+        )
 
     async def popular(
         self,
@@ -173,103 +345,97 @@ class StationsClient:
         offset: int = 0
     ) -> Dict:
         """Get popular/top-rated stations"""
-        cache_key = f"popular:{limit}:{offset}"
-        cached = await self._cache_get(cache_key)
-        if cached and cached.get("stations"):  # Only use cache if it has stations
-            return cached
-
-        session = await self._get_session()
-        headers = {"User-Agent": self.USER_AGENT}
-
-        # Try each server in rotation until one succeeds
-        for attempt in range(len(self.API_SERVERS)):
-            try:
-                server = self._get_next_server()
-                url = f"{server}/json/stations/topclick"
-
-                params = {
-                    "limit": limit,
-                    "offset": offset,
-                    "hidebroken": "true"
-                }
-
-                print(f"[Cheeky] Fetching popular stations from {server}")
-                async with session.get(url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    if resp.status == 200:
-                        stations = await resp.json()
-                        print(f"[Cheeky] Got {len(stations)} popular stations from {server}")
-                        result = {
-                            "stations": self._normalize_stations(stations),
-                            "total": len(stations)
-                        }
-                        if result["stations"]:  # Only cache if we got results
-                            await self._cache_set(cache_key, result)
-                        return result
-                    else:
-                        print(f"[Cheeky] Popular API error {resp.status} from {server}, trying next...")
-                        continue
+        return await self._paginate(
+            "popular", "/json/stations/topclick", {}, limit, offset, "Popular"
+        )
+
+    async def _load_stations(self, uuids: List[str]) -> Dict[str, Station]:
+        """Fetch up to BYUUID_CHUNK stations in one byuuid call and cache each"""
+        self.lookup_stats["upstream_calls"] += 1
+        stations = await self._fetch_stations("/json/stations/byuuid", {"uuids": ",".join(uuids)}, "Get station")
+        if stations is None:
+            logger.warning("Get station failed for %s uuid(s)", len(uuids))
+            return {}
+
+        found = {}
+        for station in stations:
+            found[station.uuid] = station
+            await self._cache_set(f"station:{station.uuid}", station)
+        return found
+
+    async def _flush_lookups(self) -> Dict[str, Station]:
+        """Wait out the batching window, then fetch every queued uuid"""
+        await asyncio.sleep(self.batch_window)
+        uuids = self._batch_queue
+        self._batch_queue = []
+        self._batch_task = None  # Lookups from here on open a new window
+
+        chunks = [uuids[i:i + self.BYUUID_CHUNK] for i in range(0, len(uuids), self.BYUUID_CHUNK)]
+        found = {}
+        for part in await asyncio.gather(*(self._load_stations(chunk) for chunk in chunks)):
+            found.update(part)
+        return found
+
+    def _queue_lookup(self, uuid: str) -> asyncio.Task:
+        """Add a uuid to the current batching window, opening one if needed"""
+        if self._batch_task is None:
+            self._batch_task = asyncio.create_task(self._flush_lookups())
+            self._batch_task.add_done_callback(self._forget_station_task)
+        self._batch_queue.append(uuid)
+        self._station_tasks[uuid] = self._batch_task
+        return self._batch_task
+
+    def _forget_station_task(self, task: asyncio.Task) -> None:
+        """Drop a finished batch from the in-flight table"""
+        for uuid in [u for u, t in self._station_tasks.items() if t is task]:
+            del self._station_tasks[uuid]
+
+    async def get_stations(self, uuids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Look up many stations at once
+        Cached stations are answered locally, uuids already in flight are joined,
+        and the rest are queued for a few milliseconds so lookups from concurrent
+        callers go upstream together in bulk byuuid calls.
+        """
+        uuids = list(dict.fromkeys(u for u in uuids if u))
+        found: Dict[str, Optional[Station]] = {}
+        pending: Dict[str, asyncio.Task] = {}
+
+        for uuid in uuids:
+            self.lookup_stats["lookups"] += 1
+            cached = await self._cache_get(f"station:{uuid}")
+            if cached is not None:
+                self.lookup_stats["cache_hits"] += 1
+                found[uuid] = cached
+            elif uuid in self._station_tasks:
+                self.lookup_stats["joined"] += 1
+                pending[uuid] = self._station_tasks[uuid]
+            else:
+                pending[uuid] = self._queue_lookup(uuid)
 
-            except asyncio.TimeoutError:
-                print(f"[Cheeky] Popular timeout from {server}, trying next...")
-                continue
-            except Exception as e:
-                print(f"[Cheeky] Popular stations error from {server}: {type(e).__name__}: {e}")
-                continue
+        for uuid, task in pending.items():
+            found[uuid] = (await asyncio.shield(task)).get(uuid)
 
-        print(f"[Cheeky] Popular stations failed on all servers")
-        return {"stations": [], "total": 0}
+        return {uuid: found[uuid].to_dict() if found.get(uuid) else None for uuid in uuids}
 
     async def get_station(self, uuid: str) -> Optional[Dict]:
         """Get detailed station information"""
-        session = await self._get_session()
-        headers = {"User-Agent": self.USER_AGENT}
+        return (await self.get_stations([uuid])).get(uuid)
 
-        # Try each server in rotation until one succeeds
-        for attempt in range(len(self.API_SERVERS)):
-            try:
-                server = self._get_next_server()
-                url = f"{server}/json/stations/byuuid"
-
-                params = {"uuids": uuid}
-
-                async with session.get(url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    if resp.status == 200:
-                        stations = await resp.json()
-                        if stations:
-                            return self._normalize_station(stations[0])
-                        return None
-                    else:
-                        print(f"[Cheeky] Get station API error {resp.status} from {server}, trying next...")
-                        continue
-
-            except asyncio.TimeoutError:
-                print(f"[Cheeky] Get station timeout from {server}, trying next...")
-                continue
-            except Exception as e:
-                print(f"[Cheeky] Get station error from {server}: {type(e).__name__}: {e}")
-                continue
-
-        print(f"[Cheeky] Get station failed on all servers for uuid: {uuid}")
-        return None
-
-    def _normalize_station(self, station: Dict) -> Dict:
-        """Normalize station data to our format"""
+    def get_stats(self) -> Dict:
+        """Cache, lookup batching, connection reuse and decoder counters"""
+        connections = dict(self.connection_stats)
+        requests = connections["requests"]
+        connections["new_per_request"] = round(connections["created"] / requests, 2) if requests else None
         return {
-            "uuid": station.get("stationuuid", ""),
-            "name": station.get("name", "Unknown"),
-            "url": station.get("url_resolved", station.get("url", "")),
-            "favicon": station.get("favicon", ""),
-            "country": station.get("country", ""),
-            "language": station.get("language", ""),
-            "tags": station.get("tags", "").split(",") if station.get("tags") else [],
-            "bitrate": station.get("bitrate", 0),
-            "codec": station.get("codec", ""),
+            "server": self._get_next_server(),
+            "cache_entries": len(self.cache),
+            "cache_evictions": self.cache_evictions,
+            "lookups": dict(self.lookup_stats),
+            "connections": connections,
+            "decode": dict(self.decode_stats),
         }
 
-    def _normalize_stations(self, stations: List[Dict]) -> List[Dict]:
-        """Normalize multiple stations"""
-        return [self._normalize_station(s) for s in stations]
-
     async def close(self):
         """Close the aiohttp session"""
         if self.session:
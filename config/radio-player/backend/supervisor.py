@@ -0,0 +1,341 @@
+"""
+Process Supervisor - Owns the long-running children (mpv, ffmpeg, raop_play)
+Spawns them with asyncio so nothing waits on the event loop, watches each one
+for exit, restarts crashed children with backoff and samples their CPU and RSS
+"""
+
+import asyncio
+import os
+import resource
+import signal
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Union
+
+from backend.metrics import REGISTRY, track_subprocess
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = resource.getpagesize()
+
+PROCESS_CPU_SECONDS = REGISTRY.counter(
+    "cheeky_process_cpu_seconds_total", "CPU time used by supervised children", ("name",))
+PROCESS_RSS_BYTES = REGISTRY.gauge(
+    "cheeky_process_rss_bytes", "Resident memory of the running supervised child", ("name",))
+PROCESS_EXITS = REGISTRY.counter(
+    "cheeky_process_exits_total", "Supervised child exits by reason", ("name", "reason"))
+
+
+def read_usage(pid: int) -> Optional[tuple]:
+    """(CPU seconds, resident bytes) of a process from /proc, None once it is gone"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss = int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS, rss  # utime + stime
+
+
+class RestartPolicy:
+    """When to restart a child and how long to wait before each attempt"""
+
+    def __init__(self, when: str = "never", max_restarts: int = 5, backoff: float = 1.0,
+                 max_backoff: float = 30.0, stable_after: float = 60.0):
+        self.when = when                  # "never", "on-failure" (non-zero exit) or "always"
+        self.max_restarts = max_restarts  # Consecutive restarts before giving up
+        self.backoff = backoff            # First delay, doubled on every consecutive restart
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after  # A run this long resets the restart count
+
+    def should_restart(self, returncode: int) -> bool:
+        if self.when == "always":
+            return True
+        return self.when == "on-failure" and returncode != 0
+
+    def delay(self, attempt: int) -> float:
+        return min(self.backoff * 2 ** attempt, self.max_backoff)
+
+
+NEVER = RestartPolicy()
+
+
+class ManagedProcess:
+    """A supervised child; survives restarts, so callers can keep one reference"""
+
+    def __init__(self, supervisor: "ProcessSupervisor", name: str,
+                 argv: Union[List[str], Callable[[int], List[str]]], policy: RestartPolicy,
+                 on_exit: Optional[Callable[["ManagedProcess"], None]], popen_kwargs: Dict):
+        self.supervisor = supervisor
+        self.name = name
+        self.argv = argv  # Or argv(attempt) -> list, rebuilt for every restart
+        self.policy = policy
+        self.on_exit = on_exit
+        self.popen_kwargs = popen_kwargs
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.state = "starting"  # starting, running, restarting, stopped, exited, failed
+        self.attempt = 0         # Restarts since the last stable run
+        self.restarts = 0        # Restarts over the child's whole life
+        self.returncode: Optional[int] = None
+        self.started_at = 0.0
+        self.cpu_seconds = 0.0   # Current run, from the latest sample
+        self.cpu_percent = 0.0   # Between the latest two samples
+        self.rss = 0
+        self.max_rss = 0
+        self._sampled_at = 0.0
+        self._stopping = False
+        self._watcher: Optional[asyncio.Task] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def stdin(self) -> Optional[asyncio.StreamWriter]:
+        return self.process.stdin if self.alive else None
+
+    @property
+    def stdout(self) -> Optional[asyncio.StreamReader]:
+        return self.process.stdout if self.process else None
+
+    def _command(self) -> List[str]:
+        return self.argv(self.attempt) if callable(self.argv) else self.argv
+
+    async def _spawn(self) -> None:
+        with track_subprocess(self.name):
+            self.process = await asyncio.create_subprocess_exec(*self._command(), **self.popen_kwargs)
+        self.returncode = None
+        self.started_at = self._sampled_at = time.monotonic()
+        self.cpu_seconds = self.cpu_percent = 0.0
+        self.rss = 0
+        self._set_state("running")
+        self._watcher = asyncio.create_task(self._watch(self.process))
+
+    async def _watch(self, process: asyncio.subprocess.Process) -> None:
+        """Wait for this run to end, then restart or report the exit"""
+        returncode = await process.wait()
+        if process is not self.process:
+            return
+        self.returncode = returncode
+        ran_for = time.monotonic() - self.started_at
+        self.supervisor._finish_run(self, ran_for)
+
+        if self._stopping:
+            PROCESS_EXITS.inc(name=self.name, reason="stopped")
+            self._set_state("stopped")
+            return
+
+        reason = "exit" if returncode == 0 else "crash"
+        PROCESS_EXITS.inc(name=self.name, reason=reason)
+        logger.warning("%s (pid %s) exited with %s after %.0fs", self.name, process.pid, returncode, ran_for)
+
+        if ran_for >= self.policy.stable_after:
+            self.attempt = 0
+        if not self.policy.should_restart(returncode):
+            self._set_state("exited")
+            self._notify_exit()
+            return
+        if self.attempt >= self.policy.max_restarts:
+            logger.error("%s keeps exiting, giving up after %s restarts", self.name, self.attempt)
+            self._set_state("failed")
+            self._notify_exit()
+            return
+
+        delay = self.policy.delay(self.attempt)
+        self.attempt += 1
+        self.restarts += 1
+        self._set_state("restarting")
+        logger.info("Restarting %s in %.1fs (attempt %s)", self.name, delay, self.attempt)
+        await asyncio.sleep(delay)
+        if self._stopping:
+            self._set_state("stopped")
+            return
+        try:
+            await self._spawn()
+        except Exception as e:
+            logger.error("Restart of %s failed: %s", self.name, e)
+            self._set_state("failed")
+            self._notify_exit()
+
+    def _notify_exit(self) -> None:
+        """Tell the owner the child is gone for good"""
+        if self.on_exit:
+            try:
+                self.on_exit(self)
+            except Exception as e:
+                logger.error("Error in %s exit callback: %s", self.name, e)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        self.supervisor._publish(self)
+
+    def sample(self) -> None:
+        """Refresh CPU and RSS from /proc"""
+        if not self.alive:
+            return
+        usage = read_usage(self.process.pid)
+        if usage is None:
+            return
+        cpu, rss = usage
+        now = time.monotonic()
+        if now > self._sampled_at:
+            self.cpu_percent = max(0.0, cpu - self.cpu_seconds) * 100 / (now - self._sampled_at)
+        PROCESS_CPU_SECONDS.inc(max(0.0, cpu - self.cpu_seconds), name=self.name)
+        PROCESS_RSS_BYTES.set(rss, name=self.name)
+        self.cpu_seconds, self.rss, self._sampled_at = cpu, rss, now
+        self.max_rss = max(self.max_rss, rss)
+
+    def write(self, data: bytes) -> bool:
+        """Queue bytes on the child's stdin without blocking; False if it isn't running"""
+        stdin = self.stdin
+        if stdin is None or stdin.is_closing():
+            return False
+        stdin.write(data)
+        return True
+
+    def terminate(self) -> None:
+        """SIGTERM without waiting; the exit watcher reaps it"""
+        self._stopping = True
+        if self.alive:
+            try:
+                self.process.send_signal(signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    async def stop(self, timeout: float = 3.0) -> None:
+        """SIGTERM, then SIGKILL after `timeout`; never blocks the loop"""
+        self._stopping = True
+        if self._watcher and self.state == "restarting":
+            self._watcher.cancel()  # Still in its backoff sleep
+        if self.alive:
+            self.sample()  # Last look at its usage before it is reaped
+            try:
+                self.process.send_signal(signal.SIGTERM)
+                await asyncio.wait_for(self.process.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("%s (pid %s) ignored SIGTERM, killing", self.name, self.process.pid)
+                self.kill()
+                await self.process.wait()
+            except ProcessLookupError:
+                pass
+        if self._watcher:
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+        if self.state not in ("stopped", "exited", "failed"):
+            self._set_state("stopped")
+
+    def kill(self) -> None:
+        """SIGKILL without waiting (for synchronous cleanup paths)"""
+        self._stopping = True
+        if self.alive:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "pid": self.pid,
+            "state": self.state,
+            "returncode": self.returncode,
+            "restarts": self.restarts,
+            "uptime_s": round(time.monotonic() - self.started_at, 1) if self.alive else 0,
+            "cpu_seconds": round(self.cpu_seconds, 2),
+            "cpu_percent": round(self.cpu_percent, 1),
+            "rss_mb": round(self.rss / 1e6, 1),
+            "max_rss_mb": round(self.max_rss / 1e6, 1),
+        }
+
+
+class ProcessSupervisor:
+    """Spawns, watches, restarts and accounts for every long-running child"""
+
+    def __init__(self, sample_interval: float = 5.0, history: int = 50):
+        self.sample_interval = sample_interval
+        self.children: List[ManagedProcess] = []
+        self.exits = deque(maxlen=history)  # Recent exits, oldest first
+        self.totals: Dict[str, Dict] = {}   # Per command: runs, CPU and wall time, peak RSS
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._sampler: Optional[asyncio.Task] = None
+
+    def add_listener(self, callback: Callable[[Dict], None]) -> None:
+        """Call `callback(status)` whenever a child changes state"""
+        self._listeners.append(callback)
+
+    async def spawn(self, name: str, argv: Union[List[str], Callable[[int], List[str]]],
+                    restart: RestartPolicy = NEVER,
+                    on_exit: Optional[Callable[[ManagedProcess], None]] = None,
+                    **popen_kwargs) -> ManagedProcess:
+        """Start a child; popen_kwargs go to asyncio.create_subprocess_exec"""
+        child = ManagedProcess(self, name, argv, restart, on_exit, popen_kwargs)
+        await child._spawn()
+        self.children.append(child)
+        if self._sampler is None or self._sampler.done():
+            self._sampler = asyncio.create_task(self._sample_loop())
+        return child
+
+    async def stop(self, child: Optional[ManagedProcess], timeout: float = 3.0) -> None:
+        """Stop a child (None is ignored)"""
+        if child is None:
+            return
+        await child.stop(timeout)
+        if child in self.children:
+            self.children.remove(child)
+
+    async def stop_all(self) -> None:
+        await asyncio.gather(*(self.stop(child) for child in list(self.children)))
+
+    async def _sample_loop(self) -> None:
+        """Sample CPU and RSS of every child while any are alive"""
+        while self.children:
+            await asyncio.sleep(self.sample_interval)
+            for child in list(self.children):
+                child.sample()
+                if child.state in ("stopped", "exited", "failed"):
+                    self.children.remove(child)
+
+    def _finish_run(self, child: ManagedProcess, ran_for: float) -> None:
+        """Fold a finished run into the per-command totals"""
+        totals = self.totals.setdefault(child.name, {
+            "runs": 0, "cpu_seconds": 0.0, "wall_seconds": 0.0, "max_rss_mb": 0.0, "crashes": 0
+        })
+        totals["runs"] += 1
+        totals["cpu_seconds"] += child.cpu_seconds
+        totals["wall_seconds"] += ran_for
+        totals["max_rss_mb"] = max(totals["max_rss_mb"], round(child.max_rss / 1e6, 1))
+        if child.returncode and not child._stopping:
+            totals["crashes"] += 1
+        self.exits.append({**child.to_dict(), "ran_for_s": round(ran_for, 1), "at": time.time()})
+
+    def _publish(self, child: ManagedProcess) -> None:
+        status = child.to_dict()
+        for callback in self._listeners:
+            try:
+                callback(status)
+            except Exception as e:
+                logger.error("Error in process listener: %s", e)
+
+    def get_report(self) -> Dict:
+        """Running children with live usage, per-command totals and recent exits"""
+        for child in self.children:
+            child.sample()
+        totals = {
+            name: {**stats, "cpu_seconds": round(stats["cpu_seconds"], 2),
+                   "wall_seconds": round(stats["wall_seconds"], 1),
+                   "avg_cpu_percent": round(100 * stats["cpu_seconds"] / stats["wall_seconds"], 1)
+                   if stats["wall_seconds"] else 0.0}
+            for name, stats in self.totals.items()
+        }
+        return {
+            "children": [child.to_dict() for child in self.children],
+            "totals": totals,
+            "recent_exits": list(reversed(self.exits)),
+        }
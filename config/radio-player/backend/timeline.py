@@ -0,0 +1,36 @@
+"""
+Play Timeline - Milestones of one play() call, from request to audible sound
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class PlayTimeline:
+    """Millisecond offsets of each startup milestone for a single play"""
+
+    def __init__(self, stream_url: str, output: str, started: Optional[float] = None):
+        self.started = started or time.perf_counter()
+        self.stream_url = stream_url
+        self.output = output
+        self.started_at = datetime.now().isoformat()
+        self.events = []
+
+    def mark(self, event: str) -> None:
+        """Record a milestone (only the first occurrence of each counts)"""
+        if any(e["event"] == event for e in self.events):
+            return
+        self.events.append({"event": event, "ms": round(self.elapsed() * 1000, 1)})
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict:
+        return {
+            "stream_url": self.stream_url,
+            "output": self.output,
+            "started_at": self.started_at,
+            "events": list(self.events),
+            "total_ms": self.events[-1]["ms"] if self.events else None,
+        }
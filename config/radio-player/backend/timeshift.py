@@ -0,0 +1,564 @@
+"""
+Time-Shift Buffer - Records the encoded stream to a memory-mapped ring file
+so live radio can be paused, rewound and resumed where it was left off.
+A dropped upstream is reconnected behind the player's back and spliced on.
+"""
+
+import asyncio
+import bisect
+import itertools
+import mmap
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+from backend.metrics import STREAM_RECONNECT_SECONDS, STREAM_STALLS
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+# Upstream headers forwarded to the local player so ICY metadata keeps working
+FORWARDED_HEADERS = ("content-type", "icy-metaint", "icy-name", "icy-genre", "icy-br", "icy-url", "icy-description")
+
+PLAYLIST_TYPES = (
+    "audio/x-mpegurl", "audio/mpegurl", "application/vnd.apple.mpegurl",
+    "application/x-mpegurl", "audio/x-scpls", "application/pls+xml", "video/x-ms-asf",
+)
+
+_session_ids = itertools.count(1)
+
+
+class TimeShiftInactive(RuntimeError):
+    """Seek/live requested while nothing plays through the time-shift relay"""
+
+
+def default_buffer_dir() -> Path:
+    """Prefer tmpfs so the buffer doesn't wear the SD card"""
+    override = os.getenv("CHEEKY_TIMESHIFT_DIR")
+    if override:
+        return Path(override)
+    if Path("/dev/shm").is_dir():
+        return Path("/dev/shm")
+    return Path(tempfile.gettempdir())
+
+
+class TimeShiftBuffer:
+    """Fixed-size ring of stream bytes addressed by absolute offset"""
+
+    def __init__(self, path: Path, capacity: int):
+        self.path = Path(path)
+        self.capacity = capacity
+        self.written = 0  # Absolute offset of the live edge
+        # Positions a decoder can start from and their arrival times, as parallel sorted
+        # lists so lookups bisect directly; monotonic clock, since an NTP step after boot
+        # (no RTC on a Pi) would break the time bisect
+        self.boundary_offsets: List[int] = []
+        self.boundary_times: List[float] = []
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.ftruncate(self._fd, capacity)
+        self._map = mmap.mmap(self._fd, capacity)
+        self._data_event = asyncio.Event()
+
+    @property
+    def oldest(self) -> int:
+        """Oldest absolute offset still held in the ring"""
+        return max(0, self.written - self.capacity)
+
+    def write(self, data: bytes) -> None:
+        """Append bytes at the live edge, overwriting the oldest data"""
+        if len(data) > self.capacity:
+            self.written += len(data) - self.capacity
+            data = data[-self.capacity:]
+
+        start = self.written % self.capacity
+        first = min(len(data), self.capacity - start)
+        self._map[start:start + first] = data[:first]
+        if first < len(data):
+            self._map[0:len(data) - first] = data[first:]
+        self.written += len(data)
+
+        expired = bisect.bisect_left(self.boundary_offsets, self.oldest)
+        if expired:
+            del self.boundary_offsets[:expired]
+            del self.boundary_times[:expired]
+
+        # Wake readers waiting at the live edge
+        self._data_event.set()
+        self._data_event = asyncio.Event()
+
+    def mark_boundary(self, offset: int, timestamp: float) -> None:
+        """Record a decoder-safe start position"""
+        self.boundary_offsets.append(offset)
+        self.boundary_times.append(timestamp)
+
+    def clear_boundaries(self) -> None:
+        """Forget every boundary (the stream framing changed)"""
+        self.boundary_offsets.clear()
+        self.boundary_times.clear()
+
+    def read(self, offset: int, size: int) -> bytes:
+        """Read up to size bytes from an absolute offset (must be >= oldest)"""
+        size = min(size, self.written - offset)
+        if size <= 0:
+            return b""
+
+        start = offset % self.capacity
+        first = min(size, self.capacity - start)
+        data = self._map[start:start + first]
+        if first < size:
+            data += self._map[0:size - first]
+        return data
+
+    async def wait_for_data(self, timeout: float = 5.0) -> None:
+        """Block until new bytes are written (or timeout)"""
+        try:
+            await asyncio.wait_for(self._data_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def snap(self, offset: int) -> int:
+        """Nearest boundary at or after offset, clamped to the ring
+
+        Past the last boundary (e.g. the live edge) this is the last boundary,
+        since the live edge itself is usually in the middle of an ICY block.
+        """
+        offset = max(offset, self.oldest)
+        offsets = self.boundary_offsets
+        index = bisect.bisect_left(offsets, offset)
+        if index < len(offsets):
+            return offsets[index]
+        return offsets[-1] if offsets else self.written
+
+    def time_of(self, offset: int) -> Optional[float]:
+        """Arrival time of the boundary at or before offset"""
+        index = bisect.bisect_right(self.boundary_offsets, offset) - 1
+        if index < 0:
+            return None
+        return self.boundary_times[index]
+
+    def offset_at(self, timestamp: float) -> int:
+        """Boundary offset closest to (not after) an arrival time"""
+        index = bisect.bisect_right(self.boundary_times, timestamp) - 1
+        if index < 0:
+            return self.snap(self.oldest)
+        return self.boundary_offsets[index]
+
+    def close(self) -> None:
+        """Unmap and delete the ring file"""
+        try:
+            self._map.close()
+            os.close(self._fd)
+        except Exception:
+            pass
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class TimeShiftSession:
+    """Downloads one station into a TimeShiftBuffer and serves it on loopback"""
+
+    USER_AGENT = "Cheeky"
+    BOUNDARY_INTERVAL = 0.25  # Seconds between boundaries for streams without ICY framing
+    # Shorter than mpv's 10s cache, so a silently dead upstream is noticed while audio still plays
+    READ_TIMEOUT = 8.0
+
+    def __init__(self, stream_url: str, capacity: int, buffer_dir: Optional[Path] = None):
+        self.stream_url = stream_url
+        buffer_dir = Path(buffer_dir or default_buffer_dir())
+        buffer_dir.mkdir(parents=True, exist_ok=True)
+        # Unique per session: a pre-buffered or recording relay can run next to the playing one
+        name = f"cheeky-timeshift-{os.getpid()}-{next(_session_ids)}.buf"
+        self.buffer = TimeShiftBuffer(buffer_dir / name, capacity)
+
+        self.headers: Dict[str, str] = {}
+        self.metaint = 0  # ICY metadata interval; 0 when the server sends none
+        self.resume_offset: Optional[int] = None  # Where the next reader starts
+        self.reader_offset: Optional[int] = None  # Position of the active reader
+        self._reader_id = 0  # Bumped per new reader and by seek; stale readers stop reporting
+        self.listeners: List = []  # Callbacks receiving audio bytes (ICY metadata stripped)
+        self.title_listeners: List = []  # Callbacks receiving in-band StreamTitle changes
+        self.reconnect_listeners: List = []  # Callbacks receiving reconnecting/reconnected/lost events
+        self.close_listeners: List = []  # Callbacks receiving this session once it has closed
+        self.icy_title: Optional[str] = None
+        self.closed = False
+
+        # Upstream reconnect: exponential backoff until give_up_after seconds without audio
+        self.reconnect = True
+        self.reconnect_backoff = 0.5
+        self.max_reconnect_backoff = 30.0
+        self.give_up_after = 300.0
+        self.reconnect_attempt = 0
+        self.reconnects = 0
+        self.last_gap = 0.0
+        self._lost_at: Optional[float] = None
+        self._generation = 0  # Bumped when readers must restart (stream framing changed)
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._fetch_task = None
+        self._server = None
+        self._port = None
+        self._started = asyncio.Event()
+        self._error: Optional[Exception] = None
+
+        # ICY framing state, see _track_boundaries
+        self._audio_left = 0
+        self._meta_left = 0
+        self._expect_length = False
+        self._meta_block = bytearray()
+        self._last_boundary = 0.0
+
+    @property
+    def url(self) -> str:
+        """Local URL for mpv/ffmpeg; playback starts at resume_offset (or live)"""
+        return f"http://127.0.0.1:{self._port}/timeshift"
+
+    async def start(self, timeout: float = 10.0) -> None:
+        """Connect upstream and start the loopback server"""
+        self._server = await asyncio.start_server(self._handle_client, "127.0.0.1", 0)
+        self._port = self._server.sockets[0].getsockname()[1]
+        self._fetch_task = asyncio.create_task(self._fetch())
+
+        try:
+            await asyncio.wait_for(self._started.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._error = Exception(f"Stream did not respond within {timeout}s")
+        if self._error:
+            await self.close()
+            raise self._error
+
+    @property
+    def live(self) -> bool:
+        """Still relaying (or reconnecting to) the station"""
+        return self._fetch_task is not None and not self._fetch_task.done()
+
+    @property
+    def reconnecting(self) -> bool:
+        """Upstream dropped and not back yet"""
+        return self._lost_at is not None
+
+    async def _fetch(self):
+        """Download the stream into the ring buffer, reconnecting when upstream drops"""
+        try:
+            self._session = aiohttp.ClientSession()
+            while True:
+                try:
+                    await self._download()
+                    reason = "upstream ended"
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if not self._started.is_set():
+                        raise  # Never connected - start() reports it
+                    reason = f"{type(e).__name__}: {e}"
+
+                if not self.reconnect:
+                    logger.info("Time-shift upstream ended (%s)", reason)
+                    break
+                delay = min(self.reconnect_backoff * 2 ** self.reconnect_attempt, self.max_reconnect_backoff)
+                if self._lost_at is None:
+                    self._lost_at = time.monotonic()
+                    self.reconnect_attempt = 0
+                    delay = self.reconnect_backoff
+                    STREAM_STALLS.inc(kind="upstream")
+                    logger.warning("Time-shift upstream dropped (%s), reconnecting", reason)
+                elif time.monotonic() - self._lost_at > self.give_up_after:
+                    logger.error("Time-shift upstream gone for %.0fs, giving up: %s",
+                                 time.monotonic() - self._lost_at, self.stream_url)
+                    self._publish({"state": "lost"})
+                    break
+                else:
+                    logger.debug("Reconnect attempt %s failed (%s), next in %.1fs",
+                                 self.reconnect_attempt, reason, delay)
+
+                self.reconnect_attempt += 1
+                self._publish({"state": "reconnecting", "attempt": self.reconnect_attempt})
+                await asyncio.sleep(delay)
+
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("Time-shift fetch error: %s: %s", type(e).__name__, e)
+            self._error = e
+        finally:
+            self._started.set()
+            if self._session:
+                await self._session.close()
+                self._session = None
+
+    async def _download(self):
+        """One upstream connection; returns when the server closes it"""
+        headers = {"User-Agent": self.USER_AGENT, "Icy-MetaData": "1"}
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=self.READ_TIMEOUT)
+
+        async with self._session.get(self.stream_url, headers=headers, timeout=timeout) as resp:
+            if resp.status != 200:
+                raise Exception(f"Stream returned HTTP {resp.status}")
+            if resp.content_type in PLAYLIST_TYPES:
+                # Playlists/HLS need the player's own resolver
+                raise Exception(f"Cannot time-shift {resp.content_type} streams")
+
+            forwarded = {
+                k.lower(): v for k, v in resp.headers.items() if k.lower() in FORWARDED_HEADERS
+            }
+            if self._started.is_set():
+                self._splice(forwarded)
+            else:
+                self.headers = forwarded
+                self.metaint = int(self.headers.get("icy-metaint", 0) or 0)
+                self.buffer.mark_boundary(0, time.monotonic())
+                self._started.set()
+                logger.info("Time-shift buffering %s (%sMB ring, metaint=%s)",
+                            self.stream_url, self.buffer.capacity // (1024 * 1024), self.metaint)
+
+                self._audio_left = self.metaint
+                self._meta_left = 0
+                self._expect_length = False
+                self._last_boundary = time.monotonic()
+
+            async for chunk in resp.content.iter_any():
+                if self._lost_at is not None:
+                    self._recovered()
+
+                base = self.buffer.written
+                self.buffer.write(chunk)
+                audio = self._track_boundaries(base, chunk)
+
+                for listener in self.listeners:
+                    try:
+                        listener(audio)
+                    except Exception as e:
+                        logger.error("Time-shift listener error: %s", e)
+
+    def _splice(self, headers: Dict[str, str]) -> None:
+        """Join a reconnected stream onto the ring so the reader just plays on
+
+        The interrupted ICY frame is completed with padding (NULs are skipped by
+        the decoder and make an empty metadata block), so the new stream's first
+        byte lands where the reader expects the next audio block to start.
+        """
+        metaint = int(headers.get("icy-metaint", 0) or 0)
+        if metaint == self.metaint:
+            if metaint:
+                if self._expect_length:
+                    padding = 1
+                elif self._meta_left:
+                    padding = self._meta_left
+                elif self._audio_left < metaint:
+                    padding = self._audio_left + 1
+                else:
+                    padding = 0
+                if padding:
+                    self.buffer.write(b"\0" * padding)
+        else:
+            # Different framing: readers can't carry on across it, so restart them here
+            logger.info("Time-shift stream framing changed (metaint %s -> %s), restarting readers",
+                        self.metaint, metaint)
+            self.headers = headers
+            self.metaint = metaint
+            self.buffer.clear_boundaries()
+            self.resume_offset = self.buffer.written
+            self._generation += 1
+
+        self._audio_left = self.metaint
+        self._meta_left = 0
+        self._expect_length = False
+        self._meta_block.clear()
+        self._last_boundary = time.monotonic()
+        self.buffer.mark_boundary(self.buffer.written, self._last_boundary)
+
+    def _recovered(self) -> None:
+        """First audio after a reconnect"""
+        gap = time.monotonic() - self._lost_at
+        self._lost_at = None
+        self.reconnects += 1
+        self.last_gap = gap
+        STREAM_RECONNECT_SECONDS.observe(gap, layer="relay")
+        logger.info("Time-shift upstream back after %.1fs", gap)
+        self._publish({"state": "reconnected", "gap_seconds": round(gap, 1)})
+
+    def _publish(self, event: Dict) -> None:
+        for listener in self.reconnect_listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error("Time-shift reconnect listener error: %s", e)
+
+    def _track_boundaries(self, base: int, chunk: bytes) -> bytes:
+        """Mark positions where a decoder can start reading; returns the audio-only bytes
+
+        With ICY framing every audio block start is a boundary, so a reader
+        starting there sees metadata at the offsets icy-metaint promises.
+        """
+        now = time.monotonic()
+        if not self.metaint:
+            if now - self._last_boundary >= self.BOUNDARY_INTERVAL:
+                self.buffer.mark_boundary(base, now)
+                self._last_boundary = now
+            return chunk
+
+        audio = []
+        pos = 0
+        while pos < len(chunk):
+            if self._audio_left:
+                step = min(self._audio_left, len(chunk) - pos)
+                if self.listeners:
+                    audio.append(chunk[pos:pos + step])
+                self._audio_left -= step
+                pos += step
+                self._expect_length = self._audio_left == 0
+            elif self._expect_length:
+                self._meta_left = chunk[pos] * 16
+                self._expect_length = False
+                pos += 1
+                if not self._meta_left:
+                    self._audio_left = self.metaint
+                    self.buffer.mark_boundary(base + pos, now)
+            else:
+                step = min(self._meta_left, len(chunk) - pos)
+                self._meta_block += chunk[pos:pos + step]
+                self._meta_left -= step
+                pos += step
+                if not self._meta_left:
+                    self._audio_left = self.metaint
+                    self.buffer.mark_boundary(base + pos, now)
+                    self._parse_metadata(bytes(self._meta_block))
+                    self._meta_block.clear()
+
+        return b"".join(audio)
+
+    def _parse_metadata(self, block: bytes) -> None:
+        """Pick StreamTitle out of an ICY metadata block"""
+        text = block.rstrip(b"\0").decode("utf-8", errors="replace")
+        start = text.find("StreamTitle='")
+        if start < 0:
+            return
+        end = text.find("';", start)
+        title = text[start + 13:end if end >= 0 else None].strip()
+
+        if title != self.icy_title:
+            self.icy_title = title
+            for listener in self.title_listeners:
+                try:
+                    listener(title)
+                except Exception as e:
+                    logger.error("Time-shift title listener error: %s", e)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the ring to a local player over plain HTTP/1.0"""
+        reader_id = None
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # Ignore request headers
+
+            query = parse_qs(urlparse(request_line.split()[1].decode()).query) if request_line else {}
+            if "pos" in query:
+                offset = self.buffer.snap(int(query["pos"][0]))
+            elif self.resume_offset is not None:
+                offset = self.buffer.snap(self.resume_offset)
+            else:
+                offset = self.buffer.snap(self.buffer.written)
+            self.resume_offset = None
+            generation = self._generation
+            self._reader_id += 1
+            reader_id = self._reader_id
+            self.reader_offset = offset
+
+            lines = ["HTTP/1.0 200 OK"] + [f"{k}: {v}" for k, v in self.headers.items()]
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+            while generation == self._generation:
+                if offset < self.buffer.oldest:
+                    # Paused longer than the ring holds. Jumping ahead mid-stream would break
+                    # the reader's metaint count, so close it; the player reconnects and the
+                    # next reader starts at the oldest boundary (resume_offset is clamped).
+                    logger.info("Time-shift reader overrun by the live edge, closing it")
+                    break
+
+                data = self.buffer.read(offset, 16384)
+                if not data:
+                    if self._fetch_task.done():
+                        break
+                    await self.buffer.wait_for_data()
+                    continue
+
+                writer.write(data)
+                await writer.drain()
+                offset += len(data)
+                if reader_id == self._reader_id:
+                    self.reader_offset = offset
+
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.error("Time-shift client error: %s", e)
+        finally:
+            # Remember where this reader stopped so a restarted pipeline continues there,
+            # unless a seek or a newer reader has taken over since it started
+            current = reader_id == self._reader_id
+            if current and self.reader_offset is not None and self.resume_offset is None:
+                self.resume_offset = self.reader_offset
+            writer.close()
+
+    def seek(self, seconds_behind_live: float) -> int:
+        """Set the position the next reader starts from, in seconds behind live"""
+        if seconds_behind_live <= 0:
+            self.resume_offset = self.buffer.written
+        else:
+            self.resume_offset = self.buffer.offset_at(time.monotonic() - seconds_behind_live)
+        self.reader_offset = None
+        self._reader_id += 1  # The reader still playing the old position must not report it
+        return self.resume_offset
+
+    def get_status(self) -> Dict:
+        """Buffer occupancy and how far playback is behind live"""
+        buffered_bytes = self.buffer.written - self.buffer.oldest
+        oldest_time = self.buffer.time_of(self.buffer.snap(self.buffer.oldest))
+        now = time.monotonic()
+
+        position = self.reader_offset if self.reader_offset is not None else self.resume_offset
+        position_time = self.buffer.time_of(position) if position is not None else None
+
+        return {
+            "enabled": True,
+            "capacity_bytes": self.buffer.capacity,
+            "buffered_bytes": buffered_bytes,
+            "fill_percent": round(100 * buffered_bytes / self.buffer.capacity, 1),
+            "buffered_seconds": round(now - oldest_time, 1) if oldest_time else 0,
+            "behind_live_seconds": round(now - position_time, 1) if position_time else 0,
+            "live": self.live,
+            "reconnecting": self.reconnecting,
+            "reconnects": self.reconnects,
+            "last_gap_seconds": round(self.last_gap, 1),
+        }
+
+    async def close(self) -> None:
+        """Stop downloading, close the server and delete the ring file"""
+        if self._fetch_task and not self._fetch_task.done():
+            self._fetch_task.cancel()
+            try:
+                await self._fetch_task
+            except asyncio.CancelledError:
+                pass
+        if self._server:
+            self._server.close()
+            self._server = None
+        self.listeners = []
+        self.title_listeners = []
+        self.reconnect_listeners = []
+        closing, self.close_listeners = self.close_listeners, []
+        self.closed = True
+        self.buffer.close()
+
+        for listener in closing:
+            try:
+                listener(self)
+            except Exception as e:
+                logger.error("Time-shift close listener error: %s", e)
@@ -0,0 +1,276 @@
+"""
+Transcode Planner - Picks the cheapest ffmpeg pipeline for Airplay streaming
+Probes each source once and tunes resampler/threads for the Pi model
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from backend.metrics import track_subprocess
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+# Output formats expected by the two Airplay streamers
+TARGET_PCM = "pcm"    # raop_play: 44.1kHz stereo s16le on stdin
+TARGET_AAC = "aac"    # pyatv: AAC in ADTS container
+
+TARGET_RATE = 44100
+TARGET_CHANNELS = 2
+
+# Relative CPU cost of each pipeline (transcode on a Pi Zero = 1.0)
+PATH_COST = {
+    "passthrough": 0.05,
+    "resample": 0.35,
+    "transcode": 1.0,
+}
+
+
+class TranscodePlanner:
+    """Probes stream sources and plans the cheapest ffmpeg pipeline per Pi model"""
+
+    # Per-model tuning: swr filter size trades quality for CPU, soxr is best but heaviest
+    PROFILES = {
+        "pi-zero": {
+            "resampler": "swr",
+            "filter_size": 8,
+            "threads": 1,
+            "aac_bitrate": "160k",
+            "cpu_factor": 1.0,
+        },
+        "pi-zero-2": {
+            "resampler": "swr",
+            "filter_size": 16,
+            "threads": 2,
+            "aac_bitrate": "192k",
+            "cpu_factor": 0.45,
+        },
+        "pi-3": {
+            "resampler": "swr",
+            "filter_size": 32,
+            "threads": 2,
+            "aac_bitrate": "256k",
+            "cpu_factor": 0.35,
+        },
+        "pi-4": {
+            "resampler": "soxr",
+            "filter_size": 32,
+            "threads": 0,  # 0 = let ffmpeg decide
+            "aac_bitrate": "256k",
+            "cpu_factor": 0.15,
+        },
+        "pi-5": {
+            "resampler": "soxr",
+            "filter_size": 32,
+            "threads": 0,
+            "aac_bitrate": "256k",
+            "cpu_factor": 0.08,
+        },
+        "default": {
+            "resampler": "soxr",
+            "filter_size": 32,
+            "threads": 0,
+            "aac_bitrate": "256k",
+            "cpu_factor": 0.1,
+        },
+    }
+
+    PROBE_CACHE_SIZE = 128  # Sources remembered, least recently played evicted first
+    FAILURE_TTL = 60        # Seconds before a failed probe (timeout, upstream blip) is retried
+
+    def __init__(self, probe_timeout: float = 5.0):
+        self.probe_timeout = probe_timeout
+        self.profile_name = os.getenv("CHEEKY_TRANSCODE_PROFILE") or self._detect_model()
+        if self.profile_name not in self.PROFILES:
+            logger.warning("Unknown transcode profile '%s', using default", self.profile_name)
+            self.profile_name = "default"
+        self.profile = self.PROFILES[self.profile_name]
+        # LRU of URL -> (probe result or None on failure, monotonic probe time)
+        self._probe_cache: "OrderedDict[str, Tuple[Optional[Dict], float]]" = OrderedDict()
+        self._cpu_stats: Dict[str, Dict] = {}
+        logger.info("Transcode profile: %s", self.profile_name)
+
+    def _detect_model(self) -> str:
+        """Map the device-tree model string to a profile name"""
+        try:
+            model = Path("/proc/device-tree/model").read_text().strip("\x00").lower()
+        except Exception:
+            return "default"
+
+        if "zero 2" in model:
+            return "pi-zero-2"
+        if "zero" in model:
+            return "pi-zero"
+        if "pi 5" in model:
+            return "pi-5"
+        if "pi 4" in model or "compute module 4" in model:
+            return "pi-4"
+        if "pi 3" in model:
+            return "pi-3"
+        return "default"
+
+    async def probe(self, stream_url: str) -> Optional[Dict]:
+        """Probe codec, sample rate and channels of a stream (cached per URL)"""
+        cached = self._probe_cache.get(stream_url)
+        if cached:
+            info, probed_at = cached
+            if info is not None or time.monotonic() - probed_at < self.FAILURE_TTL:
+                self._probe_cache.move_to_end(stream_url)
+                return info
+
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-select_streams", "a:0",
+            "-show_entries", "stream=codec_name,sample_rate,channels",
+            "-of", "json",
+            stream_url
+        ]
+
+        info = None
+        try:
+            with track_subprocess("ffprobe"):
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+            try:
+                stdout, _ = await asyncio.wait_for(process.communicate(), timeout=self.probe_timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                logger.warning("ffprobe timeout after %ss for %s", self.probe_timeout, stream_url)
+                stdout = b""
+
+            streams = json.loads(stdout or b"{}").get("streams", [])
+            if streams:
+                stream = streams[0]
+                info = {
+                    "codec": stream.get("codec_name", ""),
+                    "sample_rate": int(stream.get("sample_rate", 0) or 0),
+                    "channels": int(stream.get("channels", 0) or 0),
+                }
+                logger.debug("Probed %s: %s", stream_url, info)
+        except FileNotFoundError:
+            logger.warning("ffprobe not found - always using full transcode")
+        except Exception as e:
+            logger.error("ffprobe error: %s: %s", type(e).__name__, e)
+
+        # Failures are cached too, but only for FAILURE_TTL so a blip doesn't pin the URL to transcode
+        self._probe_cache[stream_url] = (info, time.monotonic())
+        self._probe_cache.move_to_end(stream_url)
+        while len(self._probe_cache) > self.PROBE_CACHE_SIZE:
+            self._probe_cache.popitem(last=False)
+        return info
+
+    def _choose_path(self, target: str, source: Optional[Dict]) -> str:
+        """Pick the cheapest pipeline that produces the target format"""
+        if not source:
+            return "transcode" if target == TARGET_AAC else "resample"
+
+        native = (source["sample_rate"] == TARGET_RATE and source["channels"] == TARGET_CHANNELS)
+
+        if target == TARGET_PCM:
+            if native and source["codec"] == "pcm_s16le":
+                return "passthrough"
+            return "resample"
+
+        if native and source["codec"] == "aac":
+            return "passthrough"
+        return "transcode"
+
+    def _resample_filter(self) -> List[str]:
+        """aresample filter arguments for the active profile"""
+        if self.profile["resampler"] == "soxr":
+            return ["-af", f"aresample={TARGET_RATE}:resampler=soxr"]
+        return [
+            "-af",
+            f"aresample={TARGET_RATE}:resampler=swr:filter_size={self.profile['filter_size']}:linear_interp=1"
+        ]
+
+    async def plan(self, stream_url: str, target: str, probe_url: Optional[str] = None) -> Dict:
+        """Build the ffmpeg command for a stream and target format
+
+        probe_url lets callers reading from a local relay probe the original station instead.
+        """
+        source = await self.probe(probe_url or stream_url)
+        path = self._choose_path(target, source)
+
+        # Only resample when the source actually differs from 44.1kHz stereo
+        needs_resample = not source or (
+            source["sample_rate"] != TARGET_RATE or source["channels"] != TARGET_CHANNELS
+        )
+
+        cmd = ["ffmpeg", "-re", "-threads", str(self.profile["threads"]), "-i", stream_url]
+
+        if path == "passthrough":
+            cmd += ["-c:a", "copy"]
+        else:
+            if needs_resample:
+                cmd += self._resample_filter()
+                cmd += ["-ac", str(TARGET_CHANNELS)]
+            if target == TARGET_AAC:
+                cmd += ["-c:a", "aac", "-b:a", self.profile["aac_bitrate"]]
+
+        cmd += ["-f", "adts" if target == TARGET_AAC else "s16le", "-"]
+
+        return {
+            "path": path,
+            "target": target,
+            "profile": self.profile_name,
+            "source": source,
+            "resample": path != "passthrough" and needs_resample,
+            "estimated_cpu": round(PATH_COST[path] * self.profile["cpu_factor"], 3),
+            "command": cmd,
+        }
+
+    def read_cpu_seconds(self, pid: int) -> Optional[float]:
+        """Read user+system CPU time of a child process from /proc"""
+        try:
+            fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+            ticks = int(fields[11]) + int(fields[12])  # utime + stime
+            return ticks / os.sysconf("SC_CLK_TCK")
+        except Exception:
+            return None
+
+    def record_usage(self, plan: Dict, pid: int, started_at: float) -> None:
+        """Record measured CPU usage of a finished ffmpeg run against its plan"""
+        cpu_seconds = self.read_cpu_seconds(pid)
+        wall_seconds = time.monotonic() - started_at
+        if cpu_seconds is None or wall_seconds <= 0:
+            return
+
+        key = f"{plan['profile']}:{plan['target']}:{plan['path']}"
+        stats = self._cpu_stats.setdefault(key, {"runs": 0, "cpu_seconds": 0.0, "wall_seconds": 0.0})
+        stats["runs"] += 1
+        stats["cpu_seconds"] += cpu_seconds
+        stats["wall_seconds"] += wall_seconds
+
+    def get_report(self) -> Dict:
+        """CPU cost per profile: static estimates plus measured usage"""
+        estimates = {
+            name: {path: round(cost * profile["cpu_factor"], 3) for path, cost in PATH_COST.items()}
+            for name, profile in self.PROFILES.items()
+        }
+
+        measured = {}
+        for key, stats in self._cpu_stats.items():
+            measured[key] = {
+                "runs": stats["runs"],
+                "cpu_seconds": round(stats["cpu_seconds"], 2),
+                "avg_cpu_percent": round(100 * stats["cpu_seconds"] / stats["wall_seconds"], 1),
+            }
+
+        return {
+            "active_profile": self.profile_name,
+            "profile": self.profile,
+            "estimated_cpu": estimates,
+            "measured": measured,
+            "probed_sources": len(self._probe_cache),
+        }
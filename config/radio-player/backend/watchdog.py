@@ -0,0 +1,135 @@
+"""
+Loop Watchdog - Measures event-loop lag and catches callbacks that block it
+A heartbeat task ticks on the loop; a helper thread notices when the ticks stop
+and snapshots the loop thread's stack while the blocking call is still running
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.metrics import LOOP_LAG_SECONDS
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
+APP_ROOT = str(Path(__file__).resolve().parent.parent)
+
+
+class LoopWatchdog:
+    """Continuous loop-lag measurement plus stack capture for long stalls"""
+
+    def __init__(self, threshold: float = 0.25, interval: float = 0.1, max_stalls: int = 50):
+        self.threshold = threshold  # Stalls longer than this are captured
+        self.interval = interval    # Heartbeat period
+        self.stalls = deque(maxlen=max_stalls)
+        self.offenders: Dict[str, Dict] = {}  # Aggregated by blocking app frame
+        self.max_lag = 0.0
+        self._last_beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._stall: Optional[Dict] = None  # Stall currently in progress
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._lock = threading.Lock()  # Stalls are recorded from the watcher thread
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the watcher thread"""
+        if self._running:
+            return
+        self._running = True
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="cheeky-loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info("Loop watchdog started (threshold %.0f ms)", self.threshold * 1000)
+
+    async def stop(self) -> None:
+        """Stop watching"""
+        self._running = False
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+    async def _heartbeat(self) -> None:
+        """Tick on the loop and record how late each tick is"""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            LOOP_LAG_SECONDS.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            self._last_beat = now
+
+    def _watch(self) -> None:
+        """Watcher thread: snapshot the loop thread's stack when ticks stop"""
+        while self._running:
+            time.sleep(self.interval / 2)
+            beat = self._last_beat
+            stalled_for = time.monotonic() - beat - self.interval
+
+            if self._stall and self._stall["beat"] != beat:
+                self._finish_stall(beat)
+
+            if stalled_for > self.threshold and self._stall is None:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is None:
+                    continue
+                stack = traceback.extract_stack(frame)
+                self._stall = {
+                    "beat": beat,
+                    "at": datetime.now().isoformat(),
+                    "where": self._blocking_frame(stack),
+                    "stack": [f"{f.filename}:{f.lineno} in {f.name}" for f in stack[-15:]],
+                }
+
+    def _finish_stall(self, resumed_beat: float) -> None:
+        """Record a stall once the loop ticks again"""
+        stall, self._stall = self._stall, None
+        duration = resumed_beat - stall.pop("beat") - self.interval
+        stall["duration_ms"] = round(duration * 1000, 1)
+
+        with self._lock:
+            self.stalls.append(stall)
+            offender = self.offenders.setdefault(stall["where"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            offender["count"] += 1
+            offender["total_ms"] = round(offender["total_ms"] + stall["duration_ms"], 1)
+            offender["max_ms"] = max(offender["max_ms"], stall["duration_ms"])
+        logger.warning("Event loop blocked for %.0f ms at %s", stall['duration_ms'], stall['where'])
+
+    @staticmethod
+    def _blocking_frame(stack: traceback.StackSummary) -> str:
+        """Innermost frame in our own code (falls back to the innermost frame)"""
+        for frame in reversed(stack):
+            if frame.filename.startswith(APP_ROOT) and not frame.filename.endswith("watchdog.py"):
+                return f"{Path(frame.filename).relative_to(APP_ROOT)}:{frame.lineno} in {frame.name}"
+        frame = stack[-1]
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+    def get_report(self) -> Dict:
+        """Recent stalls and the worst offenders"""
+        with self._lock:
+            offenders: List[Dict] = sorted(
+                ({"where": where, **stats} for where, stats in self.offenders.items()),
+                key=lambda o: o["total_ms"], reverse=True
+            )
+            stalls = list(reversed(self.stalls))
+        return {
+            "running": self._running,
+            "threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "offenders": offenders,
+            "recent_stalls": stalls,
+        }
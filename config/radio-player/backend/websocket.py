@@ -3,26 +3,34 @@ WebSocket Manager - Handles real-time connections and broadcasts
 """
 
 import json
+import time
 from typing import List, Dict
 from fastapi import WebSocket
 from datetime import datetime
 
+from backend.metrics import REGISTRY, WEBSOCKET_SEND_SECONDS
+from backend.log import get_logger
+
+logger = get_logger(__name__)
+
 class WebSocketManager:
     """Manages WebSocket connections for real-time updates"""
 
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        REGISTRY.gauge("cheeky_websocket_clients", "Connected WebSocket clients",
+                       callback=self.get_connection_count)
 
     async def connect(self, websocket: WebSocket):
         """Accept and register a new WebSocket connection"""
         await websocket.accept()
         self.active_connections.append(websocket)
-        print(f"[Cheeky] Client connected. Active: {len(self.active_connections)}")
+        logger.debug("Client connected. Active: %s", len(self.active_connections))
 
     async def disconnect(self, websocket: WebSocket):
         """Disconnect and unregister a WebSocket"""
         self.active_connections.remove(websocket)
-        print(f"[Cheeky] Client disconnected. Active: {len(self.active_connections)}")
+        logger.debug("Client disconnected. Active: %s", len(self.active_connections))
 
     async def broadcast(self, message: Dict):
         """Broadcast a message to all connected clients"""
@@ -30,14 +38,17 @@ class WebSocketManager:
         message["timestamp"] = datetime.now().isoformat()
 
         disconnected = []
+        message_type = message.get("type", "")
         for connection in self.active_connections:
             try:
+                started = time.perf_counter()
                 await connection.send_json(message)
+                WEBSOCKET_SEND_SECONDS.observe(time.perf_counter() - started, type=message_type)
             except RuntimeError:
                 # Connection was closed
                 disconnected.append(connection)
             except Exception as e:
-                print(f"[Cheeky] Error sending message: {e}")
+                logger.error("Error sending message: %s", e)
                 disconnected.append(connection)
 
         # Remove disconnected clients
@@ -50,7 +61,7 @@ class WebSocketManager:
             message["timestamp"] = datetime.now().isoformat()
             await websocket.send_json(message)
         except Exception as e:
-            print(f"[Cheeky] Error sending personal message: {e}")
+            logger.error("Error sending personal message: %s", e)
 
     def get_connection_count(self) -> int:
         """Get number of active connections"""
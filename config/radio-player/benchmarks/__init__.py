@@ -0,0 +1,4 @@
+"""
+Benchmarks - Local stand-ins and a load harness for the radio player
+Run from config/radio-player:  python -m benchmarks.run
+"""
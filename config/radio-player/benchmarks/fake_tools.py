@@ -0,0 +1,170 @@
+"""
+Fake Tools - bluetoothctl, avahi-browse and mpv stand-ins for benchmark runs
+Installed on PATH by fakes.install_fake_tools(); configured through BENCH_* variables
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+
+
+def _delay() -> None:
+    """Simulated tool start-up / D-Bus round trip"""
+    time.sleep(float(os.getenv("BENCH_TOOL_DELAY", "0")))
+
+
+def bluetoothctl(args) -> int:
+    """Answer the bluetoothctl commands BluetoothManager sends on stdin"""
+    _delay()
+    devices = [(f"AA:BB:CC:DD:EE:{n:02X}", f"Bench Speaker {n}")
+               for n in range(int(os.getenv("BENCH_BT_DEVICES", "3")))]
+    for command in sys.stdin.read().splitlines():
+        command = command.strip()
+        if command == "devices":
+            for mac, name in devices:
+                print(f"Device {mac} {name}")
+        elif command.startswith("info "):
+            mac = command.split(None, 1)[1]
+            index = next((i for i, (m, _) in enumerate(devices) if m == mac), None)
+            if index is None:
+                print(f"Device {mac} not available")
+                continue
+            print(f"Device {mac} (public)\n\tName: {devices[index][1]}\n\tPaired: yes")
+            print(f"\tTrusted: yes\n\tConnected: {'yes' if index == 0 else 'no'}")
+        elif command == "show":
+            print("Controller 00:11:22:33:44:55 (public)\n\tName: cheeky-bench\n\tPowered: yes")
+            print("\tDiscoverable: no\n\tPairable: yes\n\tDiscovering: no")
+    return 0
+
+
+def avahi_browse(args) -> int:
+    """Print resolved _raop._tcp records that all point at the loopback RAOP sink"""
+    _delay()
+    port = os.getenv("BENCH_RAOP_PORT", "5000")
+    for n in range(int(os.getenv("BENCH_AIRPLAY_DEVICES", "2"))):
+        name = f"0011223344{n:02X}\\064Bench\\032Receiver\\032{n}"
+        print(f"+;lo;IPv4;{name};_raop._tcp;local")
+        print(f"=;lo;IPv4;{name};_raop._tcp;local;bench-{n}.local;127.0.0.{n + 1};{port};"
+              f"\"am=BenchSink\" \"tp=UDP\" \"cn=0,1\"")
+    return 0
+
+
+class FakeMpv:
+    """Plays nothing, but reads the ICY stream and speaks mpv's JSON IPC"""
+
+    def __init__(self, args):
+        self.ipc_path = next(a.split("=", 1)[1] for a in args if a.startswith("--input-ipc-server="))
+        self.url = next(a for a in reversed(args) if not a.startswith("--"))
+        self.properties = {"volume": 0, "pause": False, "demuxer-cache-duration": 0.0, "core-idle": True}
+        self.clients = []
+        self.lock = threading.Lock()
+
+    def emit(self, event: str) -> None:
+        self.emit_json({"event": event})
+
+    def emit_json(self, message: dict) -> None:
+        line = (json.dumps(message) + "\n").encode()
+        with self.lock:
+            for client in list(self.clients):
+                try:
+                    client.sendall(line)
+                except OSError:
+                    self.clients.remove(client)
+
+    def serve_client(self, client: socket.socket) -> None:
+        with self.lock:
+            self.clients.append(client)
+        buffer = b""
+        try:
+            while True:
+                data = client.recv(4096)
+                if not data:
+                    break
+                buffer += data
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    request = json.loads(line)
+                    command = request.get("command", [])
+                    reply = {"error": "success"}
+                    if command[:1] == ["get_property"]:
+                        value = self.properties.get(command[1])
+                        reply = {"data": value, "error": "success"} if value is not None \
+                            else {"error": "property unavailable"}
+                    elif command[:1] == ["set_property"]:
+                        self.properties[command[1]] = command[2]
+                    if "request_id" in request:
+                        reply["request_id"] = request["request_id"]
+                    client.sendall((json.dumps(reply) + "\n").encode())
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self.lock:
+                if client in self.clients:
+                    self.clients.remove(client)
+            client.close()
+
+    def serve_ipc(self, server: socket.socket) -> None:
+        while True:
+            client, _ = server.accept()
+            threading.Thread(target=self.serve_client, args=(client,), daemon=True).start()
+
+    def read_stream(self) -> None:
+        request = urllib.request.Request(self.url, headers={"Icy-MetaData": "1", "User-Agent": "Cheeky"})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            self.emit("file-loaded")
+            for header in ("icy-name", "icy-genre", "icy-br"):
+                if response.headers.get(header):
+                    self.properties[header] = response.headers[header]
+            metaint = int(response.headers.get("icy-metaint", 0))
+            started = False
+            while True:
+                audio = response.read(metaint or 4096)
+                if not audio:
+                    break
+                if not started:
+                    started = True
+                    self.properties.update({"playback-time": 0.0, "core-idle": False})
+                    self.emit("playback-restart")
+                if metaint:
+                    length = response.read(1)[0] * 16
+                    text = response.read(length).rstrip(b"\0").decode(errors="replace")
+                    if text.startswith("StreamTitle='"):
+                        self.properties["icy-title"] = text[len("StreamTitle='"):].split("';", 1)[0]
+        # Server closed the stream: mpv reports the demuxer EOF, then exits (no --idle)
+        self.emit_json({"event": "end-file", "reason": "eof"})
+
+    def run(self) -> int:
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if os.path.exists(self.ipc_path):
+            os.unlink(self.ipc_path)  # Like mpv, replace a socket left by a crashed instance
+        server.bind(self.ipc_path)
+        server.listen(16)
+        threading.Thread(target=self.serve_ipc, args=(server,), daemon=True).start()
+        # Volume and other runtime commands arrive on stdin, like real mpv's input
+        threading.Thread(target=sys.stdin.read, daemon=True).start()
+        try:
+            self.read_stream()
+        except Exception as e:
+            print(f"fake mpv: {e}", file=sys.stderr)
+            return 2
+        return 0
+
+
+def main(argv) -> int:
+    tool, args = argv[1], argv[2:]
+    if tool == "bluetoothctl":
+        return bluetoothctl(args)
+    if tool == "avahi-browse":
+        return avahi_browse(args)
+    if tool == "mpv":
+        return FakeMpv(args).run()
+    print(f"Unknown fake tool: {tool}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
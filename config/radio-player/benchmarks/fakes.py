@@ -0,0 +1,287 @@
+"""
+Local Fakes - Radio Browser, ICY stream and RAOP receiver stand-ins
+Everything listens on 127.0.0.1 so benchmark runs are repeatable and offline
+"""
+
+import asyncio
+import json
+import os
+import random
+import stat
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+BENCH_DIR = Path(__file__).resolve().parent
+
+GENRES = ("jazz", "rock", "pop", "news", "classical", "ambient", "talk", "dance")
+COUNTRIES = ("Germany", "France", "Finland", "Austria", "Netherlands", "United Kingdom")
+
+
+async def _start_site(app: web.Application, port: int = 0) -> Tuple[web.AppRunner, int]:
+    """Serve an aiohttp app on loopback, returning the runner and bound port"""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    return runner, runner.addresses[0][1]
+
+
+class FakeRadioBrowser:
+    """Radio Browser mirror with a deterministic catalogue, latency and failures"""
+
+    def __init__(self, stations: int = 2000, latency: float = 0.05, jitter: float = 0.5,
+                 failure_rate: float = 0.0, seed: int = 1):
+        self.latency = latency            # Base response delay in seconds
+        self.jitter = jitter              # +/- fraction of latency
+        self.failure_rate = failure_rate  # Share of requests answered with a 503
+        self.random = random.Random(seed)
+        self.station_count = stations
+        self.stream_base = "http://127.0.0.1:1/stream"  # Set once the ICY server runs
+        self.stats = {"requests": 0, "failures": 0}
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    def _station(self, index: int) -> Dict:
+        genre = GENRES[index % len(GENRES)]
+        return {
+            "stationuuid": f"00000000-0000-4000-8000-{index:012d}",
+            "name": f"Bench {genre.title()} Radio {index}",
+            "url": f"{self.stream_base}/{index}",
+            "url_resolved": f"{self.stream_base}/{index}",
+            "favicon": "",
+            "country": COUNTRIES[index % len(COUNTRIES)],
+            "language": "english",
+            "tags": f"{genre},bench",
+            "bitrate": 128,
+            "codec": "MP3",
+            "clickcount": self.station_count - index,
+        }
+
+    async def _respond(self, request: web.Request, indexes: List[int]) -> web.Response:
+        self.stats["requests"] += 1
+        delay = self.latency * (1 + self.random.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(max(0.0, delay))
+        if self.random.random() < self.failure_rate:
+            self.stats["failures"] += 1
+            return web.Response(status=503, text="Service Unavailable")
+
+        limit = int(request.query.get("limit", 100))
+        offset = int(request.query.get("offset", 0))
+        page = [self._station(i) for i in indexes[offset:offset + limit]]
+        return web.Response(body=json.dumps(page).encode(), content_type="application/json")
+
+    async def _search(self, request: web.Request) -> web.Response:
+        name = request.query.get("name", "").lower()
+        tag = request.query.get("tag", "").lower()
+        indexes = [i for i in range(self.station_count)
+                   if (not tag or GENRES[i % len(GENRES)] == tag)
+                   and (not name or name in self._station(i)["name"].lower() or name in str(i))]
+        return await self._respond(request, indexes)
+
+    async def _topclick(self, request: web.Request) -> web.Response:
+        return await self._respond(request, list(range(self.station_count)))
+
+    async def _byuuid(self, request: web.Request) -> web.Response:
+        indexes = []
+        for uuid in request.query.get("uuids", "").split(","):
+            try:
+                indexes.append(int(uuid.rsplit("-", 1)[1]))
+            except (IndexError, ValueError):
+                continue
+        return await self._respond(request, [i for i in indexes if i < self.station_count])
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/json/stations/search", self._search)
+        app.router.add_get("/json/stations/topclick", self._topclick)
+        app.router.add_get("/json/stations/byuuid", self._byuuid)
+        self.runner, port = await _start_site(app)
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+
+
+class IcyStreamServer:
+    """Endless MP3 stream with ICY metadata and a scripted list of track titles"""
+
+    # One silent MPEG-1 Layer III frame: 128 kbps, 44.1 kHz, stereo (417 bytes)
+    FRAME = b"\xff\xfb\x90\x00" + bytes(413)
+
+    def __init__(self, titles: Optional[List[str]] = None, title_interval: float = 5.0,
+                 bitrate: int = 128, metaint: int = 16000, burst_seconds: float = 2.0):
+        self.titles = titles or [f"Bench Artist {n} - Track {n}" for n in range(1, 9)]
+        self.title_interval = title_interval
+        self.bitrate = bitrate
+        self.metaint = metaint
+        self.burst_seconds = burst_seconds  # Sent up front, like a real server's buffer
+        self.started = time.monotonic()
+        self.stats = {"listeners": 0, "connections": 0, "bytes": 0, "refused": 0}
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ""
+        self._transports = set()  # Open listener connections, for drop()
+        self._refuse_until = 0.0
+
+    def current_title(self) -> str:
+        index = int((time.monotonic() - self.started) / self.title_interval)
+        return self.titles[index % len(self.titles)]
+
+    def _metadata_block(self) -> bytes:
+        text = f"StreamTitle='{self.current_title()}';".encode()
+        blocks = -(-len(text) // 16)
+        return bytes([blocks]) + text.ljust(blocks * 16, b"\0")
+
+    def drop(self, refuse_for: float = 0.0) -> int:
+        """Cut every listener (a Wi-Fi blip) and answer 503 for `refuse_for` seconds"""
+        self._refuse_until = time.monotonic() + refuse_for
+        dropped = len(self._transports)
+        for transport in list(self._transports):
+            transport.close()
+        return dropped
+
+    async def _stream(self, request: web.Request) -> web.StreamResponse:
+        if time.monotonic() < self._refuse_until:
+            self.stats["refused"] += 1
+            return web.Response(status=503)
+        with_metadata = request.headers.get("Icy-MetaData") == "1"
+        headers = {
+            "Content-Type": "audio/mpeg",
+            "icy-name": f"Bench Stream {request.match_info['name']}",
+            "icy-genre": "bench",
+            "icy-br": str(self.bitrate),
+        }
+        if with_metadata:
+            headers["icy-metaint"] = str(self.metaint)
+
+        response = web.StreamResponse(headers=headers)
+        await response.prepare(request)
+        self.stats["connections"] += 1
+        self.stats["listeners"] += 1
+        transport = request.transport
+        self._transports.add(transport)
+
+        byte_rate = self.bitrate * 1000 // 8
+        audio = self.FRAME * (byte_rate // len(self.FRAME) + 1)
+        until_meta = self.metaint
+        budget = byte_rate * self.burst_seconds
+        last = time.monotonic()
+        try:
+            while True:
+                now = time.monotonic()
+                budget += (now - last) * byte_rate
+                last = now
+                while budget >= 4096:
+                    chunk = audio[:min(4096, until_meta)] if with_metadata else audio[:4096]
+                    await response.write(chunk)
+                    self.stats["bytes"] += len(chunk)
+                    budget -= len(chunk)
+                    until_meta -= len(chunk)
+                    if with_metadata and until_meta == 0:
+                        await response.write(self._metadata_block())
+                        until_meta = self.metaint
+                await asyncio.sleep(0.1)
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            self.stats["listeners"] -= 1
+            self._transports.discard(transport)
+        return response
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/stream/{name}", self._stream)
+        self.runner, port = await _start_site(app)
+        self.url = f"http://127.0.0.1:{port}/stream"
+        return self.url
+
+    async def stop(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+
+
+class RaopSink:
+    """Loopback Airplay receivers: answer every RTSP request and swallow audio"""
+
+    def __init__(self, receivers: int = 2):
+        self.receivers = receivers  # One per loopback address, 127.0.0.1 upwards
+        self.servers: List[asyncio.AbstractServer] = []
+        self.port = 0
+        self.stats = {"connections": 0, "requests": 0, "methods": {}}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode(errors="replace").strip()
+                    if not line:
+                        break
+                    key, _, value = line.partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length:
+                    await reader.readexactly(length)
+
+                method = request_line.decode(errors="replace").split(" ", 1)[0]
+                self.stats["requests"] += 1
+                self.stats["methods"][method] = self.stats["methods"].get(method, 0) + 1
+                reply = [
+                    "RTSP/1.0 200 OK",
+                    f"CSeq: {headers.get('cseq', '0')}",
+                    "Audio-Jack-Status: connected; type=analog",
+                    "Server: AirTunes/105.1",
+                ]
+                if method == "SETUP":
+                    reply.append(f"Transport: RTP/AVP/UDP;unicast;mode=record;server_port={self.port};"
+                                 f"control_port={self.port};timing_port={self.port}")
+                    reply.append("Session: 1")
+                writer.write(("\r\n".join(reply) + "\r\n\r\n").encode())
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> int:
+        for n in range(self.receivers):
+            server = await asyncio.start_server(self._handle, f"127.0.0.{n + 1}", self.port)
+            self.port = server.sockets[0].getsockname()[1]
+            self.servers.append(server)
+        return self.port
+
+    async def stop(self) -> None:
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+
+
+def install_fake_tools(bin_dir: Path, tools=("bluetoothctl", "avahi-browse", "mpv")) -> Path:
+    """Write PATH shims that run benchmarks/fake_tools.py in place of the real tools"""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for tool in tools:
+        shim = bin_dir / tool
+        shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{BENCH_DIR / "fake_tools.py"}" {tool} "$@"\n')
+        shim.chmod(shim.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return bin_dir
+
+
+def fake_tools_env(bin_dir: Path, raop_port: int, bluetooth_devices: int = 3,
+                   airplay_devices: int = 2, tool_delay: float = 0.0) -> Dict[str, str]:
+    """Environment that puts the shims first on PATH and configures them"""
+    return {
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        "BENCH_RAOP_PORT": str(raop_port),
+        "BENCH_BT_DEVICES": str(bluetooth_devices),
+        "BENCH_AIRPLAY_DEVICES": str(airplay_devices),
+        "BENCH_TOOL_DELAY": str(tool_delay),
+    }
@@ -0,0 +1,405 @@
+"""
+Benchmark Runner - Drives the app against local fakes and reports p50/p99 latencies
+Usage (from config/radio-player):
+    python -m benchmarks.run                    # run and compare with baseline.json
+    python -m benchmarks.run --save-baseline    # record a new baseline
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.fakes import (FakeRadioBrowser, IcyStreamServer, RaopSink, fake_tools_env,
+                              install_fake_tools)
+
+APP_DIR = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+QUERIES = ("jazz", "rock", "pop", "news", "classical", "ambient", "talk", "dance", "radio 1", "radio 2")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: List[float], errors: int = 0) -> Dict:
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p90_ms": round(percentile(samples, 90) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+class Bench:
+    """One benchmark run: fakes, an app server process and the scenarios"""
+
+    def __init__(self, args):
+        self.args = args
+        self.radio_browser = FakeRadioBrowser(stations=args.stations, latency=args.upstream_latency,
+                                              failure_rate=args.failure_rate)
+        self.icy = IcyStreamServer(title_interval=args.title_interval)
+        self.raop = RaopSink(receivers=args.airplay_devices)
+        self.workdir = Path(tempfile.mkdtemp(prefix="cheeky-bench-"))
+        self.server: Optional[subprocess.Popen] = None
+        self.base_url = f"http://127.0.0.1:{args.port}"
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        await self.radio_browser.start()
+        self.radio_browser.stream_base = await self.icy.start()
+        await self.raop.start()
+
+        bin_dir = install_fake_tools(self.workdir / "bin")
+        env = dict(os.environ)
+        env.update(fake_tools_env(bin_dir, self.raop.port, bluetooth_devices=self.args.bluetooth_devices,
+                                  airplay_devices=self.args.airplay_devices,
+                                  tool_delay=self.args.tool_delay))
+        env.update({
+            "CHEEKY_CONFIG": str(self.workdir / "config"),
+            "CHEEKY_RADIO_BROWSER": self.radio_browser.url,
+            "CHEEKY_TIMESHIFT_DIR": str(self.workdir / "timeshift"),
+            "CHEEKY_RECORDINGS_DIR": str(self.workdir / "recordings"),
+            "PYTHONUNBUFFERED": "1",
+        })
+        log = open(self.workdir / "server.log", "wb")
+        self.server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(self.args.port), "--log-level", "warning"],
+            cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.args.concurrency))
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                async with self.session.get(f"{self.base_url}/health") as resp:
+                    if resp.status == 200:
+                        break
+            except aiohttp.ClientError:
+                pass
+            if self.server.poll() is not None or time.monotonic() > deadline:
+                self.args.keep = True
+                raise RuntimeError(f"App server did not start, see {self.workdir / 'server.log'}")
+            await asyncio.sleep(0.1)
+
+    async def stop(self) -> None:
+        if self.session:
+            await self.session.close()
+        if self.server:
+            self.server.terminate()
+            try:
+                self.server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.server.kill()
+        await self.raop.stop()
+        await self.icy.stop()
+        await self.radio_browser.stop()
+        if not self.args.keep:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    async def _timed(self, method: str, path: str, **kwargs) -> Optional[float]:
+        """Latency of one request, or None when it failed"""
+        started = time.perf_counter()
+        try:
+            async with self.session.request(method, f"{self.base_url}{path}", **kwargs) as resp:
+                await resp.read()
+                if resp.status >= 400:
+                    return None
+        except aiohttp.ClientError:
+            return None
+        return time.perf_counter() - started
+
+    async def _load(self, requests: List[Dict]) -> Dict:
+        """Run requests with bounded concurrency"""
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        samples, errors = [], 0
+
+        async def one(request):
+            nonlocal errors
+            async with semaphore:
+                latency = await self._timed(**request)
+            if latency is None:
+                errors += 1
+            else:
+                samples.append(latency)
+
+        await asyncio.gather(*(one(r) for r in requests))
+        return summarize(samples, errors)
+
+    async def search(self) -> Dict:
+        """Mixed cold and cached searches (QUERIES repeat, pages vary)"""
+        return await self._load([
+            {"method": "GET", "path": "/api/stations/search",
+             "params": {"q": QUERIES[n % len(QUERIES)], "limit": 20, "offset": 20 * (n // 50 % 5)}}
+            for n in range(self.args.requests)
+        ])
+
+    async def device_listing(self) -> Dict:
+        """Bluetooth and Airplay device listing (spawns the fake tools)"""
+        paths = ("/api/bluetooth/devices", "/api/airplay/devices")
+        return await self._load([
+            {"method": "GET", "path": paths[n % 2]} for n in range(max(2, self.args.requests // 10))
+        ])
+
+    async def play(self) -> Dict:
+        """Sequential station changes; also reports time to first audio from the play timeline"""
+        samples, first_audio, errors = [], [], 0
+        for n in range(self.args.plays):
+            latency = await self._timed("POST", "/api/player/play", json={
+                "station_uuid": f"00000000-0000-4000-8000-{n:012d}",
+                "station_name": f"Bench Radio {n}",
+                "stream_url": f"{self.icy.url}/{n}",
+            })
+            if latency is None:
+                errors += 1
+                continue
+            samples.append(latency)
+            await asyncio.sleep(self.args.play_settle)
+
+        async with self.session.get(f"{self.base_url}/api/player/timeline") as resp:
+            timelines = (await resp.json()).get("timelines", [])
+        for timeline in timelines[:len(samples)]:
+            event = next((e for e in timeline["events"] if e["event"] == "first audio"), None)
+            if event:
+                first_audio.append(event["ms"] / 1000)
+
+        await self._timed("POST", "/api/player/stop")
+        result = summarize(samples, errors)
+        result["first_audio"] = summarize(first_audio)
+        return result
+
+    async def airplay_connect(self) -> Dict:
+        """Connect to and disconnect from the loopback RAOP sink"""
+        samples, errors = [], 0
+        for n in range(max(1, self.args.plays)):
+            latency = await self._timed("POST", "/api/airplay/connect", json={
+                "address": f"127.0.0.{n % self.args.airplay_devices + 1}", "port": self.raop.port,
+                "name": f"Bench Receiver {n}"
+            })
+            await self._timed("POST", "/api/airplay/disconnect")
+            if latency is None:
+                errors += 1
+            else:
+                samples.append(latency)
+        return summarize(samples, errors)
+
+    async def stream_drop(self) -> Dict:
+        """Cut the station's connection mid-play; time until audio flows again"""
+        events: List[Dict] = []
+        ws_session = aiohttp.ClientSession()
+        ws = await ws_session.ws_connect(f"{self.base_url.replace('http', 'ws')}/ws")
+
+        async def listen():
+            async for message in ws:
+                data = json.loads(message.data)
+                if data.get("type") == "playback_status" and "reconnecting" in data:
+                    events.append(data)
+
+        listener = asyncio.create_task(listen())
+        await self._timed("POST", "/api/player/play", json={
+            "station_uuid": "00000000-0000-4000-8000-00000000d809", "station_name": "Bench Drop",
+            "stream_url": f"{self.icy.url}/drop",
+        })
+        await asyncio.sleep(self.args.play_settle + 2)
+        async with self.session.get(f"{self.base_url}/api/debug/processes") as resp:
+            mpv_pid = next((c["pid"] for c in (await resp.json())["children"] if c["name"] == "mpv"), None)
+
+        samples, errors = [], 0
+        for _ in range(self.args.drops):
+            events.clear()
+            dropped_at = time.perf_counter()
+            self.icy.drop(refuse_for=self.args.drop_seconds)
+            deadline = time.monotonic() + self.args.drop_seconds + 60
+            while time.monotonic() < deadline and not any(e["reconnecting"] is False for e in events):
+                await asyncio.sleep(0.01)
+            if any(e["reconnecting"] is False for e in events):
+                samples.append(time.perf_counter() - dropped_at)
+            else:
+                errors += 1
+            await asyncio.sleep(self.args.play_settle)
+
+        async with self.session.get(f"{self.base_url}/api/debug/processes") as resp:
+            mpv = [c for c in (await resp.json())["children"] if c["name"] == "mpv"]
+        await self._timed("POST", "/api/player/stop")
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        await ws_session.close()
+
+        result = summarize(samples, errors)
+        # The relay should hide the drop from mpv entirely: same process throughout
+        result["mpv_restarted"] = not mpv or mpv[0]["pid"] != mpv_pid
+        return result
+
+    async def websocket_fanout(self) -> Dict:
+        """Time from a volume POST to each WebSocket client receiving the broadcast"""
+        received: Dict[int, List[float]] = {}
+        ready = asyncio.Event()
+        connected = 0
+
+        # WebSockets hold their connection, so they get a pool without a size limit
+        ws_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0))
+
+        async def client():
+            nonlocal connected
+            async with ws_session.ws_connect(f"{self.base_url.replace('http', 'ws')}/ws") as ws:
+                connected += 1
+                if connected == self.args.ws_clients:
+                    ready.set()
+                async for message in ws:
+                    data = json.loads(message.data)
+                    if data.get("type") == "volume_change":
+                        received.setdefault(data["volume"], []).append(time.perf_counter())
+
+        clients = [asyncio.create_task(client()) for _ in range(self.args.ws_clients)]
+        await asyncio.wait_for(ready.wait(), timeout=30)
+
+        samples, errors = [], 0
+        for n in range(self.args.broadcasts):
+            volume = n % 101
+            received.pop(volume, None)
+            sent = time.perf_counter()
+            if await self._timed("POST", "/api/player/volume", json={"volume": volume}) is None:
+                errors += 1
+                continue
+            deadline = time.monotonic() + 5
+            while len(received.get(volume, ())) < self.args.ws_clients and time.monotonic() < deadline:
+                await asyncio.sleep(0.001)
+            arrivals = received.get(volume, [])
+            errors += self.args.ws_clients - len(arrivals)
+            samples.extend(arrival - sent for arrival in arrivals)
+
+        for task in clients:
+            task.cancel()
+        await asyncio.gather(*clients, return_exceptions=True)
+        await ws_session.close()
+        return summarize(samples, errors)
+
+    async def run(self) -> Dict:
+        scenarios = {
+            "search": self.search,
+            "device_listing": self.device_listing,
+            "play": self.play,
+            "airplay_connect": self.airplay_connect,
+            "websocket_fanout": self.websocket_fanout,
+            "stream_drop": self.stream_drop,
+        }
+        selected = self.args.only or list(scenarios)
+        results = {}
+        try:
+            await self.start()
+            for name in selected:
+                print(f"[Bench] {name}...", flush=True)
+                results[name] = await scenarios[name]()
+        finally:
+            await self.stop()
+        return {
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu": platform.machine()},
+            "settings": {key: getattr(self.args, key) for key in (
+                "requests", "concurrency", "plays", "ws_clients", "broadcasts", "drops", "drop_seconds",
+                "upstream_latency", "failure_rate", "tool_delay")},
+            "upstream": dict(self.radio_browser.stats),
+            "scenarios": results,
+        }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions: p50/p99 slower than baseline by more than the tolerance"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            # A 5 ms floor keeps scheduler noise on millisecond scenarios from failing the run
+            limit = max(base[key] * (1 + tolerance), base[key] + 5.0)
+            if current[key] > limit:
+                regressions.append(f"{name} {key}: {current[key]:.1f} ms > {limit:.1f} ms "
+                                   f"(baseline {base[key]:.1f} ms)")
+    return regressions
+
+
+def print_report(results: Dict, baseline: Optional[Dict]) -> None:
+    print(f"\n{'scenario':<20}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'base p99':>10}")
+    for name, result in results["scenarios"].items():
+        base = (baseline or {}).get("scenarios", {}).get(name, {}).get("p99_ms")
+        base_text = f"{base:.1f}" if base is not None else "-"
+        print(f"{name:<20}{result['count']:>7}{result['errors']:>8}"
+              f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{base_text:>10}")
+        if "first_audio" in result:
+            fa = result["first_audio"]
+            print(f"{'  first audio':<20}{fa['count']:>7}{'':>8}{fa['p50_ms']:>10.1f}{fa['p99_ms']:>10.1f}")
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options for the app server and fakes, shared by every benchmark tool"""
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--stations", type=int, default=2000)
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--tool-delay", type=float, default=0.0)
+    parser.add_argument("--title-interval", type=float, default=5.0)
+    parser.add_argument("--bluetooth-devices", type=int, default=3)
+    parser.add_argument("--airplay-devices", type=int, default=2)
+    parser.add_argument("--keep", action="store_true", help="Keep the work dir (server.log, config)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cheeky benchmark suite (local fakes, no network)")
+    add_server_arguments(parser)
+    parser.add_argument("--requests", type=int, default=500, help="Search requests")
+    parser.add_argument("--plays", type=int, default=10)
+    parser.add_argument("--play-settle", type=float, default=1.0, help="Seconds between plays")
+    parser.add_argument("--ws-clients", type=int, default=50)
+    parser.add_argument("--broadcasts", type=int, default=50)
+    parser.add_argument("--drops", type=int, default=5, help="Upstream drops in stream_drop")
+    parser.add_argument("--drop-seconds", type=float, default=2.0, help="How long the station refuses reconnects")
+    parser.add_argument("--only", nargs="+", choices=(
+        "search", "device_listing", "play", "airplay_connect", "websocket_fanout", "stream_drop"))
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown (0.5 = +50%%)")
+    parser.add_argument("--json", type=Path, help="Also write the results here")
+    args = parser.parse_args()
+
+    results = asyncio.run(Bench(args).run())
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    print_report(results, baseline)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\n[Bench] Baseline saved to {args.baseline}")
+        return 0
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"[Bench] REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+WebSocket Load - How many panels and phones can one server keep up to date?
+Opens hundreds of /ws connections (some of them deliberately slow readers),
+fires volume and favorites bursts through the REST API and measures delivery
+latency plus the server's CPU and memory per connection.
+Usage (from config/radio-player):
+    python -m benchmarks.websocket_load --clients 50 100 200 400 --slow-readers 5
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import resource
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import aiohttp
+
+from benchmarks.run import Bench, add_server_arguments, summarize
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = resource.getpagesize()
+
+
+def process_usage(pid: int) -> Tuple[float, int]:
+    """CPU seconds used and resident bytes of a process (Linux /proc)"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+    with open(f"/proc/{pid}/statm") as f:
+        rss = int(f.read().split()[1]) * PAGE_SIZE
+    return cpu, rss
+
+
+class WebSocketLoad(Bench):
+    """Ramps WebSocket clients up in steps and measures each step"""
+
+    def __init__(self, args):
+        super().__init__(args)
+        self.ws_session = None
+        self.clients: List[asyncio.Task] = []
+        self.slow: List[asyncio.Task] = []
+        self.slow_closed = 0
+        self.connected = 0
+        self.received: Dict[Tuple[str, str], List[float]] = {}
+        self.idle_rss = 0
+
+    async def _client(self) -> None:
+        """Fast reader: timestamps every volume and favorites broadcast"""
+        async with self.ws_session.ws_connect(f"{self.base_url.replace('http', 'ws')}/ws") as ws:
+            self.connected += 1
+            async for message in ws:
+                data = json.loads(message.data)
+                kind = data.get("type")
+                if kind == "volume_change":
+                    key = (kind, str(data["volume"]))
+                elif kind == "favorites_updated":
+                    key = (kind, data["station_uuid"])
+                else:
+                    continue
+                self.received.setdefault(key, []).append(time.perf_counter())
+
+    async def _slow_reader(self) -> None:
+        """Raw WebSocket that drains its socket a few hundred bytes at a time"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", self.args.port))
+        reader, writer = await asyncio.open_connection(sock=sock, limit=1024)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET /ws HTTP/1.1\r\nHost: 127.0.0.1:{self.args.port}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                      f"Sec-WebSocket-Version: 13\r\n\r\n").encode())
+        await writer.drain()
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            while True:
+                if not await reader.read(self.args.slow_bytes):
+                    break
+                await asyncio.sleep(self.args.slow_interval)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.slow_closed += 1
+            writer.close()
+
+    async def _connect(self, total: int) -> None:
+        """Open fast clients until `total` are connected"""
+        wanted = total - len(self.clients)
+        target = self.connected + wanted
+        for _ in range(wanted):
+            self.clients.append(asyncio.create_task(self._client()))
+        deadline = time.monotonic() + 60
+        while self.connected < target and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def _burst(self, kind: str, size: int, serial: int) -> Dict[Tuple[str, str], float]:
+        """Fire `size` concurrent REST calls; returns send time per broadcast key"""
+        sent = {}
+        requests = []
+        for n in range(size):
+            if kind == "volume_change":
+                volume = (serial * size + n) % 101
+                key = (kind, str(volume))
+                requests.append({"method": "POST", "path": "/api/player/volume", "json": {"volume": volume}})
+            else:
+                uuid = f"00000000-0000-4000-9000-{serial * size + n:012d}"
+                key = (kind, uuid)
+                requests.append({"method": "POST", "path": "/api/favorites", "json": {
+                    "uuid": uuid, "name": f"Load Station {n}", "url": f"{self.icy.url}/{n}",
+                    "favicon": "", "country": "Germany", "tags": ["load"], "bitrate": 128,
+                }})
+            self.received.pop(key, None)
+            sent[key] = time.perf_counter()
+        await asyncio.gather(*(self._timed(**request) for request in requests))
+        return sent
+
+    async def _step(self, clients: int) -> Dict:
+        await self._connect(clients)
+        await asyncio.sleep(1)  # Let connection setup settle before sampling
+        cpu_before, rss = process_usage(self.server.pid)
+        started = time.perf_counter()
+
+        latencies: Dict[str, List[float]] = {"volume_change": [], "favorites_updated": []}
+        lost = {kind: 0 for kind in latencies}
+        for serial in range(self.args.bursts):
+            for kind in latencies:
+                sent = await self._burst(kind, self.args.burst_size, serial)
+                deadline = time.monotonic() + self.args.deliver_timeout
+                while time.monotonic() < deadline and any(
+                        len(self.received.get(key, ())) < self.connected for key in sent):
+                    await asyncio.sleep(0.005)
+                for key, sent_at in sent.items():
+                    arrivals = self.received.pop(key, [])
+                    lost[kind] += max(0, self.connected - len(arrivals))
+                    latencies[kind].extend(arrival - sent_at for arrival in arrivals)
+
+        elapsed = time.perf_counter() - started
+        cpu_after, rss_after = process_usage(self.server.pid)
+        delivered = sum(len(samples) for samples in latencies.values())
+        cpu = cpu_after - cpu_before
+        return {
+            "clients": self.connected,
+            "slow_readers": len(self.slow) - self.slow_closed,
+            "delivery": {kind: summarize(samples, lost[kind]) for kind, samples in latencies.items()},
+            "server": {
+                "rss_mb": round(max(rss, rss_after) / 1e6, 1),
+                "kb_per_client": round((max(rss, rss_after) - self.idle_rss) / 1024 / max(1, self.connected), 1),
+                "cpu_percent": round(cpu / elapsed * 100, 1),
+                "cpu_ms_per_1k_deliveries": round(cpu * 1000 / max(1, delivered) * 1000, 1),
+            },
+        }
+
+    async def run(self) -> Dict:
+        steps = []
+        try:
+            await self.start()
+            self.ws_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0))
+            await asyncio.sleep(2)  # Background device discovery runs right after startup
+            self.idle_rss = process_usage(self.server.pid)[1]
+            self.slow = [asyncio.create_task(self._slow_reader()) for _ in range(self.args.slow_readers)]
+            for clients in sorted(self.args.clients):
+                print(f"[Bench] {clients} clients + {self.args.slow_readers} slow readers...", flush=True)
+                steps.append(await self._step(clients))
+        finally:
+            for task in self.clients + self.slow:
+                task.cancel()
+            await asyncio.gather(*self.clients, *self.slow, return_exceptions=True)
+            if self.ws_session:
+                await self.ws_session.close()
+            await self.stop()
+        return {
+            "settings": {key: getattr(self.args, key) for key in (
+                "slow_readers", "slow_bytes", "slow_interval", "bursts", "burst_size")},
+            "idle_rss_mb": round(self.idle_rss / 1e6, 1),
+            "steps": steps,
+        }
+
+
+def print_report(results: Dict) -> None:
+    print(f"\n{'clients':>8}{'slow':>6}{'type':>19}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'lost':>7}"
+          f"{'cpu %':>8}{'KB/client':>11}")
+    for step in results["steps"]:
+        for kind, delivery in step["delivery"].items():
+            print(f"{step['clients']:>8}{step['slow_readers']:>6}{kind:>19}{delivery['p50_ms']:>9.1f}"
+                  f"{delivery['p90_ms']:>9.1f}{delivery['p99_ms']:>9.1f}{delivery['errors']:>7}"
+                  f"{step['server']['cpu_percent']:>8.1f}{step['server']['kb_per_client']:>11.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="WebSocket fan-out capacity test (local fakes)")
+    add_server_arguments(parser)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 100, 200, 400],
+                        help="Fast clients connected at each step")
+    parser.add_argument("--slow-readers", type=int, default=5)
+    parser.add_argument("--slow-bytes", type=int, default=256, help="Bytes a slow reader takes per read")
+    parser.add_argument("--slow-interval", type=float, default=0.5, help="Seconds between slow reads")
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--burst-size", type=int, default=10, help="Concurrent REST calls per burst")
+    parser.add_argument("--deliver-timeout", type=float, default=10.0)
+    parser.add_argument("--json", type=Path, help="Also write the results here")
+    args = parser.parse_args()
+
+    # Hundreds of sockets on each side; the server inherits the raised limit
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    results = asyncio.run(WebSocketLoad(args).run())
+    print_report(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,24 +4,38 @@ Cheeky Radio Player - FastAPI Backend
 A lightweight, modern web-based radio player for Raspberry Pi Zero W 2
 """
 
+import sys
+import time
+_process_start = time.perf_counter()
+
 import os
 import json
 import asyncio
 from pathlib import Path
 from typing import Optional
-from fastapi import FastAPI, WebSocket, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, WebSocket, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from backend.log import get_logger, setup_logging, shutdown_logging
+from backend.startup import StartupTimer, LazySubsystem
+from backend.assets import AssetBundle
+from backend.metrics import REGISTRY
+from backend.watchdog import LoopWatchdog
+from backend.profiler import SamplingProfiler
+from backend.supervisor import ProcessSupervisor
 from backend.config import ConfigManager
-from backend.player import PlayerController
-from backend.stations import StationsClient
 from backend.favorites import FavoritesManager
 from backend.recent import RecentManager
 from backend.websocket import WebSocketManager
-from backend.bluetooth import BluetoothManager
-from backend.airplay import AirplayManager
+
+# Queue-backed logging first, so every module's records go through it
+setup_logging()
+logger = get_logger(__name__)
+
+startup_timer = StartupTimer(_process_start)
+startup_timer.mark("imports")
 
 # ============================================================================
 # Configuration
@@ -45,9 +59,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize core components
+# Initialize core components (cheap ones now, heavy ones lazily - see below)
 config_mgr = ConfigManager(CONFIG_DIR)
 ws_manager = WebSocketManager()  # Init first so we can pass it to player
+favorites_mgr = FavoritesManager(CONFIG_DIR)
+recent_mgr = RecentManager(CONFIG_DIR)
+process_supervisor = ProcessSupervisor()  # Owns mpv, ffmpeg and raop_play
+startup_timer.mark("app + config")
 
 # Metadata callback for PlayerController - broadcasts metadata via WebSocket
 def on_metadata_update(metadata: dict):
@@ -57,12 +75,91 @@ def on_metadata_update(metadata: dict):
         "data": metadata
     }))
 
-player = PlayerController(config_mgr, metadata_callback=on_metadata_update)
-stations_client = StationsClient()
-favorites_mgr = FavoritesManager(CONFIG_DIR)
-recent_mgr = RecentManager(CONFIG_DIR)
-bluetooth_mgr = BluetoothManager()
-airplay_mgr = AirplayManager()
+def on_playback_status(status: dict):
+    """Callback when playback stops or reconnects without a request"""
+    asyncio.create_task(ws_manager.broadcast({
+        "type": "playback_status",
+        **status
+    }))
+
+def on_process_status(status: dict):
+    """Callback when a supervised child starts, exits or restarts"""
+    asyncio.create_task(ws_manager.broadcast({
+        "type": "process_status",
+        "process": status
+    }))
+
+process_supervisor.add_listener(on_process_status)
+
+# Heavy subsystems (aiohttp, subprocess managers, Airplay) are imported and built
+# on first use or by the background init stage, so / and /health answer first
+def _create_player():
+    from backend.player import PlayerController
+    return PlayerController(config_mgr, metadata_callback=on_metadata_update,
+                            status_callback=on_playback_status, supervisor=process_supervisor)
+
+def _create_stations_client():
+    from backend.stations import StationsClient
+    return StationsClient(
+        limit_per_host=int(os.getenv("CHEEKY_HTTP_PER_HOST", "4")),
+        dns_ttl=int(os.getenv("CHEEKY_HTTP_DNS_TTL", "300")),
+        keepalive=float(os.getenv("CHEEKY_HTTP_KEEPALIVE", "60")),
+        # Comma-separated mirror list, e.g. a local stand-in for benchmarks
+        servers=[s for s in os.getenv("CHEEKY_RADIO_BROWSER", "").split(",") if s] or None
+    )
+
+def _create_bluetooth_manager():
+    from backend.bluetooth import BluetoothManager
+    return BluetoothManager()
+
+def _create_airplay_manager():
+    from backend.airplay import AirplayManager
+    return AirplayManager()
+
+def _create_receiver_registry():
+    from backend.receivers import ReceiverRegistry
+    return ReceiverRegistry(bluetooth_mgr, airplay_mgr, player)
+
+def _create_recorder():
+    from backend.recorder import StreamRecorder
+    return StreamRecorder(
+        CONFIG_DIR,
+        recordings_dir=os.getenv("CHEEKY_RECORDINGS_DIR"),
+        max_mb=int(os.getenv("CHEEKY_RECORDINGS_MAX_MB", "1024"))
+    )
+
+async def _resolve_favicon_url(uuid: str) -> Optional[str]:
+    """Favicon URL for a station: saved favorites first, then Radio Browser"""
+    for station in await favorites_mgr.get_all():
+        if station.get("uuid") == uuid:
+            return station.get("favicon")
+    station = await stations_client.get_station(uuid)
+    return station.get("favicon") if station else None
+
+def _create_favicon_cache():
+    from backend.favicons import FaviconCache
+    return FaviconCache(
+        Path(os.getenv("CHEEKY_FAVICON_DIR", CONFIG_DIR / "favicons")),
+        _resolve_favicon_url,
+        max_mb=int(os.getenv("CHEEKY_FAVICON_MAX_MB", "20"))
+    )
+
+player = LazySubsystem("player", _create_player, startup_timer)
+stations_client = LazySubsystem("stations", _create_stations_client, startup_timer)
+bluetooth_mgr = LazySubsystem("bluetooth", _create_bluetooth_manager, startup_timer)
+airplay_mgr = LazySubsystem("airplay", _create_airplay_manager, startup_timer)
+receiver_registry = LazySubsystem("receivers", _create_receiver_registry, startup_timer)
+recorder = LazySubsystem("recorder", _create_recorder, startup_timer)
+favicon_cache = LazySubsystem("favicons", _create_favicon_cache, startup_timer)
+
+# Reports callbacks that block the event loop (CHEEKY_WATCHDOG=0 disables it)
+loop_watchdog = LoopWatchdog(threshold=int(os.getenv("CHEEKY_WATCHDOG_MS", "250")) / 1000)
+
+# Field diagnosis: /debug/profile only exists when CHEEKY_PROFILER=1
+profiler = SamplingProfiler() if os.getenv("CHEEKY_PROFILER", "0") == "1" else None
+
+# CHEEKY_STARTUP=eager builds everything before serving (the old behaviour)
+STARTUP_MODE = os.getenv("CHEEKY_STARTUP", "fast")
 
 # ============================================================================
 # Request/Response Models
@@ -88,30 +185,70 @@ class PlayRequest(BaseModel):
 class VolumeRequest(BaseModel):
     volume: int  # 0-100
 
+class SeekRequest(BaseModel):
+    seconds: float  # Seconds behind live (0 = live)
+
 class PlayerStatus(BaseModel):
     status: str  # "playing", "paused", "stopped"
+    reconnecting: bool = False  # Stream dropped; reconnecting while the cache plays out
     station: Optional[dict] = None
     volume: int
     metadata: Optional[dict] = None
+    timeshift: Optional[dict] = None
+
+class RecordRequest(BaseModel):
+    duration_minutes: Optional[int] = None  # None = until stopped
+
+class ScheduleRequest(BaseModel):
+    station_uuid: str
+    station_name: str
+    stream_url: str
+    start: str  # ISO timestamp, local time
+    duration_minutes: int
 
 class SearchResponse(BaseModel):
     stations: list
     total: int
+    total_exact: bool = False
+    has_more: bool = False
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 # ============================================================================
 # Station Management Endpoints
 # ============================================================================
 
+def _decode_cursor(cursor: str):
+    """(offset, limit) from a page cursor (imported lazily with the stations client)"""
+    from backend.stations import decode_cursor
+    return decode_cursor(cursor)
+
+def _search_response(results: dict) -> SearchResponse:
+    """Page of stations plus totals and cursors for the next/previous page"""
+    return SearchResponse(
+        stations=results["stations"],
+        total=results["total"],
+        total_exact=results["total_exact"],
+        has_more=results["has_more"],
+        next_cursor=results["next_cursor"],
+        prev_cursor=results["prev_cursor"]
+    )
+
 @app.get("/api/stations/search")
 async def search_stations(
     q: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None
 ):
     """Search radio stations by name, genre, or country"""
     try:
+        if cursor:
+            offset, limit = _decode_cursor(cursor)
         results = await stations_client.search(q, limit, offset)
-        return SearchResponse(stations=results["stations"], total=results["total"])
+        return _search_response(results)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -121,10 +258,13 @@ async def browse_stations(
     country: Optional[str] = None,
     language: Optional[str] = None,
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None
 ):
     """Browse stations by category"""
     try:
+        if cursor:
+            offset, limit = _decode_cursor(cursor)
         results = await stations_client.browse(
             genre=genre,
             country=country,
@@ -132,19 +272,46 @@ async def browse_stations(
             limit=limit,
             offset=offset
         )
-        return SearchResponse(stations=results["stations"], total=results["total"])
+        return _search_response(results)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/stations/popular")
 async def popular_stations(
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None
 ):
     """Get popular radio stations"""
     try:
+        if cursor:
+            offset, limit = _decode_cursor(cursor)
         results = await stations_client.popular(limit, offset)
-        return SearchResponse(stations=results["stations"], total=results["total"])
+        return _search_response(results)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/stations/stats")
+async def stations_stats():
+    """Station cache, lookup batching and connection reuse statistics"""
+    return stations_client.get_stats()
+
+@app.get("/api/stations/batch")
+async def get_stations_batch(uuids: str = Query(..., min_length=1)):
+    """Look up several stations (comma-separated uuids) in as few upstream calls as possible"""
+    requested = [u.strip() for u in uuids.split(",") if u.strip()]
+    if len(requested) > 200:
+        raise HTTPException(status_code=400, detail="At most 200 uuids per request")
+    try:
+        results = await stations_client.get_stations(requested)
+        return {
+            "stations": [station for station in results.values() if station],
+            "missing": [uuid for uuid, station in results.items() if not station]
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -159,6 +326,28 @@ async def get_station(uuid: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/favicons/stats")
+async def favicon_stats():
+    """Favicon cache occupancy and hit rate"""
+    return favicon_cache.get_stats()
+
+@app.get("/api/favicons/{uuid}")
+async def get_favicon(uuid: str):
+    """Station logo as a small locally cached thumbnail"""
+    try:
+        cached = await favicon_cache.get(uuid)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not cached:
+        raise HTTPException(status_code=404, detail="Favicon not available")
+    path, media_type = cached
+    # Logos come from untrusted station hosts: never let one run as a document
+    return FileResponse(path, media_type=media_type, headers={
+        "Cache-Control": "public, max-age=604800",
+        "Content-Security-Policy": "default-src 'none'",
+        "X-Content-Type-Options": "nosniff",
+    })
+
 # ============================================================================
 # Player Control Endpoints
 # ============================================================================
@@ -166,8 +355,9 @@ async def get_station(uuid: str):
 @app.post("/api/player/play")
 async def play_station(request: PlayRequest):
     """Start playing a station"""
+    requested_at = time.perf_counter()
     try:
-        await player.play(request.stream_url)
+        await player.play(request.stream_url, requested_at=requested_at)
 
         # Update recent history
         await recent_mgr.add(
@@ -202,6 +392,11 @@ async def play_station(request: PlayRequest):
         })
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/player/timeline")
+async def play_timelines():
+    """Startup milestones (ms since the request) of recent plays, newest first"""
+    return {"timelines": player.get_timelines()}
+
 @app.post("/api/player/pause")
 async def pause_playback():
     """Pause playback"""
@@ -259,6 +454,42 @@ async def set_volume(request: VolumeRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/player/seek")
+async def seek_playback(request: SeekRequest):
+    """Seek within the time-shift buffer (seconds behind live)"""
+    if request.seconds < 0:
+        raise HTTPException(status_code=400, detail="Seconds must be >= 0")
+    from backend.timeshift import TimeShiftInactive
+    try:
+        timeshift = await player.seek(request.seconds)
+        await ws_manager.broadcast({
+            "type": "playback_status",
+            "status": "playing",
+            "timeshift": timeshift
+        })
+        return {"status": "playing", "timeshift": timeshift}
+    except TimeShiftInactive as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/player/live")
+async def jump_to_live():
+    """Jump to the live edge of the time-shift buffer"""
+    from backend.timeshift import TimeShiftInactive
+    try:
+        timeshift = await player.jump_to_live()
+        await ws_manager.broadcast({
+            "type": "playback_status",
+            "status": "playing",
+            "timeshift": timeshift
+        })
+        return {"status": "playing", "timeshift": timeshift}
+    except TimeShiftInactive as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/player/status")
 async def get_player_status():
     """Get current player status"""
@@ -269,9 +500,11 @@ async def get_player_status():
 
         return PlayerStatus(
             status=status["status"],
+            reconnecting=status["reconnecting"],
             station=last_station,
             volume=volume,
-            metadata=status.get("metadata")
+            metadata=status.get("metadata"),
+            timeshift=status.get("timeshift")
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -324,14 +557,109 @@ async def remove_favorite(uuid: str):
 # ============================================================================
 
 @app.get("/api/recent")
-async def get_recent():
-    """Get recently played stations"""
+async def get_recent(hydrate: bool = False):
+    """Get recently played stations (with full station details if hydrate)"""
     try:
         recent = await recent_mgr.get_all()
+        if hydrate and recent:
+            stations = await stations_client.get_stations([entry["uuid"] for entry in recent])
+            recent = [{**(stations.get(entry["uuid"]) or {}), **entry} for entry in recent]
         return {"recent": recent}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ============================================================================
+# Recording Endpoints
+# ============================================================================
+
+@app.get("/api/recordings")
+async def get_recordings():
+    """List recorded files, active recordings and disk usage"""
+    try:
+        return await recorder.list_recordings()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/recordings/start")
+async def start_recording(request: RecordRequest):
+    """Record the currently playing station (tees the existing connection)"""
+    if not player.timeshift:
+        raise HTTPException(status_code=400, detail="Nothing playing through the time-shift relay")
+    try:
+        last_station = await config_mgr.get("last_station") or {}
+        status = await recorder.start(
+            player.timeshift,
+            last_station.get("name", "Recording"),
+            duration_minutes=request.duration_minutes
+        )
+        await ws_manager.broadcast({"type": "recording_started", "recording": status})
+        return status
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/recordings/stop")
+async def stop_recording():
+    """Stop the manual recording"""
+    try:
+        status = await recorder.stop()
+        if not status:
+            raise HTTPException(status_code=404, detail="No recording in progress")
+        await ws_manager.broadcast({"type": "recording_stopped", "recording": status})
+        return status
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/recordings/schedule")
+async def get_recording_schedule():
+    """Get scheduled recordings"""
+    try:
+        return {"schedule": await recorder.get_schedule()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/recordings/schedule")
+async def schedule_recording(request: ScheduleRequest):
+    """Schedule a recording"""
+    if request.duration_minutes <= 0:
+        raise HTTPException(status_code=400, detail="Duration must be positive")
+    try:
+        entry = await recorder.add_schedule(
+            request.station_uuid,
+            request.station_name,
+            request.stream_url,
+            request.start,
+            request.duration_minutes
+        )
+        return entry
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid start time: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/api/recordings/schedule/{schedule_id}")
+async def remove_scheduled_recording(schedule_id: str):
+    """Remove a scheduled recording"""
+    if not await recorder.remove_schedule(schedule_id):
+        raise HTTPException(status_code=404, detail="Scheduled recording not found")
+    return {"success": True, "message": "Scheduled recording removed"}
+
+@app.get("/api/recordings/files/{filename}")
+async def download_recording(filename: str):
+    """Download a recorded file"""
+    path = recorder.get_path(filename)
+    if not path:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    return FileResponse(path)
+
+@app.delete("/api/recordings/files/{filename}")
+async def delete_recording(filename: str):
+    """Delete a recorded file"""
+    if not await recorder.delete(filename):
+        raise HTTPException(status_code=404, detail="Recording not found")
+    return {"success": True, "message": "Recording deleted"}
+
 # ============================================================================
 # Bluetooth Management Endpoints
 # ============================================================================
@@ -341,6 +669,7 @@ async def get_bluetooth_devices():
     """Get list of paired Bluetooth devices"""
     try:
         devices = await bluetooth_mgr.get_devices()
+        receiver_registry.update("bluetooth", devices)
         return {"devices": devices}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -447,6 +776,7 @@ async def get_airplay_devices():
     """Discover available Airplay receiver devices"""
     try:
         devices = await airplay_mgr.discover_airplay_devices()
+        receiver_registry.update("airplay", devices)
 
         # Broadcast discovered devices to all connected WebSocket clients
         await ws_manager.broadcast({
@@ -461,6 +791,7 @@ async def get_airplay_devices():
 @app.post("/api/airplay/connect")
 async def connect_airplay(request: dict):
     """Connect to an Airplay receiver"""
+    global warm_up_task
     address = request.get("address")
     port = request.get("port", 5000)
     name = request.get("name", "Airplay Device")
@@ -477,6 +808,12 @@ async def connect_airplay(request: dict):
             "name": name
         })
 
+        # Handshake with the receiver in the background while the user picks a station
+        if result.get("status") == "connected":
+            if warm_up_task and not warm_up_task.done():
+                warm_up_task.cancel()
+            warm_up_task = asyncio.create_task(player.warm_up_airplay())
+
         await ws_manager.broadcast({
             "type": "airplay_connected",
             "device": result.get("device")
@@ -510,23 +847,22 @@ async def get_airplay_status():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/receivers")
-async def get_all_receivers():
-    """Get all available audio receivers (Bluetooth + Airplay)"""
+@app.get("/api/airplay/transcode")
+async def get_airplay_transcode_report():
+    """Get transcode profile and CPU cost per Airplay pipeline"""
     try:
-        bluetooth_devices = await bluetooth_mgr.get_devices()
-        airplay_devices = await airplay_mgr.discover_airplay_devices()
+        return player.transcode_planner.get_report()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return {
-            "receivers": {
-                "bluetooth": bluetooth_devices,
-                "airplay": airplay_devices
-            },
-            "connected": {
-                "type": "local",  # Default to local speaker
-                "device": None
-            }
-        }
+@app.get("/api/receivers")
+async def get_all_receivers(
+    refresh: bool = False,
+    deadline: float = Query(5.0, ge=0, le=30)
+):
+    """Get all available audio receivers (Bluetooth + Airplay), served from cache"""
+    try:
+        return await receiver_registry.get_receivers(refresh=refresh, deadline=deadline)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -545,7 +881,7 @@ async def websocket_endpoint(websocket: WebSocket):
             # Echo back or handle client messages
             await websocket.send_text(json.dumps({"type": "pong"}))
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.debug("WebSocket error: %s", e)
     finally:
         await ws_manager.disconnect(websocket)
 
@@ -560,15 +896,70 @@ templates_dir = Path(__file__).parent / "templates"
 if static_dir.exists():
     app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
+asset_bundle = AssetBundle(templates_dir)
+
+async def _asset_response(request: Request, name: str) -> Optional[Response]:
+    """Serve a bundled asset, honouring Accept-Encoding and If-None-Match"""
+    asset = await asset_bundle.get(name)
+    if not asset:
+        return None
+    status, body, headers = asset_bundle.select(
+        asset,
+        request.headers.get("accept-encoding", ""),
+        request.headers.get("if-none-match")
+    )
+    return Response(content=body, status_code=status, headers=headers,
+                    media_type=asset["media_type"] if status == 200 else None)
+
 @app.get("/")
-async def index():
+async def index(request: Request):
     """Serve the main SPA"""
-    index_file = templates_dir / "index.html"
-    if index_file.exists():
-        return FileResponse(index_file, media_type="text/html")
+    response = await _asset_response(request, "index.html")
+    if response:
+        return response
     else:
         return {"error": "Frontend not found"}
 
+@app.get("/assets/{name}")
+async def frontend_asset(name: str, request: Request):
+    """Serve fingerprinted CSS/JS split out of index.html"""
+    response = await _asset_response(request, name)
+    if not response or name == "index.html":
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return response
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of the hot-path counters and histograms"""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/debug/loop")
+async def debug_loop():
+    """Event-loop lag and the code paths that blocked the loop the longest"""
+    return loop_watchdog.get_report()
+
+@app.get("/api/debug/processes")
+async def debug_processes():
+    """Supervised children with CPU/RSS, per-command totals and recent exits"""
+    return process_supervisor.get_report()
+
+@app.get("/debug/profile")
+async def debug_profile(
+    seconds: float = Query(10, gt=0, le=120),
+    top: int = Query(20, ge=1, le=200),
+    format: str = Query("json", pattern="^(json|collapsed)$")
+):
+    """Sample the running server; format=collapsed feeds flamegraph.pl / speedscope"""
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiler disabled (set CHEEKY_PROFILER=1)")
+    try:
+        report = await profiler.profile(seconds, top)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "collapsed":
+        return Response(content=report["collapsed"], media_type="text/plain")
+    return report
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -614,18 +1005,22 @@ async def test_stations():
 # ============================================================================
 
 background_task = None
+init_task = None
+resume_task = None
+warm_up_task = None  # Airplay session warm-up after a receiver is selected
 
 async def poll_devices_background():
     """Continuously poll for new Airplay/Bluetooth devices"""
-    print("[Cheeky] Starting background device discovery...")
+    logger.info("Starting background device discovery...")
 
     while True:
         try:
             # Wait 60 seconds between scans
             await asyncio.sleep(60)
 
-            print("[Cheeky] Background scan: Discovering Airplay devices...")
+            logger.debug("Background scan: Discovering Airplay devices...")
             airplay_devices = await airplay_mgr.discover_airplay_devices()
+            receiver_registry.update("airplay", airplay_devices)
 
             # Broadcast updated device list to all connected clients
             await ws_manager.broadcast({
@@ -633,10 +1028,10 @@ async def poll_devices_background():
                 "airplay_devices": airplay_devices
             })
 
-            print(f"[Cheeky] Background scan: Found {len(airplay_devices)} Airplay devices")
+            logger.debug("Background scan: Found %s Airplay devices", len(airplay_devices))
 
         except Exception as e:
-            print(f"[Cheeky] Background device discovery error: {e}")
+            logger.error("Background device discovery error: %s", e)
             # Continue polling even on error
             await asyncio.sleep(60)
 
@@ -644,39 +1039,113 @@ async def poll_devices_background():
 # Startup & Shutdown
 # ============================================================================
 
+async def resume_last_station():
+    """Warm up (or, with autoplay, start) the last played station"""
+    last_station = await config_mgr.get("last_station")
+    if not last_station or not last_station.get("url"):
+        return
+
+    try:
+        if await config_mgr.get("autoplay", False):
+            logger.info("Autoplay: %s", last_station.get('name'))
+            await player.play(last_station["url"])
+            await ws_manager.broadcast({
+                "type": "playback_status",
+                "status": "playing",
+                "station": {
+                    "uuid": last_station.get("uuid"),
+                    "name": last_station.get("name"),
+                    "favicon": last_station.get("favicon")
+                }
+            })
+        else:
+            # DNS, TCP/TLS connect and the first seconds of audio, ready for play()
+            await player.prepare(last_station["url"])
+    except Exception as e:
+        logger.warning("Resume of last station failed: %s", e)
+
+async def init_subsystems():
+    """Background init stage: build deferred subsystems once the server is up"""
+    global background_task, resume_task
+
+    # Let uvicorn start accepting (and serve the first page) before the heavy work
+    await asyncio.sleep(0)
+
+    # Start on the network warm-up first so it overlaps the rest of boot
+    player.load()
+    with startup_timer.phase("restore volume"):
+        volume = await config_mgr.get("volume", 75)
+        await player.set_volume(volume)
+    resume_task = asyncio.create_task(resume_last_station())
+
+    for subsystem in (stations_client, recorder, bluetooth_mgr, airplay_mgr, receiver_registry):
+        subsystem.load()
+        await asyncio.sleep(0)  # Serve pending requests between phases
+
+    # Start background device discovery
+    background_task = asyncio.create_task(poll_devices_background())
+
+    # Resume watching scheduled recordings
+    recorder.start_scheduler()
+
+    logger.info("All subsystems ready")
+    startup_timer.report()
+
 @app.on_event("startup")
 async def startup():
     """Initialize on startup"""
-    global background_task
+    global init_task
 
-    print("[Cheeky] Radio Player starting...")
-    print(f"[Cheeky] Config directory: {CONFIG_DIR}")
+    logger.info("Radio Player starting...")
+    logger.info("Config directory: %s", CONFIG_DIR)
+    startup_timer.mark("server start")
 
-    # Load saved volume
-    volume = await config_mgr.get("volume", 75)
-    await player.set_volume(volume)
+    # Compress the frontend in a worker thread now rather than on the loop at the first /
+    if asset_bundle.index_file.exists():
+        asset_bundle.start_build()
 
-    # Start background device discovery
-    background_task = asyncio.create_task(poll_devices_background())
+    if STARTUP_MODE == "eager":
+        await init_subsystems()
+    else:
+        init_task = asyncio.create_task(init_subsystems())
 
-    print("[Cheeky] Radio Player ready!")
+    if os.getenv("CHEEKY_WATCHDOG", "1") != "0":
+        loop_watchdog.start()
+
+    logger.info("Radio Player ready!")
 
 @app.on_event("shutdown")
 async def shutdown():
     """Cleanup on shutdown"""
     global background_task
 
-    print("[Cheeky] Radio Player shutting down...")
-
-    # Cancel background task
-    if background_task:
-        background_task.cancel()
-        try:
-            await background_task
-        except asyncio.CancelledError:
-            pass
+    logger.info("Radio Player shutting down...")
+
+    # Cancel background tasks
+    await loop_watchdog.stop()
+
+    for task in (init_task, resume_task, warm_up_task, background_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    # Only clean up subsystems that were actually started
+    if recorder.initialized:
+        await recorder.close()
+    if favicon_cache.initialized:
+        await favicon_cache.close()
+    if player.initialized:
+        await player.stop()
+    # The pyatv streamer is imported lazily; don't pull pyatv in just to close it
+    raop_stream = sys.modules.get("backend.raop_stream")
+    if raop_stream:
+        await raop_stream.close_shared_pool()
+    await process_supervisor.stop_all()
 
-    await player.stop()
+    shutdown_logging()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,46 @@
+"""FavoritesManager: saved stations are independent of Radio Browser refreshes"""
+
+import asyncio
+import json
+
+from backend.favorites import FavoritesManager
+from backend.station import Station
+
+SAVED = {
+    "uuid": "fav-uuid", "name": "My Station", "url": "http://example.invalid/saved",
+    "favicon": "", "country": "Germany", "language": "german", "tags": ["jazz"],
+    "bitrate": 128, "codec": "MP3",
+}
+
+
+def refresh(**changes):
+    """Radio Browser payload for the saved station with some fields changed"""
+    raw = {"stationuuid": SAVED["uuid"], "name": SAVED["name"], "url": SAVED["url"],
+           "country": SAVED["country"], "tags": "jazz", "bitrate": 128, "codec": "MP3"}
+    raw.update(changes)
+    return Station.from_api(raw)
+
+
+def test_refresh_does_not_change_added_favorite(tmp_path):
+    favorites = FavoritesManager(tmp_path)
+    asyncio.run(favorites.add(SAVED))
+
+    cached = refresh(name="Renamed Upstream", url="http://example.invalid/new")
+    assert cached.name == "Renamed Upstream"
+
+    entry = asyncio.run(favorites.get_all())[0]
+    assert entry["name"] == "My Station"
+    assert entry["url"] == "http://example.invalid/saved"
+
+
+def test_refresh_is_not_written_to_favorites_file(tmp_path):
+    (tmp_path / "favorites.json").write_text(json.dumps({"favorites": [dict(SAVED, added_at="x")]}))
+    favorites = FavoritesManager(tmp_path)
+
+    cached = refresh(name="Renamed Upstream")
+    asyncio.run(favorites.add({"uuid": "other", "name": "Other", "url": "http://example.invalid/o"}))
+
+    saved = json.loads((tmp_path / "favorites.json").read_text())["favorites"]
+    assert saved[0]["name"] == "My Station"
+    assert saved[0]["added_at"] == "x"
+    assert cached.name == "Renamed Upstream"
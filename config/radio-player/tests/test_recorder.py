@@ -0,0 +1,63 @@
+"""StreamRecorder: schedule timestamps and relay lifecycle"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from backend.recorder import StreamRecorder, parse_start
+from backend.timeshift import TimeShiftSession
+
+
+def test_parse_start_keeps_naive_local_time():
+    assert parse_start("2026-10-19T20:00:00") == datetime(2026, 10, 19, 20, 0)
+
+
+def test_parse_start_converts_offsets_to_naive_local_time():
+    utc = datetime(2026, 10, 19, 18, 0, tzinfo=timezone.utc)
+    expected = utc.astimezone().replace(tzinfo=None)
+    for start in ("2026-10-19T18:00:00Z", "2026-10-19T18:00:00+00:00", "2026-10-19T20:00:00+02:00"):
+        parsed = parse_start(start)
+        assert parsed.tzinfo is None
+        assert parsed == expected
+
+
+def test_add_schedule_with_offset_is_comparable_with_now(tmp_path):
+    recorder = StreamRecorder(tmp_path)
+    entry = asyncio.run(recorder.add_schedule(
+        "uuid", "Station", "http://example.invalid/stream", "2099-10-19T18:00:00Z", 30))
+
+    start = datetime.fromisoformat(entry["start"])
+    assert start.tzinfo is None
+    assert start > datetime.now()  # Raised TypeError on every scheduler tick for aware starts
+
+    # Persisted naive as well
+    saved = json.loads((tmp_path / "recordings.json").read_text())["schedule"][0]
+    assert datetime.fromisoformat(saved["start"]).tzinfo is None
+
+
+def test_load_normalizes_old_entries_and_drops_bad_ones(tmp_path):
+    (tmp_path / "recordings.json").write_text(json.dumps({"schedule": [
+        {"id": "a", "start": "2026-10-19T18:00:00+00:00"},
+        {"id": "b", "start": "not a date"},
+        {"id": "c"},
+    ]}))
+    recorder = StreamRecorder(tmp_path)
+    schedule = asyncio.run(recorder.get_schedule())
+    assert [entry["id"] for entry in schedule] == ["a"]
+    assert datetime.fromisoformat(schedule[0]["start"]).tzinfo is None
+
+
+def test_recordings_split_on_relay_titles_and_stop_when_relay_closes(tmp_path):
+    async def run():
+        recorder = StreamRecorder(tmp_path, recordings_dir=tmp_path / "recordings")
+        session = TimeShiftSession("http://example.invalid/stream", 64 * 1024, buffer_dir=tmp_path)
+        await recorder.start(session, "Station")
+        recording = recorder.active["manual"]
+        assert recording.on_title in session.title_listeners
+
+        await session.close()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert recorder.active == {}
+
+    asyncio.run(run())
@@ -0,0 +1,185 @@
+"""TimeShiftBuffer ring and TimeShiftSession framing, seek and reader hand-over"""
+
+import asyncio
+import random
+import time
+
+from backend.timeshift import TimeShiftBuffer, TimeShiftSession
+
+URL = "http://example.invalid/stream"
+
+
+def test_reads_across_the_ring_wraparound(tmp_path):
+    rng = random.Random(29)
+    buffer = TimeShiftBuffer(tmp_path / "ring.buf", 1000)
+    stream = bytearray()
+    try:
+        for size in [rng.randint(1, 700) for _ in range(60)] + [2500, 3]:
+            chunk = bytes(rng.getrandbits(8) for _ in range(size))
+            buffer.write(chunk)
+            stream += chunk
+            assert buffer.written == len(stream)
+            assert buffer.oldest == max(0, len(stream) - 1000)
+
+            for _ in range(20):
+                offset = rng.randint(buffer.oldest, buffer.written)
+                size = rng.randint(1, 1200)
+                assert buffer.read(offset, size) == stream[offset:offset + size]
+    finally:
+        buffer.close()
+
+
+def test_snap_and_time_of_at_and_past_the_live_edge(tmp_path):
+    buffer = TimeShiftBuffer(tmp_path / "ring.buf", 1000)
+    try:
+        for offset, timestamp in ((0, 10.0), (300, 11.0), (600, 12.0)):
+            buffer.mark_boundary(offset, timestamp)
+        buffer.write(bytes(800))
+
+        assert buffer.snap(1) == 300
+        assert buffer.snap(600) == 600
+        # The live edge sits mid-block, so it snaps back to the last boundary
+        for offset in (700, 800, 10 ** 6):
+            assert buffer.snap(offset) == 600
+            assert buffer.time_of(offset) == 12.0
+        assert buffer.time_of(299) == 10.0
+        assert buffer.offset_at(11.5) == 300
+        assert buffer.offset_at(99.0) == 600
+        assert buffer.offset_at(1.0) == 0
+
+        # Overwriting the start of the ring expires the boundaries it held
+        buffer.write(bytes(700))
+        assert buffer.oldest == 500
+        assert buffer.boundary_offsets == [600]
+        assert buffer.boundary_times == [12.0]
+        assert buffer.snap(0) == 600
+        assert buffer.time_of(599) is None
+
+        buffer.clear_boundaries()
+        assert buffer.snap(10 ** 6) == buffer.written
+    finally:
+        buffer.close()
+
+
+def metadata(title=None) -> bytes:
+    """ICY length byte plus a NUL-padded metadata block"""
+    if title is None:
+        return b"\0"
+    text = f"StreamTitle='{title}';".encode()
+    blocks = -(-len(text) // 16)
+    return bytes([blocks]) + text.ljust(blocks * 16, b"\0")
+
+
+def test_icy_metadata_is_stripped_across_chunk_boundaries(tmp_path):
+    metaint = 16
+    audio_blocks = [bytes([i]) * metaint for i in range(1, 6)]
+    stream = bytearray()
+    expected_boundaries = [0]
+    for block, meta in zip(audio_blocks, ("One", None, "Two", "Two", "Three")):
+        stream += block + metadata(meta)
+        expected_boundaries.append(len(stream))
+    stream += b"tail"
+
+    for size in range(1, len(stream) + 1):
+        session = TimeShiftSession(URL, 4096, buffer_dir=tmp_path)
+        session.metaint = session._audio_left = metaint
+        session.buffer.mark_boundary(0, time.monotonic())
+        titles = []
+        session.title_listeners.append(titles.append)
+        session.listeners.append(lambda audio: None)
+
+        audio = bytearray()
+        for start in range(0, len(stream), size):
+            chunk = bytes(stream[start:start + size])
+            base = session.buffer.written
+            session.buffer.write(chunk)
+            audio += session._track_boundaries(base, chunk)
+
+        assert bytes(audio) == b"".join(audio_blocks) + b"tail", size
+        assert titles == ["One", "Two", "Three"], size
+        assert session.buffer.boundary_offsets == expected_boundaries, size
+        asyncio.run(session.close())
+
+
+async def until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def open_reader(port: int):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /timeshift HTTP/1.0\r\n\r\n")
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    return reader, writer
+
+
+def test_seek_during_an_active_read(tmp_path):
+    async def run():
+        session = TimeShiftSession(URL, 64 * 1024, buffer_dir=tmp_path)
+        # Stand-ins for the upstream download; the test writes the ring itself
+        session._fetch_task = asyncio.create_task(asyncio.sleep(3600))
+        finished = []
+
+        async def handle(reader, writer):
+            await session._handle_client(reader, writer)
+            finished.append(writer)
+
+        session._server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = session._server.sockets[0].getsockname()[1]
+        buffer = session.buffer
+
+        stream = bytearray()
+        now = time.monotonic()
+        for second in range(4):
+            buffer.mark_boundary(buffer.written, now - 4 + second)
+            chunk = bytes([second + 1]) * 1000
+            buffer.write(chunk)
+            stream += chunk
+
+        try:
+            # Reader A starts at the last boundary before live
+            a_reader, a_writer = await open_reader(port)
+            assert await a_reader.readexactly(1000) == stream[3000:4000]
+            await until(lambda: session.reader_offset == 4000)
+
+            assert session.seek(2.5) == 1000
+            assert session.reader_offset is None
+
+            # A keeps playing the old position but no longer reports it
+            buffer.write(b"\x09" * 500)
+            stream += b"\x09" * 500
+            assert await a_reader.readexactly(500) == stream[4000:4500]
+            await asyncio.sleep(0.05)
+            assert session.reader_offset is None
+            assert session.resume_offset == 1000
+
+            # Reader B picks up the seek target
+            b_reader, b_writer = await open_reader(port)
+            assert await b_reader.readexactly(3500) == stream[1000:4500]
+            await until(lambda: session.reader_offset == 4500)
+            assert session.resume_offset is None
+
+            # A finishing late must not overwrite where B is
+            a_writer.close()
+            while not finished:
+                buffer.write(b"\x0a" * 100)
+                stream += b"\x0a" * 100
+                await b_reader.readexactly(100)
+                await asyncio.sleep(0.01)
+            assert session.resume_offset is None
+            assert session.reader_offset == buffer.written
+
+            # B is the current reader, so it does record where it stopped
+            b_writer.close()
+            while len(finished) < 2:
+                buffer.write(b"\x0b" * 100)
+                await asyncio.sleep(0.01)
+            assert session.resume_offset == session.reader_offset
+        finally:
+            session._fetch_task.cancel()
+            await session.close()
+
+    asyncio.run(run())